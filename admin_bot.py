@@ -2,18 +2,91 @@
 AKBIS Telegram Bot - Admin Komutları
 Telegram üzerinden bot kontrolü sağlar.
 """
+import asyncio
 import os
-import requests
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+from typing import Dict, List, Optional
+
+import httpx
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 
-from config import TELEGRAM_BOT_TOKEN, ADMIN_CHAT_ID, GITHUB_TOKEN, GITHUB_REPO, AKBIS_PAGES
+from config import (
+    TELEGRAM_BOT_TOKEN, ADMIN_CHAT_ID, GITHUB_TOKEN, GITHUB_REPO, AKBIS_PAGES,
+    SEARCH_PAGE_SIZE, EEE_PAGE, EEE_SOURCE_ID, TELEGRAM_API_BASE
+)
 from database import (
     init_db, get_stats, set_status, get_status,
     init_professor_preferences, get_professor_preferences,
-    set_professor_enabled, set_all_professors_enabled, get_enabled_professors
+    set_professor_enabled, set_all_professors_enabled,
+    search_announcements, subscribe, unsubscribe, get_chat_subscriptions,
+    get_outbox_stats
 )
+from telegram_bot import format_search_results, escape_html
+from search import parse_search_args
+from history import format_report
+from main import Checker
+from pipeline import RunStats
+
+
+# Daemon modunda periyodik kontrol işinin adı
+CHECK_JOB = "check"
+
+# SQLite çağrıları event loop'u bloklamasın diye tek bir thread'de sırayla çalışır
+db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="admin-db")
+
+
+async def run_db(func, *args, **kwargs):
+    """Senkron veritabanı fonksiyonunu DB thread'inde çalıştır ve sonucunu bekle"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, partial(func, *args, **kwargs))
+
+
+class PreferenceCache:
+    """
+    Hoca tercihlerinin bellek içi kopyası.
+    Bot açılışında bir kez yüklenir; değişiklikler önce veritabanına,
+    ardından belleğe yazılır (write-through). Komutlar SQLite'a gitmeden
+    numaraya göre O(1) okur.
+    """
+    
+    def __init__(self):
+        self.by_id: Dict[int, dict] = {}
+    
+    def load(self):
+        """Tercihleri veritabanından yükle (yoksa varsayılanlarla oluştur)"""
+        init_professor_preferences(AKBIS_PAGES)
+        self.by_id = {p["id"]: p for p in get_professor_preferences()}
+    
+    def get(self, professor_id: int) -> Optional[dict]:
+        return self.by_id.get(professor_id)
+    
+    def all(self) -> List[dict]:
+        return list(self.by_id.values())
+    
+    def enabled(self) -> List[dict]:
+        return [p for p in self.by_id.values() if p["enabled"]]
+    
+    async def set_enabled(self, professor_id: int, enabled: bool) -> Optional[dict]:
+        """Takip durumunu değiştir; hoca yoksa None döner"""
+        prof = self.by_id.get(professor_id)
+        if prof is None or not await run_db(set_professor_enabled, professor_id, enabled):
+            return None
+        prof["enabled"] = enabled
+        return prof
+    
+    async def set_all(self, enabled: bool) -> int:
+        """Tüm hocaların takip durumunu değiştir, etkilenen sayıyı döndür"""
+        await run_db(set_all_professors_enabled, enabled)
+        for prof in self.by_id.values():
+            prof["enabled"] = enabled
+        return len(self.by_id)
+
+
+preferences = PreferenceCache()
 
 
 # Admin olup olmadığını kontrol et
@@ -37,6 +110,8 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/unfollow - Takibi bırak\n"
         "/followall - Tümünü takip et\n"
         "/unfollowmall - Takibi kaldır\n"
+        "/search - Duyurularda ara\n"
+        "/subscribe - Kendi aboneliklerin\n"
         "/help - Yardım\n",
         parse_mode="HTML"
     )
@@ -50,9 +125,11 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⛔ Bu komut sadece admin için kullanılabilir.")
         return
     
-    stats = get_stats()
-    interval = get_status("check_interval") or "5"
-    enabled = get_enabled_professors()
+    stats, interval, outbox = await asyncio.gather(
+        run_db(get_stats), run_db(get_status, "check_interval"), run_db(get_outbox_stats)
+    )
+    interval = interval or "5"
+    enabled = preferences.enabled()
     
     await update.message.reply_text(
         f"📊 <b>Bot Durumu</b>\n\n"
@@ -60,8 +137,9 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"📅 Son 24 saat: {stats['last_24h']}\n"
         f"⏰ Son kontrol: {stats['last_check']}\n"
         f"⏱️ Kontrol aralığı: {interval} dakika\n"
-        f"👥 Takip edilen: {len(enabled)} hoca\n\n"
-        f"✅ Bot aktif",
+        f"👥 Takip edilen: {len(enabled)} hoca\n"
+        f"📤 Bekleyen gönderim: {outbox.get('pending', 0)}\n\n"
+        f"✅ Bot aktif" + (" (daemon)" if "checker" in context.bot_data else ""),
         parse_mode="HTML"
     )
 
@@ -74,9 +152,7 @@ async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⛔ Bu komut sadece admin için kullanılabilir.")
         return
     
-    # Tercihleri başlat
-    init_professor_preferences(AKBIS_PAGES)
-    prefs = get_professor_preferences()
+    prefs = preferences.all()
     
     if not prefs:
         await update.message.reply_text("❌ Hoca listesi bulunamadı.")
@@ -117,11 +193,9 @@ async def follow_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         prof_id = int(context.args[0])
         
-        if set_professor_enabled(prof_id, True):
-            prefs = get_professor_preferences()
-            prof = next((p for p in prefs if p["id"] == prof_id), None)
-            name = prof["name"] if prof else f"#{prof_id}"
-            await update.message.reply_text(f"✅ <b>{name}</b> takip ediliyor.", parse_mode="HTML")
+        prof = await preferences.set_enabled(prof_id, True)
+        if prof:
+            await update.message.reply_text(f"✅ <b>{prof['name']}</b> takip ediliyor.", parse_mode="HTML")
         else:
             await update.message.reply_text(f"❌ Hoca #{prof_id} bulunamadı. /list ile listeyi kontrol edin.")
             
@@ -148,11 +222,9 @@ async def unfollow_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         prof_id = int(context.args[0])
         
-        if set_professor_enabled(prof_id, False):
-            prefs = get_professor_preferences()
-            prof = next((p for p in prefs if p["id"] == prof_id), None)
-            name = prof["name"] if prof else f"#{prof_id}"
-            await update.message.reply_text(f"❌ <b>{name}</b> takibi bırakıldı.", parse_mode="HTML")
+        prof = await preferences.set_enabled(prof_id, False)
+        if prof:
+            await update.message.reply_text(f"❌ <b>{prof['name']}</b> takibi bırakıldı.", parse_mode="HTML")
         else:
             await update.message.reply_text(f"❌ Hoca #{prof_id} bulunamadı.")
             
@@ -168,8 +240,7 @@ async def followall_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⛔ Bu komut sadece admin için kullanılabilir.")
         return
     
-    set_all_professors_enabled(True)
-    count = len(get_enabled_professors())
+    count = await preferences.set_all(True)
     await update.message.reply_text(f"✅ Tüm hocalar ({count}) takip ediliyor.")
 
 
@@ -181,10 +252,104 @@ async def unfollowmall_command(update: Update, context: ContextTypes.DEFAULT_TYP
         await update.message.reply_text("⛔ Bu komut sadece admin için kullanılabilir.")
         return
     
-    set_all_professors_enabled(False)
+    await preferences.set_all(False)
     await update.message.reply_text("❌ Tüm takipler kaldırıldı. Hiçbir hoca takip edilmiyor.")
 
 
+def source_name(source_id: int) -> str:
+    """Kaynak numarasının görünen adı"""
+    if source_id == EEE_SOURCE_ID:
+        return EEE_PAGE["name"]
+    if 0 <= source_id < len(AKBIS_PAGES):
+        return AKBIS_PAGES[source_id]["name"]
+    return f"#{source_id}"
+
+
+def parse_source_ids(args: list) -> list:
+    """Argümanlardaki geçerli kaynak numaralarını döndür"""
+    valid = set(range(len(AKBIS_PAGES))) | {EEE_SOURCE_ID}
+    ids = []
+    for arg in args:
+        if arg.isdigit() and int(arg) in valid:
+            ids.append(int(arg))
+    return ids
+
+
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /subscribe <numara...> komutu - Sohbeti hocalara abone eder (herkes kullanabilir)
+    """
+    chat_id = str(update.effective_chat.id)
+    source_ids = parse_source_ids(context.args or [])
+    
+    if not source_ids:
+        current = await run_db(get_chat_subscriptions, chat_id)
+        lines = [
+            "Kullanım: /subscribe <numara...>",
+            "Örnek: /subscribe 5 13",
+            f"EEE bölüm duyuruları için: /subscribe {EEE_SOURCE_ID}",
+            "",
+            "<b>Kaynaklar:</b>",
+        ]
+        lines.extend(f"{i} - {source_name(i)}" for i in range(len(AKBIS_PAGES)))
+        lines.append(f"{EEE_SOURCE_ID} - {source_name(EEE_SOURCE_ID)}")
+        if current:
+            lines.extend(["", "<b>Abonelikleriniz:</b>"])
+            lines.extend(f"• {i} - {source_name(i)}" for i in current)
+        await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+        return
+    
+    await run_db(subscribe, chat_id, source_ids)
+    names = "\n".join(f"• {source_name(i)}" for i in source_ids)
+    await update.message.reply_text(f"✅ Abone olundu:\n{names}")
+
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /unsubscribe <numara...|all> komutu - Sohbetin aboneliklerini kaldırır
+    """
+    chat_id = str(update.effective_chat.id)
+    
+    if context.args and context.args[0].lower() == "all":
+        await run_db(unsubscribe, chat_id)
+        await update.message.reply_text("❌ Tüm abonelikler kaldırıldı.")
+        return
+    
+    source_ids = parse_source_ids(context.args or [])
+    if not source_ids:
+        await update.message.reply_text(
+            "Kullanım: /unsubscribe <numara...>\n"
+            "Tümü için: /unsubscribe all"
+        )
+        return
+    
+    await run_db(unsubscribe, chat_id, source_ids)
+    names = "\n".join(f"• {source_name(i)}" for i in source_ids)
+    await update.message.reply_text(f"❌ Abonelik kaldırıldı:\n{names}")
+
+
+async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /search <kelimeler> [#sayfa] komutu - Duyuru arşivinde arama yapar
+    """
+    query, page = parse_search_args(context.args or [])
+    
+    if not query:
+        await update.message.reply_text(
+            "Kullanım: /search <kelimeler> [#sayfa]\n"
+            "Örnek: /search vize tarihi\n"
+            "Örnek: /search vize tarihi #2"
+        )
+        return
+    
+    result = await run_db(search_announcements, query, page=page, page_size=SEARCH_PAGE_SIZE)
+    await update.message.reply_text(
+        format_search_results(query, result, SEARCH_PAGE_SIZE),
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+
+
 async def check_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     /check komutu - Manuel kontrol tetikler (GitHub Actions workflow)
@@ -195,9 +360,21 @@ async def check_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     await update.message.reply_text("🔄 Kontrol başlatılıyor...")
     
+    # Daemon modunda kontrol bu süreçte hemen çalışır
+    if "checker" in context.bot_data:
+        result = await run_checker(context.application)
+        if result is None:
+            await update.message.reply_text("⏳ Kontrol zaten sürüyor veya tamamlanamadı.")
+        else:
+            await update.message.reply_text(
+                f"✅ Kontrol tamamlandı: {result.new} yeni duyuru, {result.sent} gönderildi "
+                f"({result.elapsed:.0f} sn)."
+            )
+        return
+    
     # GitHub Actions workflow'u manuel tetikle
     if GITHUB_TOKEN and GITHUB_REPO:
-        success = trigger_workflow()
+        success = await trigger_workflow()
         if success:
             await update.message.reply_text("✅ Kontrol başlatıldı! Sonuçlar birkaç dakika içinde gelecek.")
         else:
@@ -209,6 +386,29 @@ async def check_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /history [gün] komutu - Kaynak, host ve aşama sürelerinin p50/p95 trendi
+    """
+    if not is_admin(update.effective_user.id):
+        await update.message.reply_text("⛔ Bu komut sadece admin için kullanılabilir.")
+        return
+    
+    days = 28
+    if context.args:
+        try:
+            days = max(7, min(int(context.args[0]), 365))
+        except ValueError:
+            await update.message.reply_text("Kullanım: /history [gün]\nÖrnek: /history 28")
+            return
+    
+    report = await run_db(format_report, days)
+    await update.message.reply_text(
+        f"📈 <b>Çalıştırma Geçmişi</b>\n\n<pre>{escape_html(report)}</pre>",
+        parse_mode="HTML"
+    )
+
+
 async def setinterval_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     /setinterval <dakika> komutu - Kontrol aralığını ayarlar
@@ -217,19 +417,24 @@ async def setinterval_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         await update.message.reply_text("⛔ Bu komut sadece admin için kullanılabilir.")
         return
     
+    daemon = "checker" in context.bot_data
+    # GitHub Actions cron'u en az 5 dakikada bir çalışır; daemon'da sınır yok
+    min_interval = 1 if daemon else 5
+    
     if not context.args:
         await update.message.reply_text(
             "Kullanım: /setinterval <dakika>\n"
             "Örnek: /setinterval 10\n\n"
-            "Not: Minimum 5 dakika (GitHub Actions limiti)"
+            f"Not: Minimum {min_interval} dakika"
+            + ("" if daemon else " (GitHub Actions limiti)")
         )
         return
     
     try:
         interval = int(context.args[0])
         
-        if interval < 5:
-            await update.message.reply_text("⚠️ Minimum aralık 5 dakikadır.")
+        if interval < min_interval:
+            await update.message.reply_text(f"⚠️ Minimum aralık {min_interval} dakikadır.")
             return
         
         if interval > 1440:  # 24 saat
@@ -237,7 +442,12 @@ async def setinterval_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             return
         
         # Aralığı kaydet
-        set_status("check_interval", str(interval))
+        await run_db(set_status, "check_interval", str(interval))
+        
+        if daemon:
+            schedule_checks(context.application, interval, first=interval * 60)
+            await update.message.reply_text(f"✅ Kontrol aralığı {interval} dakika olarak ayarlandı.")
+            return
         
         await update.message.reply_text(
             f"✅ Kontrol aralığı {interval} dakika olarak ayarlandı.\n\n"
@@ -260,17 +470,23 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/unfollow <no> - Takibi bırak\n"
         "/followall - Tümünü takip et\n"
         "/unfollowmall - Tüm takipleri kaldır\n\n"
+        "<b>Abonelik (herkes):</b>\n"
+        "/subscribe <no...> - Bu sohbeti hocalara abone et\n"
+        "/unsubscribe <no...|all> - Aboneliği kaldır\n\n"
+        "<b>Arama:</b>\n"
+        "/search <kelimeler> - Duyurularda ara\n\n"
         "<b>Genel:</b>\n"
         "/status - Bot durumu\n"
         "/check - Manuel kontrol\n"
-        "/setinterval <dk> - Kontrol aralığı\n\n"
+        "/setinterval <dk> - Kontrol aralığı\n"
+        "/history [gün] - Süre trendleri (p50/p95)\n\n"
         "<b>Örnek:</b>\n"
         "<code>/follow 5</code> - 5. hocayı takip et",
         parse_mode="HTML"
     )
 
 
-def trigger_workflow() -> bool:
+async def trigger_workflow() -> bool:
     """
     GitHub Actions workflow'u manuel tetikle.
     
@@ -292,15 +508,39 @@ def trigger_workflow() -> bool:
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        async with httpx.AsyncClient(timeout=30) as client:
+            response = await client.post(url, json=payload, headers=headers)
         return response.status_code == 204
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Error triggering workflow: {e}")
         return False
 
 
+async def run_checker(application: Application) -> Optional[RunStats]:
+    """Daemon kontrolünü event loop'u bloklamadan ayrı bir thread'de çalıştır"""
+    return await asyncio.to_thread(application.bot_data["checker"].run)
+
+
+async def check_job(context: ContextTypes.DEFAULT_TYPE):
+    """JobQueue işi: periyodik kontrol"""
+    await run_checker(context.application)
+
+
+def schedule_checks(application: Application, minutes: int, first: float = 0):
+    """Periyodik kontrolü (yeniden) zamanla"""
+    for job in application.job_queue.get_jobs_by_name(CHECK_JOB):
+        job.schedule_removal()
+    application.job_queue.run_repeating(check_job, interval=minutes * 60, first=first, name=CHECK_JOB)
+
+
 def main():
-    """Admin bot'u başlat (polling mode)"""
+    """
+    Admin bot'u başlat (polling mode).
+    --daemon ile duyuru kontrolü de bu süreçte, bot_status'taki
+    check_interval aralığıyla JobQueue üzerinden çalışır.
+    """
+    daemon = "--daemon" in sys.argv[1:]
+    
     if not TELEGRAM_BOT_TOKEN:
         print("ERROR: TELEGRAM_BOT_TOKEN not set!")
         return
@@ -309,10 +549,17 @@ def main():
     
     # Veritabanını başlat
     init_db()
-    init_professor_preferences(AKBIS_PAGES)
+    preferences.load()
     
     # Application oluştur
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .base_url(f"{TELEGRAM_API_BASE}/bot")
+        .base_file_url(f"{TELEGRAM_API_BASE}/file/bot")
+        .concurrent_updates(True)  # Bir komut I/O beklerken diğerleri işlenir
+        .build()
+    )
     
     # Komut handler'ları ekle
     app.add_handler(CommandHandler("start", start_command))
@@ -324,11 +571,29 @@ def main():
     app.add_handler(CommandHandler("unfollowmall", unfollowmall_command))
     app.add_handler(CommandHandler("check", check_command))
     app.add_handler(CommandHandler("setinterval", setinterval_command))
+    app.add_handler(CommandHandler("history", history_command))
+    app.add_handler(CommandHandler("search", search_command))
+    app.add_handler(CommandHandler("subscribe", subscribe_command))
+    app.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
     app.add_handler(CommandHandler("help", help_command))
     
+    checker = None
+    if daemon:
+        if app.job_queue is None:
+            print('ERROR: Daemon mode requires "python-telegram-bot[job-queue]"')
+            return
+        checker = app.bot_data["checker"] = Checker()
+        interval = int(get_status("check_interval") or "5")
+        schedule_checks(app, interval)
+        print(f"⏱️ Daemon mode: checking every {interval} min")
+    
     # Bot'u başlat
     print("✅ Bot is running! Press Ctrl+C to stop.")
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+    try:
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        if checker:
+            checker.close()
 
 
 if __name__ == "__main__":
@@ -3,17 +3,51 @@ AKBIS Telegram Bot - Vercel Serverless Webhook Handler
 Telegram komutlarını 7/24 işler.
 """
 import os
+import sys
 import json
-import sqlite3
-import hashlib
-import requests
+import time
+import base64
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
 from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+# Cold start'ı kısa tutmak için ağır modüller (requests, sqlite3) yüklenmez;
+# sqlite3 sadece /search ilk çalıştığında import edilir.
+
+# Arama sorgusu ve mesajı admin bot ile ortak (repo kökündeki search.py,
+# sadece standart kütüphane kullanır; vercel.json includeFiles ile paketlenir)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search import escape_html, format_search_results, parse_search_args, run_search  # noqa: E402
 
 # Environment variables
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
 ADMIN_CHAT_ID = os.environ.get("ADMIN_CHAT_ID", "")
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
 GITHUB_REPO = os.environ.get("GITHUB_REPO", "")
+GITHUB_API_BASE = os.environ.get("GITHUB_API_BASE", "https://api.github.com").rstrip("/")
+# İsteğe bağlı: instance'lar arası paylaşılan update_id deposu (Upstash Redis REST)
+UPSTASH_REDIS_REST_URL = os.environ.get("UPSTASH_REDIS_REST_URL", "").rstrip("/")
+UPSTASH_REDIS_REST_TOKEN = os.environ.get("UPSTASH_REDIS_REST_TOKEN", "")
+
+# Tercih önbelleği: warm instance boyunca preferences.json içeriği ve sha'sı
+PREFS_TTL = 30  # saniye; sonrasında ETag ile koşullu istekle doğrulanır
+PREFS_WRITE_ATTEMPTS = 4  # sha çakışmasında oku-birleştir-yaz deneme sayısı
+_prefs_cache = {"data": None, "sha": None, "etag": None, "missing": False, "fetched_at": 0.0}
+
+# Host başına keep-alive bağlantılar (warm instance boyunca tekrar kullanılır)
+_connections = {}
+
+# Arama için GitHub'daki veritabanının yerel kopyası (warm instance boyunca tekrar kullanılır)
+SEARCH_DB_PATH = "/tmp/akbis_search.db"
+SEARCH_DB_TTL = 300  # saniye; sonrasında ETag ile koşullu istekle doğrulanır
+SEARCH_PAGE_SIZE = 5
+_search_db = {"etag": None, "fetched_at": 0.0}
+
+# İşlenmiş update_id'ler: Telegram yavaş yanıtlarda update'i tekrar gönderir
+UPDATE_DEDUP_TTL = 3600  # saniye
+UPDATE_DEDUP_MAX = 10000  # bellekte tutulacak en fazla kayıt
+_seen_updates = {}  # update_id -> son geçerlilik zamanı
 
 # Hoca listesi (config.py'den)
 AKBIS_PAGES = [
@@ -38,20 +72,110 @@ AKBIS_PAGES = [
     {"id": 18, "name": "Prof. Dr. Ergün ERÇELEBİ"},
     {"id": 19, "name": "Prof. Dr. Nuran DOĞRU"},
 ]
+ALL_MASK = (1 << len(AKBIS_PAGES)) - 1
+EEE_SOURCE_ID = 100
+SOURCE_NAMES = {p["id"]: p["name"] for p in AKBIS_PAGES}
+SOURCE_NAMES[EEE_SOURCE_ID] = "EEE Bölümü"
 
 
-def send_message(chat_id: str, text: str, parse_mode: str = "HTML"):
-    """Telegram mesajı gönder"""
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": chat_id,
-        "text": text,
-        "parse_mode": parse_mode
-    }
-    try:
-        requests.post(url, json=payload, timeout=10)
-    except:
-        pass
+class HTTPResponse:
+    """http_request yanıtı (requests.Response'un kullanılan kısmı)"""
+    
+    def __init__(self, status_code: int, headers, content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+    
+    def json(self):
+        return json.loads(self.content)
+
+
+def http_request(method: str, url: str, headers: dict = None, json_body=None, timeout: float = 10) -> HTTPResponse:
+    """
+    Stdlib ile HTTP isteği yap.
+    Bağlantı host başına saklanır; kopmuşsa bir kez yeniden bağlanılır.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    
+    headers = dict(headers or {})
+    headers.setdefault("User-Agent", "akbis-webhook")
+    body = None
+    if json_body is not None:
+        body = json.dumps(json_body).encode()
+        headers["Content-Type"] = "application/json"
+    
+    for attempt in range(2):
+        conn = _connections.get(key)
+        if conn is None:
+            conn_class = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+            conn = _connections[key] = conn_class(parts.netloc, timeout=timeout)
+        conn.timeout = timeout
+        
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            return HTTPResponse(resp.status, resp.headers, resp.read())
+        except (HTTPException, OSError):
+            conn.close()
+            _connections.pop(key, None)
+            if attempt:
+                raise
+
+
+def claim_update(update_id) -> bool:
+    """
+    update_id'yi işlenmiş olarak işaretle.
+    Önce bu instance'ın belleğine, ayarlıysa Redis'e (SET NX EX) bakılır;
+    Redis'e ulaşılamazsa update işlenir (yanıt kaybetmek yerine tekrar riski).
+    Komut hata verirse işaret release_update ile kaldırılır.
+    
+    Returns:
+        True eğer update ilk kez görülüyorsa
+    """
+    if update_id is None:
+        return True
+    
+    now = time.time()
+    if _seen_updates.get(update_id, 0) > now:
+        return False
+    
+    if len(_seen_updates) >= UPDATE_DEDUP_MAX:
+        for key in [k for k, expires in _seen_updates.items() if expires <= now]:
+            del _seen_updates[key]
+        if len(_seen_updates) >= UPDATE_DEDUP_MAX:
+            _seen_updates.clear()
+    _seen_updates[update_id] = now + UPDATE_DEDUP_TTL
+    
+    if UPSTASH_REDIS_REST_URL and UPSTASH_REDIS_REST_TOKEN:
+        url = f"{UPSTASH_REDIS_REST_URL}/set/akbis:update:{update_id}/1/NX/EX/{UPDATE_DEDUP_TTL}"
+        try:
+            resp = http_request("GET", url, headers={"Authorization": f"Bearer {UPSTASH_REDIS_REST_TOKEN}"}, timeout=2)
+            if resp.status_code == 200:
+                return resp.json().get("result") == "OK"
+        except Exception as e:
+            print(f"Error claiming update: {e}")
+    
+    return True
+
+
+def release_update(update_id):
+    """
+    İşlenemeyen update'in işaretini kaldır.
+    Telegram update'i tekrar gönderdiğinde komut yeniden işlenebilir.
+    """
+    if update_id is None:
+        return
+    
+    _seen_updates.pop(update_id, None)
+    
+    if UPSTASH_REDIS_REST_URL and UPSTASH_REDIS_REST_TOKEN:
+        url = f"{UPSTASH_REDIS_REST_URL}/del/akbis:update:{update_id}"
+        try:
+            http_request("GET", url, headers={"Authorization": f"Bearer {UPSTASH_REDIS_REST_TOKEN}"}, timeout=2)
+        except Exception as e:
+            print(f"Error releasing update: {e}")
 
 
 def is_admin(user_id: int) -> bool:
@@ -59,197 +183,453 @@ def is_admin(user_id: int) -> bool:
     return str(user_id) == str(ADMIN_CHAT_ID)
 
 
-def get_preferences_from_github() -> dict:
-    """GitHub repo'dan tercihleri al"""
-    if not GITHUB_TOKEN or not GITHUB_REPO:
-        return {}
+def _github_prefs_request(method: str, headers: dict = None, json_body: dict = None) -> HTTPResponse:
+    """preferences.json için GitHub contents API isteği"""
+    url = f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/contents/preferences.json"
+    all_headers = {"Authorization": f"token {GITHUB_TOKEN}", "Accept": "application/vnd.github+json"}
+    all_headers.update(headers or {})
+    return http_request(method, url, headers=all_headers, json_body=json_body)
+
+
+def _refresh_preferences(force: bool = False) -> bool:
+    """
+    Önbelleği GitHub'dan güncelle.
+    TTL dolmadıysa istek yapılmaz; dolduysa ETag ile koşullu istek yapılır
+    ve dosya değişmemişse (304) mevcut veri kullanılmaya devam eder.
     
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/preferences.json"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
+    Returns:
+        True eğer önbellekte geçerli veri varsa
+    """
+    now = time.time()
+    if not force and _prefs_cache["data"] is not None and now - _prefs_cache["fetched_at"] < PREFS_TTL:
+        return True
+    
+    headers = {}
+    if _prefs_cache["etag"] and _prefs_cache["data"] is not None:
+        headers["If-None-Match"] = _prefs_cache["etag"]
     
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = _github_prefs_request("GET", headers=headers)
+        if resp.status_code == 304:
+            _prefs_cache["fetched_at"] = now
+            return True
         if resp.status_code == 200:
-            import base64
-            content = base64.b64decode(resp.json()["content"]).decode()
-            return json.loads(content)
-    except:
-        pass
+            body = resp.json()
+            _prefs_cache.update({
+                "data": json.loads(base64.b64decode(body["content"]).decode()),
+                "sha": body.get("sha"),
+                "etag": resp.headers.get("ETag"),
+                "missing": False,
+                "fetched_at": now
+            })
+            return True
+        if resp.status_code == 404:
+            # Dosya henüz yok: ilk kayıtta sha'sız oluşturulur
+            _prefs_cache.update({"data": None, "sha": None, "etag": None, "missing": True, "fetched_at": 0.0})
+    except Exception as e:
+        print(f"Error fetching preferences: {e}")
+    
+    return _prefs_cache["data"] is not None
+
+
+def get_preferences_from_github() -> dict:
+    """
+    GitHub repo'dan tercihleri al.
+    Warm instance boyunca önbellekten döner (PREFS_TTL), çağıran taraf
+    dönen sözlüğü değiştirebilir (kopya verilir).
+    """
+    if not GITHUB_TOKEN or not GITHUB_REPO:
+        return {}
+    
+    if _refresh_preferences():
+        return json.loads(json.dumps(_prefs_cache["data"]))
     
     # Varsayılan: tümü aktif
     return {"enabled": list(range(20))}
 
 
-def save_preferences_to_github(prefs: dict) -> bool:
-    """Tercihleri GitHub'a kaydet"""
+def enabled_mask(prefs: dict) -> int:
+    """
+    Takip edilen hocaların bit maskesi (bit i = hoca i).
+    Eski biçimdeki "enabled" listesi de okunur; hiçbiri yoksa tümü aktif.
+    """
+    if "enabled_mask" in prefs:
+        return int(prefs["enabled_mask"])
+    if "enabled" in prefs:
+        return sum(1 << i for i in set(prefs["enabled"]) if 0 <= i < len(AKBIS_PAGES))
+    return ALL_MASK
+
+
+def set_enabled_mask(prefs: dict, mask: int):
+    """Maskeyi tercihlere yaz (eski "enabled" listesi kaldırılır)"""
+    prefs.pop("enabled", None)
+    prefs["enabled_mask"] = mask & ALL_MASK
+
+
+def mask_ids(mask: int) -> list:
+    """Bit maskesindeki hoca numaraları"""
+    return [i for i in range(len(AKBIS_PAGES)) if mask >> i & 1]
+
+
+def update_preferences(mutate) -> tuple:
+    """
+    Tercihleri oku-değiştir-yaz döngüsüyle güncelle.
+    mutate(prefs) sözlüğü yerinde değiştirir. Başka bir yazma sha'yı
+    eskittiyse (409/422) güncel dosya yeniden okunur ve değişiklik onun
+    üzerine tekrar uygulanır; böylece eşzamanlı düzenlemeler birbirini ezmez.
+    Değişiklik sonucu dosya aynı kalıyorsa yazma yapılmaz.
+    
+    Returns:
+        (başarılı_mı, değişti_mi)
+    """
+    if not GITHUB_TOKEN or not GITHUB_REPO:
+        return False, False
+    
+    for attempt in range(PREFS_WRITE_ATTEMPTS):
+        if not _refresh_preferences(force=attempt > 0) and not _prefs_cache["missing"]:
+            return False, False
+        
+        current = _prefs_cache["data"] or {}
+        prefs = json.loads(json.dumps(current))
+        mutate(prefs)
+        if prefs == current and not _prefs_cache["missing"]:
+            return True, False
+        
+        payload = {
+            "message": "Update preferences via Telegram",
+            "content": base64.b64encode(json.dumps(prefs, indent=2).encode()).decode()
+        }
+        if _prefs_cache["sha"]:
+            payload["sha"] = _prefs_cache["sha"]
+        
+        try:
+            resp = _github_prefs_request("PUT", json_body=payload)
+        except Exception as e:
+            print(f"Error saving preferences: {e}")
+            return False, False
+        
+        if resp.status_code in [200, 201]:
+            _prefs_cache.update({
+                "data": prefs,
+                "sha": resp.json().get("content", {}).get("sha"),
+                "etag": None,
+                "missing": False,
+                "fetched_at": time.time()
+            })
+            return True, True
+        
+        if resp.status_code not in [409, 422]:
+            print(f"Error saving preferences: HTTP {resp.status_code}")
+            return False, False
+    
+    return False, False
+
+
+def parse_id_list(args: list, upper: int) -> tuple:
+    """
+    "1 3 5-9" veya "1,3,5-9" biçimindeki numaraları ayrıştır.
+    
+    Returns:
+        (geçerli numaralar, geçersiz parçalar)
+    """
+    ids, invalid = [], []
+    for token in ",".join(args).split(","):
+        token = token.strip()
+        if not token:
+            continue
+        start, _, end = token.partition("-")
+        if start.isdigit() and (not end or end.isdigit()):
+            low, high = int(start), int(end or start)
+            if low <= high < upper:
+                ids.extend(i for i in range(low, high + 1) if i not in ids)
+                continue
+        invalid.append(token)
+    return ids, invalid
+
+
+def fetch_search_db() -> bool:
+    """
+    Actions'ın commit ettiği seen_announcements.db dosyasını /tmp'ye indir.
+    Dosya SEARCH_DB_TTL süresince yeniden indirilmez; süre dolunca ETag ile
+    koşullu istek yapılır ve dosya değişmemişse (304) indirme yapılmaz.
+    """
+    now = time.time()
+    exists = os.path.exists(SEARCH_DB_PATH)
+    if exists and now - _search_db["fetched_at"] < SEARCH_DB_TTL:
+        return True
+    
     if not GITHUB_TOKEN or not GITHUB_REPO:
         return False
     
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/preferences.json"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
+    url = f"{GITHUB_API_BASE}/repos/{GITHUB_REPO}/contents/seen_announcements.db"
+    headers = {
+        "Authorization": f"token {GITHUB_TOKEN}",
+        "Accept": "application/vnd.github.raw"
+    }
+    if exists and _search_db["etag"]:
+        headers["If-None-Match"] = _search_db["etag"]
     
-    # Önce mevcut SHA'yı al
-    sha = None
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = http_request("GET", url, headers=headers, timeout=20)
+        if resp.status_code == 304:
+            _search_db["fetched_at"] = now
+            return True
         if resp.status_code == 200:
-            sha = resp.json().get("sha")
-    except:
-        pass
+            tmp_path = SEARCH_DB_PATH + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(resp.content)
+            os.replace(tmp_path, SEARCH_DB_PATH)
+            _search_db.update({"etag": resp.headers.get("ETag"), "fetched_at": now})
+            return True
+    except Exception as e:
+        print(f"Error fetching search db: {e}")
     
-    # Kaydet
-    import base64
-    content = base64.b64encode(json.dumps(prefs, indent=2).encode()).decode()
+    # İndirilemezse eski kopya varsa onunla devam et
+    return os.path.exists(SEARCH_DB_PATH)
+
+
+def search_announcements(text: str, page: int) -> dict:
+    """İndirilen veritabanında arama yap (sorgu: search.run_search)"""
+    if not text.split() or not fetch_search_db():
+        return {"total": 0, "page": 1, "results": []}
     
-    payload = {
-        "message": "Update preferences via Telegram",
-        "content": content
-    }
-    if sha:
-        payload["sha"] = sha
+    import sqlite3
     
     try:
-        resp = requests.put(url, json=payload, headers=headers, timeout=10)
-        return resp.status_code in [200, 201]
-    except:
-        return False
+        conn = sqlite3.connect(f"file:{SEARCH_DB_PATH}?mode=ro", uri=True)
+        try:
+            return run_search(conn, text, page, SEARCH_PAGE_SIZE)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Search error: {e}")
+        return {"total": 0, "page": 1, "results": []}
 
 
-def handle_command(chat_id: str, user_id: int, text: str):
-    """Komutu işle"""
-    if not text.startswith("/"):
-        return
+def handle_subscription(chat_id: str, command: str, args: list) -> str:
+    """/subscribe ve /unsubscribe komutları"""
+    source_ids = [int(a) for a in args if a.isdigit() and int(a) in SOURCE_NAMES]
+    remove_all = command == "/unsubscribe" and args[:1] == ["all"]
     
+    if not source_ids and not remove_all:
+        lines = [f"Kullanım: {command} <numara...>", "Örnek: /subscribe 5 13", "", "<b>Kaynaklar:</b>"]
+        lines.extend(f"{i} - {name}" for i, name in SOURCE_NAMES.items())
+        return "\n".join(lines)
+    
+    def mutate(prefs: dict):
+        subscriptions = prefs.setdefault("subscriptions", {})
+        current = set(subscriptions.get(chat_id, []))
+        
+        if command == "/subscribe":
+            current |= set(source_ids)
+        elif remove_all:
+            current = set()
+        else:
+            current -= set(source_ids)
+        
+        if current:
+            subscriptions[chat_id] = sorted(current)
+        else:
+            subscriptions.pop(chat_id, None)
+        if not subscriptions:
+            prefs.pop("subscriptions")
+    
+    ok, _ = update_preferences(mutate)
+    if not ok:
+        return "❌ Kayıt başarısız."
+    
+    if remove_all:
+        return "❌ Tüm abonelikler kaldırıldı."
+    names = "\n".join(f"• {SOURCE_NAMES[i]}" for i in source_ids)
+    verb = "✅ Abone olundu" if command == "/subscribe" else "❌ Abonelik kaldırıldı"
+    return f"{verb}:\n{names}"
+
+
+def parse_command(text: str) -> tuple:
+    """Mesajı (komut, argümanlar) olarak ayır"""
     parts = text.split()
     command = parts[0].lower().split("@")[0]  # @botname kısmını kaldır
-    args = parts[1:] if len(parts) > 1 else []
+    return command, parts[1:]
+
+
+def handle_command(chat_id: str, user_id: int, text: str):
+    """
+    Komutu işle.
+    
+    Returns:
+        Gönderilecek yanıt metni (yanıt yoksa None)
+    """
+    if not text.startswith("/"):
+        return None
+    
+    command, args = parse_command(text)
     
     if command == "/start":
-        send_message(chat_id, 
+        return (
             "🤖 <b>AKBIS Duyuru Botu</b>\n\n"
             "Komutlar:\n"
             "/list - Hoca listesi\n"
-            "/follow <no> - Takip et\n"
-            "/unfollow <no> - Takibi bırak\n"
+            "/follow <no...> - Takip et (örn. 1 3 5-9)\n"
+            "/unfollow <no...> - Takibi bırak\n"
             "/followall - Tümünü takip et\n"
             "/unfollowmall - Takipleri kaldır\n"
+            "/search <kelimeler> - Duyurularda ara\n"
+            "/subscribe <no...> - Bu sohbeti abone et\n"
+            "/unsubscribe <no...|all> - Aboneliği kaldır\n"
             "/status - Durum\n"
             "/help - Yardım"
         )
-        return
+    
+    # Chat abonelikleri herkese açık (preferences.json -> "subscriptions")
+    if command in ("/subscribe", "/unsubscribe"):
+        return handle_subscription(chat_id, command, args)
+    
+    # Arama herkese açık
+    if command == "/search":
+        query, page = parse_search_args(args)
+        
+        if not query:
+            return "Kullanım: /search <kelimeler> [#sayfa]\nÖrnek: /search vize tarihi"
+        
+        result = search_announcements(query, page)
+        return format_search_results(query, result, SEARCH_PAGE_SIZE)
     
     # Admin gerektiren komutlar
     if not is_admin(user_id):
-        send_message(chat_id, "⛔ Bu komut sadece admin için.")
-        return
+        return "⛔ Bu komut sadece admin için."
     
     if command == "/list":
-        prefs = get_preferences_from_github()
-        enabled = prefs.get("enabled", list(range(20)))
+        mask = enabled_mask(get_preferences_from_github())
         
         lines = ["📋 <b>Hoca Listesi</b>\n"]
         for p in AKBIS_PAGES:
-            status = "✅" if p["id"] in enabled else "❌"
+            status = "✅" if mask >> p["id"] & 1 else "❌"
             lines.append(f"{status} <b>{p['id']}</b> - {p['name']}")
         
-        lines.append("\n<i>/follow 5</i> - 5 numaralı hocayı takip et")
-        send_message(chat_id, "\n".join(lines))
+        lines.append("\n<i>/follow 5</i> veya <i>/follow 1 3 5-9</i> - hocaları takip et")
+        return "\n".join(lines)
     
-    elif command == "/follow" and args:
-        try:
-            prof_id = int(args[0])
-            if 0 <= prof_id < 20:
-                prefs = get_preferences_from_github()
-                enabled = set(prefs.get("enabled", list(range(20))))
-                enabled.add(prof_id)
-                prefs["enabled"] = list(enabled)
-                
-                if save_preferences_to_github(prefs):
-                    name = AKBIS_PAGES[prof_id]["name"]
-                    send_message(chat_id, f"✅ <b>{name}</b> takip ediliyor.")
-                else:
-                    send_message(chat_id, "❌ Kayıt başarısız. GitHub token kontrol edin.")
-            else:
-                send_message(chat_id, "❌ Geçersiz numara (0-19).")
-        except:
-            send_message(chat_id, "❌ Geçersiz numara.")
-    
-    elif command == "/unfollow" and args:
-        try:
-            prof_id = int(args[0])
-            if 0 <= prof_id < 20:
-                prefs = get_preferences_from_github()
-                enabled = set(prefs.get("enabled", list(range(20))))
-                enabled.discard(prof_id)
-                prefs["enabled"] = list(enabled)
-                
-                if save_preferences_to_github(prefs):
-                    name = AKBIS_PAGES[prof_id]["name"]
-                    send_message(chat_id, f"❌ <b>{name}</b> takibi bırakıldı.")
-                else:
-                    send_message(chat_id, "❌ Kayıt başarısız.")
-            else:
-                send_message(chat_id, "❌ Geçersiz numara (0-19).")
-        except:
-            send_message(chat_id, "❌ Geçersiz numara.")
-    
-    elif command == "/followall":
-        prefs = {"enabled": list(range(20))}
-        if save_preferences_to_github(prefs):
-            send_message(chat_id, "✅ Tüm hocalar (20) takip ediliyor.")
-        else:
-            send_message(chat_id, "❌ Kayıt başarısız.")
+    elif command in ("/follow", "/unfollow") and args:
+        ids, invalid = parse_id_list(args, len(AKBIS_PAGES))
+        if invalid or not ids:
+            return f"❌ Geçersiz numara: {escape_html(' '.join(invalid) or ' '.join(args))} (0-19, örn. 1 3 5-9)"
+        
+        bits = sum(1 << i for i in ids)
+        follow = command == "/follow"
+        
+        def mutate(prefs: dict):
+            mask = enabled_mask(prefs)
+            set_enabled_mask(prefs, mask | bits if follow else mask & ~bits)
+        
+        # Tüm numaralar tek commit ile yazılır
+        ok, _ = update_preferences(mutate)
+        if not ok:
+            return "❌ Kayıt başarısız. GitHub token kontrol edin."
+        
+        names = "\n".join(f"• {AKBIS_PAGES[i]['name']}" for i in ids)
+        if follow:
+            return f"✅ Takip ediliyor:\n{names}"
+        return f"❌ Takip bırakıldı:\n{names}"
     
-    elif command == "/unfollowmall":
-        prefs = {"enabled": []}
-        if save_preferences_to_github(prefs):
-            send_message(chat_id, "❌ Tüm takipler kaldırıldı.")
-        else:
-            send_message(chat_id, "❌ Kayıt başarısız.")
+    elif command in ("/followall", "/unfollowmall"):
+        # Chat aboneliklerini koruyarak sadece global listeyi değiştir
+        follow = command == "/followall"
+        ok, _ = update_preferences(lambda prefs: set_enabled_mask(prefs, ALL_MASK if follow else 0))
+        if not ok:
+            return "❌ Kayıt başarısız."
+        if follow:
+            return f"✅ Tüm hocalar ({len(AKBIS_PAGES)}) takip ediliyor."
+        return "❌ Tüm takipler kaldırıldı."
     
     elif command == "/status":
-        prefs = get_preferences_from_github()
-        enabled = prefs.get("enabled", [])
-        send_message(chat_id,
+        enabled = mask_ids(enabled_mask(get_preferences_from_github()))
+        return (
             f"📊 <b>Bot Durumu</b>\n\n"
             f"👥 Takip edilen: {len(enabled)} hoca\n"
             f"✅ Bot aktif (GitHub Actions)"
         )
     
     elif command == "/help":
-        send_message(chat_id,
+        return (
             "📖 <b>Yardım</b>\n\n"
             "/list - Hocaları listele\n"
-            "/follow <no> - Takip et\n"
-            "/unfollow <no> - Takibi bırak\n"
+            "/follow <no...> - Takip et (örn. 1 3 5-9)\n"
+            "/unfollow <no...> - Takibi bırak\n"
             "/followall - Tümünü takip\n"
             "/unfollowmall - Takipleri kaldır\n"
+            "/search <kelimeler> - Duyurularda ara\n"
             "/status - Durum"
         )
+    
+    return None
 
 
 class handler(BaseHTTPRequestHandler):
+    """
+    Telegram webhook'u.
+    
+    Komutun yanıtı HTTP yanıtının gövdesinde Bot API metodu olarak döner
+    (ayrı sendMessage isteği yok). Komut yanıt gönderilmeden önce işlenir:
+    Vercel fonksiyonu yanıttan sonra dondurabilir, yanıt sonrası iş garanti
+    değildir. GitHub'a giden komutlar önbellek ve toplu yazma ile kısa sürer;
+    Telegram'ın olası tekrar gönderimleri update_id ile ayıklanır.
+    """
+    
+    def respond(self, body: bytes = b"OK", content_type: str = "text/plain", status: int = 200):
+        """Yanıtı gönder ve bağlantıyı hemen boşalt"""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+        self.responded = True
+    
     def do_POST(self):
+        started = time.perf_counter()
+        self.responded = False
+        command, mode = "-", "inline"
+        
         content_length = int(self.headers.get('Content-Length', 0))
         body = self.rfile.read(content_length)
+        claimed = None
         
         try:
             update = json.loads(body)
+            message = update.get("message") or {}
+            text = message.get("text", "")
             
-            if "message" in update:
-                message = update["message"]
+            if text.startswith("/") and not claim_update(update.get("update_id")):
+                # Tekrar gönderilen update: komut ve yanıt tekrarlanmaz
+                mode = "duplicate"
+            elif text.startswith("/"):
+                claimed = update.get("update_id")
                 chat_id = str(message["chat"]["id"])
                 user_id = message["from"]["id"]
-                text = message.get("text", "")
+                command = parse_command(text)[0]
                 
-                if text:
-                    handle_command(chat_id, user_id, text)
+                reply = handle_command(chat_id, user_id, text)
+                if reply:
+                    self.respond(json.dumps({
+                        "method": "sendMessage",
+                        "chat_id": chat_id,
+                        "text": reply,
+                        "parse_mode": "HTML"
+                    }).encode(), "application/json")
         except Exception as e:
             print(f"Error: {e}")
+            if claimed is not None and not self.responded:
+                # Komut tamamlanmadı: işareti kaldır ve Telegram'ın tekrar
+                # göndermesi için hata dön (aksi halde tekrar gönderim atlanırdı)
+                release_update(claimed)
+                mode = "failed"
+                self.respond(b"Error", status=500)
         
-        self.send_response(200)
-        self.end_headers()
-        self.wfile.write(b'OK')
+        if not self.responded:
+            self.respond()
+        
+        total_ms = (time.perf_counter() - started) * 1000
+        print(f"⏱️ {command} {mode} total={total_ms:.0f}ms")
     
     def do_GET(self):
         self.send_response(200)
@@ -0,0 +1,142 @@
+"""
+AKBIS Telegram Bot - Dosya Eki Gönderimi
+Duyuru dosyalarını Telegram'a belge olarak yükler. Yüklenen her dosyanın
+file_id'si link ve içerik hash'i ile önbelleğe alınır; aynı dosya başka
+chatlere veya tekrar gönderildiğinde indirilip yüklenmeden file_id kullanılır.
+"""
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from config import TELEGRAM_UPLOAD_LIMIT
+from database import get_cached_file_id, cache_file_id
+from telegram_bot import get_session
+
+
+# sendMediaGroup en fazla 10 öğe kabul eder
+MEDIA_GROUP_LIMIT = 10
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+
+def download_file(url: str) -> Optional[bytes]:
+    """
+    Dosyayı indir. Telegram yükleme limitini aşan veya indirilemeyen
+    dosyalar için None döner (mesajdaki link yedek olarak kalır).
+    """
+    try:
+        response = get_session().get(url, headers=HEADERS, timeout=60, stream=True)
+        response.raise_for_status()
+
+        chunks, size = [], 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > TELEGRAM_UPLOAD_LIMIT:
+                print(f"File too large for upload: {url}")
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
+    except requests.RequestException as e:
+        print(f"Error downloading {url}: {e}")
+        return None
+
+
+def resolve_file(file: Dict[str, str]) -> Optional[dict]:
+    """
+    Dosyayı gönderime hazırla.
+
+    Returns:
+        {"name", "keys", "file_id"} (önbellekte varsa) veya
+        {"name", "keys", "content"} (yüklenmesi gerekiyorsa); dosya
+        kullanılamıyorsa None
+    """
+    url = file.get("url", "")
+    if not url:
+        return None
+
+    name = file.get("name") or url.split("/")[-1]
+    keys = [f"url:{url}"]
+
+    file_id = get_cached_file_id(keys)
+    if file_id:
+        return {"name": name, "keys": keys, "file_id": file_id}
+
+    content = download_file(url)
+    if content is None:
+        return None
+
+    # Farklı linklerdeki aynı içerik tekrar yüklenmez
+    keys.append("sha256:" + hashlib.sha256(content).hexdigest())
+    file_id = get_cached_file_id(keys[1:])
+    if file_id:
+        cache_file_id(keys, file_id, name)
+        return {"name": name, "keys": keys, "file_id": file_id}
+
+    return {"name": name, "keys": keys, "content": content}
+
+
+def upload_name(name: str, url_name: str = "") -> str:
+    """Telegram'da görünecek dosya adı (uzantı linkten tamamlanır)"""
+    if "." not in name[-6:] and "." in url_name:
+        name += url_name[url_name.rfind("."):]
+    return name
+
+
+def build_requests(chat_id: str, files: List[Dict[str, str]]) -> List[Tuple[str, dict, dict, List[dict]]]:
+    """
+    Dosyalar için API isteklerini oluştur.
+    Tek dosya sendDocument, birden fazla dosya en fazla 10'arlı
+    sendMediaGroup ile gönderilir.
+
+    Returns:
+        [(metot, parametreler, yüklenecek dosyalar, çözümlenmiş dosyalar)] listesi
+    """
+    resolved = []
+    for file in files:
+        item = resolve_file(file)
+        if item:
+            item["name"] = upload_name(item["name"], file.get("url", "").split("/")[-1])
+            resolved.append(item)
+
+    api_requests = []
+    for start in range(0, len(resolved), MEDIA_GROUP_LIMIT):
+        group = resolved[start:start + MEDIA_GROUP_LIMIT]
+
+        if len(group) == 1:
+            item = group[0]
+            if "file_id" in item:
+                api_requests.append(("sendDocument", {"chat_id": chat_id, "document": item["file_id"]}, None, group))
+            else:
+                uploads = {"document": (item["name"], item["content"])}
+                api_requests.append(("sendDocument", {"chat_id": chat_id}, uploads, group))
+            continue
+
+        media, uploads = [], {}
+        for i, item in enumerate(group):
+            if "file_id" in item:
+                media.append({"type": "document", "media": item["file_id"]})
+            else:
+                field = f"file{i}"
+                uploads[field] = (item["name"], item["content"])
+                media.append({"type": "document", "media": f"attach://{field}"})
+        api_requests.append(("sendMediaGroup", {"chat_id": chat_id, "media": media}, uploads or None, group))
+
+    return api_requests
+
+
+def remember_file_ids(group: List[dict], result):
+    """
+    Başarılı gönderimin yanıtındaki file_id'leri önbelleğe yaz.
+
+    Args:
+        group: build_requests'in çözümlenmiş dosyaları
+        result: Telegram yanıtının "result" alanı (Message veya Message listesi)
+    """
+    messages = result if isinstance(result, list) else [result]
+    for item, message in zip(group, messages):
+        document = (message or {}).get("document")
+        if document and "file_id" not in item:
+            cache_file_id(item["keys"], document["file_id"], item["name"])
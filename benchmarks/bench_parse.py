@@ -0,0 +1,78 @@
+"""
+AKBIS Telegram Bot - Ayrıştırma Benchmark'ı
+Sentetik AKBIS sayfalarını aynı süreçte ve farklı sayıda işçili süreç
+havuzunda ayrıştırarak sayfa/sn değerlerini karşılaştırır. Sonuçların
+aynı süreçteki ayrıştırmayla birebir aynı olduğunu da doğrular.
+
+Kullanım:
+    python -m benchmarks.bench_parse
+    python -m benchmarks.bench_parse --pages 400 --workers 1 2 4 8 --chunk-size 8
+"""
+import argparse
+import os
+import time
+
+from parse_pool import ParsePool, parse_inline
+
+
+def make_page(index: int, announcements: int) -> str:
+    """Gerçek sayfa yapısında (buton + collapse gövdesi + dosyalar) sentetik HTML"""
+    items = []
+    for i in range(announcements):
+        body = " ".join(f"Duyuru {index}-{i} içerik satırı {j}, sınav ve ödev bilgileri." for j in range(12))
+        items.append(f"""
+        <div class="card">
+          <div class="card-header">
+            <button class="btn btn-link text-left" data-target="#collapse{index}_{i}">
+              <span class="badge badge-primary">{i % 28 + 1:02d}.10.2026</span> Ders duyurusu {index}-{i}
+            </button>
+          </div>
+          <div id="collapse{index}_{i}" class="collapse">
+            <div class="card-body">
+              <p>{body}</p>
+              <a href="/upload/files/{index}_{i}.pdf">Ek {i}.pdf</a>
+            </div>
+          </div>
+        </div>""")
+    return f"<html><head><title>AKBIS</title></head><body><div class='container'>{''.join(items)}</div></body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Süreç havuzunda ayrıştırma benchmark'ı")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--announcements", type=int, default=20, help="sayfa başına duyuru")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=4)
+    args = parser.parse_args()
+
+    pages = [
+        (1000 + i, f"Hoca {i}", f"https://akbis.gaziantep.edu.tr/detay/?A_ID={i}", make_page(i, args.announcements))
+        for i in range(args.pages)
+    ]
+
+    start = time.perf_counter()
+    expected = parse_inline(pages)
+    inline = time.perf_counter() - start
+
+    print(f"📊 {args.pages} sayfa x {args.announcements} duyuru, chunk {args.chunk_size}, {os.cpu_count()} çekirdek\n")
+    print(f"{'mod':<12} {'süre':>8} {'sayfa/sn':>9} {'hızlanma':>9}  sonuç")
+    print(f"{'aynı süreç':<12} {inline:>7.2f}s {args.pages / inline:>9.1f} {1.0:>8.1f}x  ✓")
+
+    failed = False
+    for workers in sorted(set(args.workers)):
+        # Havuz başlatma süresi ölçüme dahil: gerçek çalıştırmada da ödenir
+        start = time.perf_counter()
+        with ParsePool(workers=workers, chunk_size=args.chunk_size, min_pages=0) as pool:
+            results = pool.map(pages)
+        elapsed = time.perf_counter() - start
+
+        same = results == expected
+        failed = failed or not same
+        print(f"{f'{workers} işçi':<12} {elapsed:>7.2f}s {args.pages / elapsed:>9.1f} "
+              f"{inline / elapsed:>8.1f}x  {'✓' if same else '✗ farklı'}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+"""
+AKBIS Telegram Bot - Uçtan Uca Tekrar Oynatma Benchmark'ı
+Gerçek bir kontrolü kasete kaydeder (AKBIS/EEE sayfaları, ekler ve
+Telegram yanıtları), sonra aynı kontrolü ağ olmadan tekrar tekrar
+çalıştırarak aşama sürelerini ve toplam süreyi ölçer.
+
+Kayıt sırasında Telegram istekleri varsayılan olarak yerel Bot API
+taklidine gider; gerçek sohbetlere mesaj gönderilmez.
+
+Kullanım:
+    python -m benchmarks.bench_replay record run.cassette.gz
+    python -m benchmarks.bench_replay replay run.cassette.gz --runs 5
+    python -m benchmarks.bench_replay replay run.cassette.gz --timing recorded
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+
+# Tekrar oynatmada Telegram'a gerçekten bağlanılmaz; kasetteki "telegram:"
+# kayıtları bu adrese eşlenir
+REPLAY_API_BASE = "http://telegram.replay.invalid"
+
+
+def configure(database_path: str, api_base: str):
+    """Modüller config'i import anında okur; import'tan önce ortamı ayarla"""
+    os.environ["DATABASE_PATH"] = database_path
+    os.environ["HISTORY_DATABASE_PATH"] = history_path(database_path)
+    os.environ["TELEGRAM_API_BASE"] = api_base
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+    os.environ.setdefault("TELEGRAM_CHAT_ID", "1000")
+
+
+def history_path(database_path: str) -> str:
+    """Benchmark'ın çalıştırma geçmişi gerçek geçmiş dosyasına karışmasın"""
+    root, ext = os.path.splitext(database_path)
+    return f"{root}.history{ext}"
+
+
+def fresh_database(path: str):
+    """Boş veritabanı oluştur; tüm hocalar aktif"""
+    import database
+    from config import AKBIS_PAGES
+
+    database.DATABASE_PATH = path
+    database.HISTORY_DATABASE_PATH = history_path(path)
+    for name in [path, database.HISTORY_DATABASE_PATH]:
+        if os.path.exists(name):
+            os.remove(name)
+    database.init_db()
+    database.init_professor_preferences(AKBIS_PAGES)
+
+
+def record(args) -> int:
+    from benchmarks.cassette import Cassette
+    from benchmarks.mock_bot_api import MockBotAPI
+
+    workdir = tempfile.mkdtemp(prefix="akbis-record-")
+    database_path = os.path.join(workdir, "record.db")
+    api = None
+    try:
+        if args.live_telegram:
+            api_base = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+        else:
+            api = MockBotAPI(latency=args.latency).start()
+            api_base = api.base_url
+        configure(database_path, api_base)
+
+        from main import run_check
+        fresh_database(database_path)
+
+        with Cassette.record(args.cassette, telegram_base=api_base) as cassette:
+            stats = run_check()
+
+        print(f"\n{stats.summary()}")
+        print(f"📼 {len(cassette.interactions)} istek kaydedildi: {args.cassette}")
+    finally:
+        if api:
+            api.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+def replay(args) -> int:
+    from benchmarks.cassette import Cassette
+
+    workdir = tempfile.mkdtemp(prefix="akbis-replay-")
+    configure(os.path.join(workdir, "replay.db"), REPLAY_API_BASE)
+    from main import run_check
+
+    results = []
+    try:
+        for i in range(args.runs):
+            fresh_database(os.path.join(workdir, f"replay-{i}.db"))
+            with Cassette.replay(args.cassette, REPLAY_API_BASE, args.timing) as cassette:
+                start = time.perf_counter()
+                stats = run_check()
+                wall = time.perf_counter() - start
+            results.append((stats, wall, cassette.misses))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n📊 {args.runs} tekrar (zamanlama: {args.timing})\n")
+    print(f"{'#':>3} {'süre':>8} {'ilk':>7} {'duyuru':>7} {'yeni':>5} {'gönd.':>6} {'duyuru/sn':>10} {'eksik':>6}  aşamalar")
+    for i, (stats, wall, misses) in enumerate(results, 1):
+        first = f"{stats.first_send:.2f}s" if stats.first_send is not None else "-"
+        rate = stats.parsed / wall if wall else 0.0
+        stages = ", ".join(f"{name} {busy:.2f}s" for name, busy in stats.stage_busy.items())
+        print(f"{i:>3} {wall:>7.2f}s {first:>7} {stats.parsed:>7} {stats.new:>5} {stats.sent:>6} "
+              f"{rate:>10.1f} {misses:>6}  {stages}")
+
+    walls = [wall for _, wall, _ in results]
+    print(f"\nmedyan {statistics.median(walls):.2f}s, en iyi {min(walls):.2f}s")
+
+    # Kasette olmayan istek veya gönderilemeyen mesaj, kaydın bu kodla
+    # uyumsuz olduğunu gösterir (ör. istek sırası/sayısı değişti)
+    failed = any(misses or stats.sent != stats.new + stats.edited for stats, _, misses in results)
+    if failed:
+        print("\n❌ Kaset bu çalıştırmayı tam karşılamıyor; yeniden kaydedin")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıt/tekrar oynatma ile uçtan uca benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="gerçek bir kontrolü kasete kaydet")
+    rec.add_argument("cassette")
+    rec.add_argument("--live-telegram", action="store_true",
+                     help="Telegram isteklerini taklit yerine TELEGRAM_API_BASE'e gönder")
+    rec.add_argument("--latency", type=float, default=0.05, help="Bot API taklidinin gecikmesi (sn)")
+
+    rep = commands.add_parser("replay", help="kaseti ağ olmadan tekrar oynat")
+    rep.add_argument("cassette")
+    rep.add_argument("--runs", type=int, default=3)
+    rep.add_argument("--timing", choices=["none", "recorded"], default="none",
+                     help="'recorded': yanıtları kayıttaki süre kadar geciktir")
+
+    args = parser.parse_args()
+    return record(args) if args.command == "record" else replay(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+AKBIS Telegram Bot - Gönderim Benchmark'ı
+Yerel Bot API taklidine karşı TelegramSender'ın hızını ve gecikme
+dağılımını ölçer. Ağ bağlantısı gerektirmez.
+
+Kullanım:
+    python -m benchmarks.bench_sender
+    python -m benchmarks.bench_sender --messages 300 --chats 20
+"""
+import argparse
+import os
+import time
+
+from benchmarks.mock_bot_api import MockBotAPI
+
+
+SCENARIOS = [
+    # (ad, sunucu ayarları)
+    ("ideal", {}),
+    ("latency 50ms", {"latency": 0.05, "jitter": 0.02}),
+    ("429 %5", {"latency": 0.02, "rate_429": 0.05, "retry_after": 1}),
+    ("5xx %5", {"latency": 0.02, "rate_5xx": 0.05}),
+    ("limitler", {"latency": 0.02, "enforce_limits": True}),
+]
+
+
+def percentile(values: list, p: float) -> float:
+    """Sıralı listede p yüzdelik değeri (en yakın sıra)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+def run_scenario(name: str, options: dict, messages: int, chats: int) -> dict:
+    """Tek senaryoyu çalıştır ve sonuçları döndür"""
+    with MockBotAPI(seed=42, **options) as api:
+        # Modüller config'i import anında okur; taklit sunucuyu hedefle
+        import telegram_bot
+        telegram_bot.TELEGRAM_API_BASE = api.base_url
+
+        from sender import TelegramSender
+
+        latencies = []
+        start = time.perf_counter()
+
+        with TelegramSender() as sender:
+            pending = []
+            for i in range(messages):
+                submitted = time.perf_counter()
+                future = sender.submit(str(1000 + i % chats), f"Benchmark mesajı #{i}")
+                future.add_done_callback(
+                    lambda f, t=submitted: latencies.append(time.perf_counter() - t)
+                )
+                pending.append(future)
+            results = [f.result() for f in pending]
+
+        elapsed = time.perf_counter() - start
+        stats = api.state.stats()
+
+        # Chat içi sıra korundu mu?
+        ordered = all(
+            [int(text.split("#")[1]) for _, text in log] == sorted(int(text.split("#")[1]) for _, text in log)
+            for log in api.state.chat_log.values()
+        )
+
+    return {
+        "name": name,
+        "sent": sum(results),
+        "failed": len(results) - sum(results),
+        "elapsed": elapsed,
+        "rate": messages / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "server": stats["counts"],
+        "ordered": ordered,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TelegramSender benchmark")
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--chats", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark")
+    import config
+    config.TELEGRAM_BOT_TOKEN = os.environ["TELEGRAM_BOT_TOKEN"]
+    import telegram_bot
+    import sender
+    telegram_bot.TELEGRAM_BOT_TOKEN = sender.TELEGRAM_BOT_TOKEN = config.TELEGRAM_BOT_TOKEN
+
+    print(f"📊 {args.messages} mesaj, {args.chats} chat\n")
+    print(f"{'senaryo':<14} {'msj/sn':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'hata':>5} {'sıra':>5}  sunucu")
+
+    failed = False
+    for name, options in SCENARIOS:
+        r = run_scenario(name, options, args.messages, args.chats)
+        failed = failed or r["failed"] > 0 or not r["ordered"]
+        print(f"{r['name']:<14} {r['rate']:>8.1f} {r['p50'] * 1000:>6.0f}ms {r['p95'] * 1000:>6.0f}ms "
+              f"{r['p99'] * 1000:>6.0f}ms {r['failed']:>5} {'✓' if r['ordered'] else '✗':>5}  {r['server']}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
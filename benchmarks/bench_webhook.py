@@ -0,0 +1,269 @@
+"""
+AKBIS Telegram Bot - Webhook Yanıt Süresi Benchmark'ı
+api/webhook.py handler'ını soket açmadan çağırır; GitHub contents API'si
+yerel bir taklitle (gecikme enjekte edilebilir) değiştirilir. Her komut için
+üç durumda p50/p95 yanıt süresi ve GitHub istek sayısı raporlanır:
+
+- cold: yeni instance (tercih önbelleği ve arama veritabanı yok)
+- expired: önbellek süresi dolmuş (ETag ile koşullu istek, 304)
+- warm: önbellek geçerli (GitHub isteği yok)
+
+Tüm ölçümlerin p95'i eşiği aşarsa hata verir.
+
+Kullanım:
+    python -m benchmarks.bench_webhook
+    python -m benchmarks.bench_webhook --latency 0.15 --announcements 5000 --max-p95-ms 1000
+"""
+import argparse
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.bench_sender import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "api"))
+
+import webhook  # noqa: E402
+
+REPO = "akbis/bot"
+ADMIN_ID = 7
+
+COMMANDS = ["/start", "/search vize", "/search final sınavı #2", "/list", "/status", "/follow 3"]
+MODES = ["cold", "expired", "warm"]
+
+
+class MockGitHub:
+    """
+    preferences.json ve seen_announcements.db için GitHub contents API taklidi.
+    GET (ETag / If-None-Match ile 304) ve sha kontrollü PUT desteklenir.
+    """
+
+    def __init__(self, files: dict, latency: float = 0.0):
+        self.files = dict(files)  # dosya adı -> içerik (bytes)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)  # (metot, dosya, durum) -> sayı
+        self.bytes_sent = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def sha(self, name: str) -> str:
+        return hashlib.sha1(self.files[name]).hexdigest()
+
+    def _make_handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, status: int, body: bytes = b"", headers: dict = None):
+                # İstemci yanıtı almadan sayılır; aksi halde sonraki ölçüme yazılabilir
+                with mock.lock:
+                    mock.counts[(self.command, self.path.rsplit("/", 1)[-1], status)] += 1
+                    mock.bytes_sent += len(body)
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                time.sleep(mock.latency)
+                name = self.path.rsplit("/", 1)[-1]
+                if name not in mock.files:
+                    return self.reply(404, b"{}")
+                etag = f'"{mock.sha(name)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self.reply(304, headers={"ETag": etag})
+                if self.headers.get("Accept") == "application/vnd.github.raw":
+                    return self.reply(200, mock.files[name], {"ETag": etag})
+                body = json.dumps({
+                    "content": base64.b64encode(mock.files[name]).decode(),
+                    "sha": mock.sha(name)
+                }).encode()
+                self.reply(200, body, {"ETag": etag, "Content-Type": "application/json"})
+
+            def do_PUT(self):
+                time.sleep(mock.latency)
+                name = self.path.rsplit("/", 1)[-1]
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with mock.lock:
+                    if name in mock.files and payload.get("sha") != mock.sha(name):
+                        conflict = True
+                    else:
+                        conflict = False
+                        mock.files[name] = base64.b64decode(payload["content"])
+                if conflict:
+                    return self.reply(409, b"{}")
+                self.reply(200, json.dumps({"content": {"sha": mock.sha(name)}}).encode())
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def call_webhook(update: dict) -> tuple:
+    """Handler'ı soket açmadan çalıştır; (durum kodu, gövde) döndür"""
+    body = json.dumps(update).encode()
+    request = webhook.handler.__new__(webhook.handler)
+    request.rfile = io.BytesIO(body)
+    request.wfile = io.BytesIO()
+    request.headers = {"Content-Length": str(len(body))}
+    request.request_version = "HTTP/1.1"
+    request.requestline = "POST /api/webhook HTTP/1.1"
+    request.command = "POST"
+    request.client_address = ("127.0.0.1", 0)
+    request.do_POST()
+    head, _, payload = request.wfile.getvalue().partition(b"\r\n\r\n")
+    return int(head.split()[1]), payload
+
+
+def build_search_db(path: str, count: int) -> bytes:
+    """Arama testleri için count duyuruluk bir veritabanı oluştur ve içeriğini döndür"""
+    import database
+
+    previous = database.DATABASE_PATH, database.HISTORY_DATABASE_PATH
+    database.set_database_path(path)
+    database.set_history_database_path(os.path.join(os.path.dirname(path), "history.db"))
+    try:
+        database.init_db()
+        words = ["vize", "final", "sınavı", "proje", "ödev", "laboratuvar", "not", "ders", "iptal", "telafi"]
+        rows = []
+        for i in range(count):
+            title = f"{words[i % 10].capitalize()} {words[i * 7 % 10]} duyurusu {i}"
+            content = " ".join(words[(i + k) % 10] for k in range(60))
+            rows.append((f"h{i}", f"Hoca {i % 21}", title, f"{i % 28 + 1:02d}.10.2026", content, [],
+                         f"https://akbis.gantep.edu.tr/a/{i}"))
+        database.bootstrap_seen(rows, [], 0, [])
+    finally:
+        database.set_database_path(previous[0])
+        database.set_history_database_path(previous[1])
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def make_update(update_id: int, text: str) -> dict:
+    return {"update_id": update_id, "message": {"text": text, "chat": {"id": 42}, "from": {"id": ADMIN_ID}}}
+
+
+def reset_instance(mode: str):
+    """Webhook'un bellek durumunu ölçülecek duruma getir"""
+    webhook._seen_updates.clear()
+    if mode == "cold":
+        webhook._connections.clear()
+        webhook._prefs_cache.update({"data": None, "sha": None, "etag": None, "missing": False, "fetched_at": 0.0})
+        webhook._search_db.update({"etag": None, "fetched_at": 0.0})
+        if os.path.exists(webhook.SEARCH_DB_PATH):
+            os.remove(webhook.SEARCH_DB_PATH)
+    elif mode == "expired":
+        webhook._prefs_cache["fetched_at"] = 0.0
+        webhook._search_db["fetched_at"] = 0.0
+
+
+def run(iterations: int = 10, latency: float = 0.1, announcements: int = 2000) -> dict:
+    """
+    Tüm komutları her durumda iterations kez çalıştır.
+
+    Returns:
+        {(komut, durum): {"p50", "p95", "github"}} ve "all" anahtarında tüm ölçümlerin p95'i
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = build_search_db(os.path.join(tmp, "source.db"), announcements)
+        prefs = json.dumps({"enabled_mask": 0b1010}).encode()
+
+        with MockGitHub({"preferences.json": prefs, "seen_announcements.db": db}, latency) as github:
+            settings = {
+                "GITHUB_API_BASE": github.base_url, "GITHUB_REPO": REPO, "GITHUB_TOKEN": "test",
+                "ADMIN_CHAT_ID": str(ADMIN_ID), "UPSTASH_REDIS_REST_URL": "",
+                "SEARCH_DB_PATH": os.path.join(tmp, "search.db"),
+            }
+            previous = {name: getattr(webhook, name) for name in settings}
+            for name, value in settings.items():
+                setattr(webhook, name, value)
+
+            samples = defaultdict(list)
+            requests = defaultdict(int)
+            update_id = 0
+            try:
+                with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                    for command in COMMANDS:
+                        for mode in MODES:
+                            reset_instance("cold")
+                            if mode != "cold":
+                                # Önbelleği doldur
+                                update_id += 1
+                                call_webhook(make_update(update_id, command))
+                            for _ in range(iterations):
+                                reset_instance(mode)
+                                update_id += 1
+                                before = sum(github.counts.values())
+                                start = time.perf_counter()
+                                status, _ = call_webhook(make_update(update_id, command))
+                                samples[(command, mode)].append((time.perf_counter() - start) * 1000)
+                                requests[(command, mode)] += sum(github.counts.values()) - before
+                                assert status == 200, f"{command} {mode}: HTTP {status}"
+            finally:
+                for name, value in previous.items():
+                    setattr(webhook, name, value)
+
+    result = {
+        key: {"p50": percentile(values, 50), "p95": percentile(values, 95),
+              "github": requests[key] / iterations}
+        for key, values in samples.items()
+    }
+    result["all"] = percentile([v for values in samples.values() for v in values], 95)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook yanıt süresi benchmark'ı")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.1, help="GitHub API gecikmesi (saniye)")
+    parser.add_argument("--announcements", type=int, default=2000, help="arama veritabanındaki duyuru sayısı")
+    parser.add_argument("--max-p95-ms", type=float, default=1000.0, help="tüm ölçümlerin p95 eşiği")
+    args = parser.parse_args()
+
+    result = run(args.iterations, args.latency, args.announcements)
+
+    print(f"📊 GitHub gecikmesi {args.latency * 1000:.0f}ms, {args.announcements} duyuru, "
+          f"{args.iterations} tekrar\n")
+    print(f"{'komut':<26}{'durum':<9}{'p50':>8}{'p95':>8}{'GitHub':>8}")
+    for command in COMMANDS:
+        for mode in MODES:
+            r = result[(command, mode)]
+            print(f"{command:<26}{mode:<9}{r['p50']:>6.0f}ms{r['p95']:>6.0f}ms{r['github']:>8.1f}")
+    print(f"\np95 (tümü)  {result['all']:.0f}ms  (eşik {args.max_p95_ms:.0f}ms)")
+
+    if result["all"] > args.max_p95_ms:
+        print("\n❌ Webhook yanıt süresi eşiği aşıldı")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
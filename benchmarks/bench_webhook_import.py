@@ -0,0 +1,82 @@
+"""
+AKBIS Telegram Bot - Webhook Cold Start Benchmark'ı
+api/webhook.py'nin yeni bir yorumlayıcıda import süresini ölçer ve
+standart kütüphane tabanına göre ek yük eşiği aşarsa hata verir.
+Ağır modüllerin (requests, sqlite3) import anında yüklenmediğini de doğrular.
+
+Kullanım:
+    python -m benchmarks.bench_webhook_import
+    python -m benchmarks.bench_webhook_import --runs 15 --max-overhead-ms 30
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+
+# Cold start'ta yüklenmemesi gereken modüller
+FORBIDDEN_MODULES = ["requests", "urllib3", "sqlite3", "_sqlite3", "hashlib"]
+
+# Vercel runtime'ının zaten yüklediği modüller: taban ölçüm bunları içerir
+BASELINE_IMPORTS = "import os, json, time, base64, http.client, http.server, urllib.parse"
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(imports: str) -> dict:
+    """Yeni bir yorumlayıcıda import süresini ölç"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", PYTHONPATH=API_DIR)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(imports=imports)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook import süresi benchmark'ı")
+    parser.add_argument("--runs", type=int, default=9)
+    parser.add_argument("--max-overhead-ms", type=float, default=30.0,
+                        help="taban import süresine göre izin verilen ek yük")
+    args = parser.parse_args()
+
+    # İlk çalıştırma .pyc üretimini ve disk önbelleğini ısıtır
+    measure("import webhook")
+
+    baseline, webhook = [], []
+    modules = []
+    for _ in range(args.runs):
+        baseline.append(measure(BASELINE_IMPORTS)["elapsed"])
+        result = measure("import webhook")
+        webhook.append(result["elapsed"])
+        modules = result["modules"]
+
+    base_ms = statistics.median(baseline) * 1000
+    hook_ms = statistics.median(webhook) * 1000
+    overhead_ms = hook_ms - base_ms
+    loaded = [m for m in FORBIDDEN_MODULES if m in modules]
+
+    print(f"📊 {args.runs} çalıştırma (medyan)\n")
+    print(f"taban (stdlib)   {base_ms:>7.1f}ms")
+    print(f"import webhook   {hook_ms:>7.1f}ms")
+    print(f"ek yük           {overhead_ms:>7.1f}ms  (eşik {args.max_overhead_ms:.0f}ms)")
+    print(f"ağır modüller    {', '.join(loaded) if loaded else 'yok'}")
+
+    failed = overhead_ms > args.max_overhead_ms or bool(loaded)
+    if failed:
+        print("\n❌ Cold start gerilemesi")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+"""
+AKBIS Telegram Bot - HTTP Kayıt/Tekrar Oynatma (Cassette)
+requests üzerinden yapılan tüm istekleri (scraper, Telegram, ekler)
+gzip'li bir kasete kaydeder ve sonra ağ olmadan aynı yanıtları verir.
+
+Eşleştirme:
+- Önce (metot, URL, gövde özeti) ile birebir eşleşen, kullanılmamış kayıt
+- Yoksa aynı (metot, URL) için sıradaki kullanılmamış kayıt
+  (ör. multipart gövdelerdeki rastgele boundary)
+- Telegram adresi ve bot token'ı URL'den çıkarılır; kaset farklı
+  token veya TELEGRAM_API_BASE ile oynatılabilir
+
+Kullanım:
+    with Cassette.record("run.cassette.gz", telegram_base=api_base):
+        run_check()
+
+    with Cassette.replay("run.cassette.gz"):
+        run_check()
+"""
+import base64
+import gzip
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+CASSETTE_VERSION = 1
+
+# Kasete yazılan yanıt başlıkları (geri kalanı tekrar oynatmada gereksiz)
+KEPT_HEADERS = ("Content-Type", "Content-Encoding", "ETag", "Last-Modified")
+
+_TOKEN_PATTERN = re.compile(r"/bot[^/]+/")
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Tekrar oynatmada kasette karşılığı olmayan istek"""
+
+
+class Cassette:
+    """Kayıt veya tekrar oynatma oturumu (context manager)"""
+
+    def __init__(self, path: str, mode: str, telegram_base: str = "", timing: str = "none"):
+        """
+        Args:
+            path: Kaset dosyası (.gz)
+            mode: "record" veya "replay"
+            telegram_base: Telegram isteklerinin gittiği adres (kasette
+                           "telegram:" ile değiştirilir)
+            timing: Tekrar oynatmada "none" (beklemesiz) veya "recorded"
+                    (kayıttaki yanıt süresi kadar bekle)
+        """
+        self.path = path
+        self.mode = mode
+        self.telegram_base = telegram_base.rstrip("/")
+        self.timing = timing
+        self.lock = threading.Lock()
+        self.interactions = []
+        self.by_body = defaultdict(deque)
+        self.by_url = defaultdict(deque)
+        self.used = set()
+        self.misses = 0
+        self._original_get_adapter = None
+
+    @classmethod
+    def record(cls, path: str, telegram_base: str = "") -> "Cassette":
+        return cls(path, "record", telegram_base)
+
+    @classmethod
+    def replay(cls, path: str, telegram_base: str = "", timing: str = "none") -> "Cassette":
+        cassette = cls(path, "replay", telegram_base, timing)
+        cassette.load()
+        return cassette
+
+    # ---- kaset dosyası ----
+
+    def load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {data.get('version')}")
+
+        self.interactions = data["interactions"]
+        for i, item in enumerate(self.interactions):
+            self.by_body[(item["method"], item["url"], item["body_hash"])].append(i)
+            self.by_url[(item["method"], item["url"])].append(i)
+
+    def save(self):
+        with gzip.open(self.path, "wt", encoding="utf-8", compresslevel=9) as f:
+            json.dump({"version": CASSETTE_VERSION, "interactions": self.interactions},
+                      f, ensure_ascii=False, separators=(",", ":"))
+
+    # ---- requests kancası ----
+
+    def __enter__(self):
+        adapter = _CassetteAdapter(self)
+        self._original_get_adapter = requests.Session.get_adapter
+        self._adapter = adapter
+        requests.Session.get_adapter = lambda session, url: adapter
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        requests.Session.get_adapter = self._original_get_adapter
+        self._adapter.real.close()
+        if self.mode == "record":
+            self.save()
+
+    # ---- eşleştirme ----
+
+    def normalize_url(self, url: str) -> str:
+        """Telegram adresini ve token'ı sabit bir yer tutucuyla değiştir"""
+        if self.telegram_base and url.startswith(self.telegram_base):
+            url = "telegram:" + _TOKEN_PATTERN.sub("/bot<token>/", url[len(self.telegram_base):], count=1)
+        return url
+
+    def request_key(self, request: requests.PreparedRequest) -> tuple:
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode()
+        return request.method, self.normalize_url(request.url), hashlib.sha1(body).hexdigest()[:16]
+
+    def add(self, key: tuple, response: requests.Response, elapsed: float):
+        method, url, body_hash = key
+        content = response.content
+        try:
+            body = {"text": content.decode("utf-8")}
+        except UnicodeDecodeError:
+            body = {"base64": base64.b64encode(content).decode()}
+        with self.lock:
+            self.interactions.append({
+                "method": method,
+                "url": url,
+                "body_hash": body_hash,
+                "status": response.status_code,
+                "headers": {k: response.headers[k] for k in KEPT_HEADERS if k in response.headers},
+                "elapsed": round(elapsed, 4),
+                **body,
+            })
+
+    def find(self, key: tuple) -> Optional[dict]:
+        with self.lock:
+            for queue in (self.by_body.get(key), self.by_url.get(key[:2])):
+                while queue:
+                    index = queue.popleft()
+                    if index not in self.used:
+                        self.used.add(index)
+                        return self.interactions[index]
+            self.misses += 1
+            return None
+
+
+class _CassetteAdapter(HTTPAdapter):
+    """Kayıtta gerçek adaptörü sarar, tekrar oynatmada kasetten yanıt üretir"""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+        self.real = HTTPAdapter(pool_maxsize=32)
+
+    def send(self, request, **kwargs):
+        key = self.cassette.request_key(request)
+
+        if self.cassette.mode == "record":
+            kwargs["stream"] = False
+            started = time.perf_counter()
+            response = self.real.send(request, **kwargs)
+            self.cassette.add(key, response, time.perf_counter() - started)
+            return response
+
+        item = self.cassette.find(key)
+        if item is None:
+            raise CassetteMiss(f"No recorded response for {key[0]} {key[1]}", request=request)
+        if self.cassette.timing == "recorded":
+            time.sleep(item.get("elapsed", 0))
+        return self.build_response_from(request, item)
+
+    def build_response_from(self, request, item: dict) -> requests.Response:
+        if "base64" in item:
+            content = base64.b64decode(item["base64"])
+        else:
+            content = item.get("text", "").encode("utf-8")
+
+        response = requests.Response()
+        response.status_code = item["status"]
+        response.headers = CaseInsensitiveDict(item.get("headers", {}))
+        response.headers["Content-Length"] = str(len(content))
+        response.raw = io.BytesIO(content)
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        return response
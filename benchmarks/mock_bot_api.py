@@ -0,0 +1,302 @@
+"""
+AKBIS Telegram Bot - Yerel Telegram Bot API Taklidi
+api.telegram.org yerine kullanılarak gönderim hızı, tekrar denemeler ve
+limit davranışı ağ olmadan ölçülebilir.
+
+Desteklenen metotlar: getMe, sendMessage, sendDocument, sendMediaGroup, setWebhook
+
+Hata enjeksiyonu:
+- latency: her isteğe eklenen gecikme (saniye, ± jitter)
+- rate_429: rastgele 429 yanıtı oranı (retry_after ile)
+- rate_5xx: rastgele 500/502 yanıtı oranı
+- enforce_limits: chat başına 1 msj/sn ve global 30 msj/sn aşılırsa 429 döner
+
+Kullanım:
+    python -m benchmarks.mock_bot_api --port 8081 --latency 0.05 --rate-429 0.02
+    TELEGRAM_API_BASE=http://127.0.0.1:8081 python main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class MockState:
+    """Sunucu ayarları ve istatistikleri (thread-safe)"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0,
+                 retry_after: int = 1, rate_5xx: float = 0.0, enforce_limits: bool = False,
+                 chat_rate: float = 1.0, global_rate: float = 30.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.rate_5xx = rate_5xx
+        self.enforce_limits = enforce_limits
+        self.chat_rate = chat_rate
+        self.global_rate = global_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.message_id = 0
+        self.file_id = 0
+        self.counts = defaultdict(int)
+        self.chat_log = defaultdict(list)  # chat_id -> [(zaman, metin)]
+        self.recent = deque()  # global limit penceresi
+        self.chat_last = {}
+        self.webhook_url = ""
+
+    def next_message_id(self) -> int:
+        with self.lock:
+            self.message_id += 1
+            return self.message_id
+
+    def next_file_id(self) -> str:
+        with self.lock:
+            self.file_id += 1
+            return f"MOCKFILE{self.file_id}"
+
+    def inject_error(self, chat_id: str) -> Optional[dict]:
+        """Rastgele veya limit aşımı kaynaklı hata yanıtı üret"""
+        with self.lock:
+            roll = self.random.random()
+            if roll < self.rate_5xx:
+                self.counts["5xx"] += 1
+                return {"ok": False, "error_code": 502, "description": "Bad Gateway"}
+            if roll < self.rate_5xx + self.rate_429:
+                self.counts["429"] += 1
+                return self.too_many_requests()
+
+            if self.enforce_limits and chat_id:
+                now = time.monotonic()
+                while self.recent and now - self.recent[0] > 1:
+                    self.recent.popleft()
+                last = self.chat_last.get(chat_id)
+                if len(self.recent) > self.global_rate or (
+                        last is not None and now - last < 1 / self.chat_rate * 0.9):
+                    self.counts["429_limit"] += 1
+                    return self.too_many_requests()
+                self.recent.append(now)
+                self.chat_last[chat_id] = now
+        return None
+
+    def too_many_requests(self) -> dict:
+        return {
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {self.retry_after}",
+            "parameters": {"retry_after": self.retry_after}
+        }
+
+    def record(self, method: str, chat_id: str, text: str = ""):
+        with self.lock:
+            self.counts[method] += 1
+            if chat_id:
+                self.chat_log[chat_id].append((time.monotonic(), text))
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"counts": dict(self.counts), "chats": len(self.chat_log)}
+
+
+def parse_body(headers, body: bytes) -> dict:
+    """JSON, form veya multipart gövdesini sözlüğe çevir (dosyalar byte olarak)"""
+    content_type = headers.get("Content-Type", "")
+
+    if content_type.startswith("application/json"):
+        return json.loads(body or b"{}")
+
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        params = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            payload = part.get_payload(decode=True) or b""
+            if part.get_filename():
+                params[name] = {"filename": part.get_filename(), "size": len(payload)}
+            else:
+                value = payload.decode()
+                try:
+                    params[name] = json.loads(value) if value[:1] in "[{" else value
+                except ValueError:
+                    params[name] = value
+        return params
+
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        from urllib.parse import parse_qsl
+        return dict(parse_qsl(body.decode()))
+
+    return {}
+
+
+def make_handler(state: MockState):
+    """MockState'e bağlı istek handler sınıfı"""
+
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def reply(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.handle_method(b"")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.handle_method(self.rfile.read(length))
+
+        def handle_method(self, body: bytes):
+            # /bot<token>/<metot>
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if len(parts) != 2 or not parts[0].startswith("bot"):
+                self.reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+                return
+            method = parts[1]
+
+            try:
+                params = parse_body(self.headers, body)
+            except ValueError:
+                self.reply(400, {"ok": False, "error_code": 400, "description": "Bad Request: invalid body"})
+                return
+
+            if state.latency or state.jitter:
+                time.sleep(max(0.0, state.latency + state.random.uniform(-state.jitter, state.jitter)))
+
+            chat_id = str(params.get("chat_id", ""))
+            if method in ("sendMessage", "sendDocument", "sendMediaGroup"):
+                error = state.inject_error(chat_id)
+                if error:
+                    self.reply(error["error_code"], error)
+                    return
+
+            result = self.dispatch(method, chat_id, params)
+            if result is None:
+                self.reply(404, {"ok": False, "error_code": 404, "description": "Not Found: method not found"})
+            elif isinstance(result, dict) and result.get("ok") is False:
+                self.reply(result["error_code"], result)
+            else:
+                self.reply(200, {"ok": True, "result": result})
+
+        def dispatch(self, method: str, chat_id: str, params: dict):
+            now = int(time.time())
+            chat = {"id": int(chat_id) if chat_id.lstrip("-").isdigit() else 0, "type": "private"}
+
+            if method == "getMe":
+                state.record(method, "")
+                return {"id": 1, "is_bot": True, "first_name": "Mock", "username": "mock_bot"}
+
+            if method == "setWebhook":
+                state.record(method, "")
+                state.webhook_url = params.get("url", "")
+                return True
+
+            if not chat_id:
+                return {"ok": False, "error_code": 400, "description": "Bad Request: chat_id is empty"}
+
+            if method == "sendMessage":
+                text = params.get("text", "")
+                if not text:
+                    return {"ok": False, "error_code": 400, "description": "Bad Request: message text is empty"}
+                if len(text) > 4096:
+                    return {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"}
+                state.record(method, chat_id, text)
+                return {"message_id": state.next_message_id(), "date": now, "chat": chat, "text": text}
+
+            if method == "sendDocument":
+                document = params.get("document")
+                file_id = document if isinstance(document, str) else state.next_file_id()
+                state.record(method, chat_id)
+                return {"message_id": state.next_message_id(), "date": now, "chat": chat,
+                        "document": {"file_id": file_id, "file_unique_id": file_id}}
+
+            if method == "sendMediaGroup":
+                messages = []
+                for item in params.get("media", []):
+                    media = item.get("media", "")
+                    file_id = state.next_file_id() if media.startswith("attach://") else media
+                    messages.append({"message_id": state.next_message_id(), "date": now, "chat": chat,
+                                     "document": {"file_id": file_id, "file_unique_id": file_id}})
+                state.record(method, chat_id)
+                return messages
+
+            return None
+
+    return MockHandler
+
+
+class MockBotAPI:
+    """
+    Arka planda çalışan taklit Bot API sunucusu.
+
+    Kullanım:
+        with MockBotAPI(latency=0.05) as api:
+            os.environ["TELEGRAM_API_BASE"] = api.base_url
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **options):
+        self.state = MockState(**options)
+        self.server = ThreadingHTTPServer((host, port), make_handler(self.state))
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockBotAPI":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yerel Telegram Bot API taklidi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="istek başına gecikme (sn)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="gecikme sapması (sn)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="rastgele 429 oranı (0-1)")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 yanıtlarındaki retry_after")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="rastgele 5xx oranı (0-1)")
+    parser.add_argument("--enforce-limits", action="store_true", help="Telegram limitlerini uygula")
+    args = parser.parse_args()
+
+    api = MockBotAPI(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                     rate_429=args.rate_429, retry_after=args.retry_after,
+                     rate_5xx=args.rate_5xx, enforce_limits=args.enforce_limits)
+    print(f"🤖 Mock Bot API: {api.base_url}")
+    print(f"   TELEGRAM_API_BASE={api.base_url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {api.state.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ import os
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "")
 
+# Bot API adresi (yerel test sunucusu / benchmark için değiştirilebilir)
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+
 # Admin Chat ID (aynı olabilir)
 ADMIN_CHAT_ID = os.environ.get("ADMIN_CHAT_ID", TELEGRAM_CHAT_ID)
 
@@ -14,6 +17,36 @@ ADMIN_CHAT_ID = os.environ.get("ADMIN_CHAT_ID", TELEGRAM_CHAT_ID)
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
 GITHUB_REPO = os.environ.get("GITHUB_REPO", "")  # format: "username/repo"
 
+# Telegram gönderim limitleri
+# https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+TELEGRAM_GLOBAL_RATE = 30        # mesaj/saniye (tüm chatler toplamı)
+TELEGRAM_CHAT_RATE = 1           # mesaj/saniye (özel chat başına)
+TELEGRAM_GROUP_RATE = 20 / 60    # mesaj/saniye (grup chat başına, dakikada 20)
+TELEGRAM_SENDER_WORKERS = 8      # aynı anda gönderim yapılan chat sayısı
+TELEGRAM_MAX_RETRIES = 5         # 429/5xx sonrası tekrar deneme sayısı
+TELEGRAM_MESSAGE_LIMIT = 4096    # mesaj başına maksimum karakter
+
+# Dosya ekleri: "link" sadece bağlantı verir, "upload" dosyaları Telegram'a
+# belge olarak yükler (file_id önbelleği sayesinde her dosya bir kez yüklenir)
+ATTACHMENT_MODE = os.environ.get("ATTACHMENT_MODE", "link")
+TELEGRAM_UPLOAD_LIMIT = 50 * 1024 * 1024  # Bot API belge yükleme limiti (byte)
+
+# Özet (digest) modu: aynı hocanın yakın tarihli duyuruları tek mesajda toplanır
+# "auto": DIGEST_MIN_ITEMS ve üzeri duyuru içeren gruplar özetlenir, "off": kapalı
+DIGEST_MODE = os.environ.get("DIGEST_MODE", "auto")
+DIGEST_MIN_ITEMS = 2
+DIGEST_WINDOW_DAYS = 7           # aynı özete girecek duyurular arasındaki maksimum gün farkı
+
+# Kaynaklar arası benzer duyurular (near_duplicates.py): EEE sayfasında ve hoca
+# sayfalarında yayınlanan aynı duyurunun her aboneye tek bildirimi gider.
+# "skip": ilk gelen hemen gönderilir, sonraki kopyalar sadece onu almamış
+# abonelere gider (bildirimler taranan sayfalarla eşzamanlı), "merge": bu
+# çalıştırmadaki kopyalar tek mesajda birleştirilir ama tüm bildirimler parse
+# bitene kadar bekler, "off": kapalı
+NEAR_DUPLICATE_MODE = os.environ.get("NEAR_DUPLICATE_MODE", "skip")
+NEAR_DUPLICATE_WINDOW_DAYS = 14  # daha önce gönderilmiş kopyalar bu süre içinde aranır
+NEAR_DUPLICATE_DISTANCE = 10     # SimHash Hamming mesafesi eşiği (64 bit üzerinden)
+
 # Takip Edilecek Sayfalar
 AKBIS_PAGES = [
     # Araştırma Görevlileri
@@ -103,14 +136,59 @@ AKBIS_PAGES = [
 ]
 
 # EEE Bölüm Sayfası
+# Kaynak numarası hoca numaralarıyla çakışmasın diye sabit 100
+EEE_SOURCE_ID = 100
 EEE_PAGE = {
     "url": "https://eee.gaziantep.edu.tr",
     "announcements_url": "https://eee.gaziantep.edu.tr/duyurular.php",
     "name": "EEE Bölümü"
 }
 
-# Veritabanı
-DATABASE_PATH = "seen_announcements.db"
+# Veritabanı (benchmark ve shard çalıştırmaları için değiştirilebilir)
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "seen_announcements.db")
+# Çalıştırma geçmişi ayrı dosyada tutulur ve repo'ya commit'lenmez (workflow
+# Actions önbelleğiyle taşır)
+HISTORY_DATABASE_PATH = os.environ.get("HISTORY_DATABASE_PATH", "run_history.db")
+
+# Arama sonuçlarında sayfa başına gösterilecek duyuru sayısı
+SEARCH_PAGE_SIZE = 5
+
+# Outbox: başarısız gönderimler kalıcı kuyrukta yeniden denenir
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETRY_BASE = 60           # ilk tekrar denemeden önce bekleme (saniye), her denemede 2 katına çıkar
+OUTBOX_RETRY_MAX = 6 * 3600      # maksimum bekleme (saniye)
+
+# Tarama hattı (pipeline): sayfalar paralel indirilir, aşamalar arası
+# kuyruklar sınırlıdır; gönderim yetişemezse indirme yavaşlar
+PIPELINE_FETCH_WORKERS = 4
+PIPELINE_QUEUE_SIZE = 8
+PIPELINE_SEND_WINDOW = 64        # göndericide aynı anda bekleyen en fazla mesaj; dolunca render bekler
+
+# Ayrıştırma süreç havuzu: BeautifulSoup ayrıştırması GIL yüzünden tek
+# çekirdekte sıralanır; PARSE_WORKERS > 0 ise sayfalar süreçlere dağıtılır.
+# PARSE_POOL_MIN_PAGES'den az sayfalı çalıştırmalarda havuz başlatılmaz.
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "0"))
+PARSE_CHUNK_SIZE = 4            # bir sürece tek seferde gönderilen en fazla sayfa
+PARSE_POOL_MIN_PAGES = 50
+
+# Çalıştırma bütçesi: cron aralığını aşmamak için kontrol bu süre içinde biter.
+# Kalan süre bir kaynağın tahmini indirme süresine yetmiyorsa yeni kaynak
+# başlatılmaz; ertelenen kaynaklar sonraki çalıştırmada ilk sırada taranır.
+RUN_BUDGET = int(os.environ.get("RUN_BUDGET_SECONDS", "240"))
+RUN_SEND_RESERVE = 30           # sonda gönderim ve kayıt için ayrılan süre (saniye)
+SOURCE_FETCH_ESTIMATE = 5.0     # geçmişi olmayan kaynak için tahmini indirme süresi (saniye)
+FETCH_TIMEOUT = 30              # sayfa isteği başına zaman aşımı (saniye); kalan bütçeyle sınırlanır
+SOURCE_OVERDUE_MINUTES = 30     # bu süreden uzun kontrol edilmeyen kaynak gecikmiş sayılır
+SOURCE_ACTIVE_DAYS = 14         # bu süre içinde yeni duyuru yayınlayan kaynak aktif sayılır
+
+# Çalıştırma geçmişi: her kontrolün ve kaynağın süreleri trend raporları için
+# saklanır (HISTORY_DATABASE_PATH; rapor penceresi kadar)
+HISTORY_RETENTION_DAYS = 28
+
+# Görüldü kayıtları bu süreden eskiyse silinir. Sayfada hâlâ duran eski
+# duyurular kaynak görüntüsünde (snapshot) kayıtlı olduğu için tekrar
+# gönderilmez. Arama indeksi süresiz tutulur (/search tüm arşivde arar).
+ARCHIVE_RETENTION_DAYS = 365
 
 # Varsayılan kontrol aralığı (dakika)
 DEFAULT_CHECK_INTERVAL = 5
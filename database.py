@@ -2,12 +2,17 @@
 AKBIS Telegram Bot - Veritabanı Modülü
 Görülen duyuruları SQLite ile takip eder.
 """
+import json
 import sqlite3
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict
 import os
 
-from config import DATABASE_PATH
+from config import (
+    DATABASE_PATH, HISTORY_DATABASE_PATH, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX,
+    HISTORY_RETENTION_DAYS
+)
+from search import run_search
 
 
 def get_connection() -> sqlite3.Connection:
@@ -15,6 +20,23 @@ def get_connection() -> sqlite3.Connection:
     return sqlite3.connect(DATABASE_PATH)
 
 
+def set_database_path(path: str):
+    """Sonraki bağlantıların kullanacağı veritabanı dosyasını değiştir (shard çalıştırmaları)"""
+    global DATABASE_PATH
+    DATABASE_PATH = path
+
+
+def get_history_connection() -> sqlite3.Connection:
+    """Çalıştırma geçmişi veritabanı bağlantısı"""
+    return sqlite3.connect(HISTORY_DATABASE_PATH)
+
+
+def set_history_database_path(path: str):
+    """Çalıştırma geçmişinin yazılacağı dosyayı değiştir (shard çalıştırmaları)"""
+    global HISTORY_DATABASE_PATH
+    HISTORY_DATABASE_PATH = path
+
+
 def init_db():
     """Veritabanı tablolarını oluştur"""
     conn = get_connection()
@@ -38,10 +60,236 @@ def init_db():
         )
     """)
     
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            chat_id TEXT,
+            source_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (chat_id, source_id)
+        )
+    """)
+    
+    # Kaynak -> abone chatler sorgusu için
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_subscriptions_source
+        ON subscriptions (source_id, chat_id)
+    """)
+    
+    # Gönderilmeyi bekleyen mesajlar (kalıcı kuyruk)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            delivery_key TEXT,
+            chat_id TEXT,
+            text TEXT,
+            hashes TEXT,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at TIMESTAMP,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP,
+            PRIMARY KEY (delivery_key, chat_id)
+        )
+    """)
+    _ensure_column(cursor, "outbox", "files", "TEXT")
+    
+    # Telegram'a yüklenmiş dosyaların file_id önbelleği
+    # cache_key: "url:<dosya linki>" veya "sha256:<içerik hash'i>"
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS telegram_files (
+            cache_key TEXT PRIMARY KEY,
+            file_id TEXT,
+            file_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_due
+        ON outbox (status, next_attempt_at)
+    """)
+    
+    # Kaynak başına tarama geçmişi (çalıştırma bütçesi ve önceliklendirme için)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS source_state (
+            source_id INTEGER PRIMARY KEY,
+            last_checked_at TEXT,
+            last_new_at TEXT,
+            fetch_seconds REAL,
+            deferred INTEGER DEFAULT 0
+        )
+    """)
+    
+    # Kaynakların son duyuru listesi (snapshots.py): "hash:içerik özeti,..." sayfa sırasıyla
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS source_snapshots (
+            source_id INTEGER PRIMARY KEY,
+            section_hash TEXT,
+            items TEXT,
+            updated_at TEXT
+        )
+    """)
+    
+    # Benzer duyuru indeksi (near_duplicates.py): SimHash ve LSH bantları
+    # simhash: 64 bitlik parmak izi (SQLite INTEGER olarak işaretli saklanır)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS simhash_index (
+            hash TEXT PRIMARY KEY,
+            simhash INTEGER,
+            numbers TEXT,
+            source_id INTEGER,
+            seen_at INTEGER
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_simhash_seen
+        ON simhash_index(seen_at)
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS simhash_bands (
+            band INTEGER,
+            value INTEGER,
+            hash TEXT,
+            PRIMARY KEY (band, value, hash)
+        ) WITHOUT ROWID
+    """)
+    
+    _init_search_index(cursor)
+    
     conn.commit()
+    
+    init_history_db()
+    _move_history(conn)
     conn.close()
 
 
+def init_history_db():
+    """Çalıştırma geçmişi tablolarını oluştur (HISTORY_DATABASE_PATH)"""
+    conn = get_history_connection()
+    cursor = conn.cursor()
+    
+    # Trend raporları için, HISTORY_RETENTION_DAYS kadar tutulur
+    # id: başlangıç zamanı (mikrosaniye); shard'lardan gelen kayıtlar çakışmaz
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS run_history (
+            id INTEGER PRIMARY KEY,
+            started_at INTEGER,
+            elapsed REAL,
+            sources INTEGER,
+            failed INTEGER,
+            deferred INTEGER,
+            parsed INTEGER,
+            new INTEGER,
+            messages INTEGER,
+            sent INTEGER,
+            bytes INTEGER,
+            first_send REAL,
+            fetch_busy REAL,
+            parse_busy REAL,
+            render_busy REAL
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS source_history (
+            source_id INTEGER,
+            run_id INTEGER,
+            fetch_seconds REAL,
+            parse_seconds REAL,
+            bytes INTEGER,
+            announcements INTEGER,
+            new INTEGER,
+            ok INTEGER,
+            PRIMARY KEY (source_id, run_id)
+        ) WITHOUT ROWID
+    """)
+    
+    conn.commit()
+    conn.close()
+
+
+def _move_history(conn: sqlite3.Connection):
+    """
+    Önceki sürümler geçmişi ana veritabanında tutuyordu (commit'lenen dosya
+    büyüyordu): kayıtları geçmiş veritabanına taşı, tabloları sil ve dosyayı küçült.
+    """
+    tables = [row[0] for row in conn.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name IN ('run_history', 'source_history')
+    """)]
+    if not tables:
+        return
+    
+    conn.execute("ATTACH DATABASE ? AS history", (HISTORY_DATABASE_PATH,))
+    for table in tables:
+        conn.execute(f"INSERT OR IGNORE INTO history.{table} SELECT * FROM main.{table}")
+        conn.execute(f"DROP TABLE main.{table}")
+    conn.commit()
+    conn.execute("DETACH DATABASE history")
+    conn.execute("VACUUM")
+    print(f"🗄️ Çalıştırma geçmişi {HISTORY_DATABASE_PATH} dosyasına taşındı")
+
+
+def _ensure_column(cursor: sqlite3.Cursor, table: str, column: str, declaration: str):
+    """Eski veritabanlarında eksik olan kolonu ekle"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _init_search_index(cursor: sqlite3.Cursor):
+    """
+    Duyuru arşivi için FTS5 tam metin arama indeksini oluştur.
+    İndeks ilk kez oluşturuluyorsa mevcut kayıtların başlık/yazar
+    bilgileri indekse aktarılır (içerik eski kayıtlarda saklanmadığı için boş).
+    """
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS announcement_index USING fts5(
+                hash UNINDEXED,
+                author,
+                title,
+                content,
+                files,
+                date UNINDEXED,
+                url UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        # SQLite FTS5 desteği olmadan derlenmiş olabilir
+        print(f"⚠️ Arama indeksi oluşturulamadı: {e}")
+        return
+    
+    cursor.execute("SELECT COUNT(*) FROM announcement_index")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+            INSERT INTO announcement_index (hash, author, title, content, files, date, url)
+            SELECT hash, author, title, '', '', date, '' FROM seen_announcements
+        """)
+
+
+def _index_announcement(cursor: sqlite3.Cursor, announcement_hash: str, author: str,
+                        title: str, date: str, content: str, files: List[Dict[str, str]],
+                        url: str):
+    """Duyuruyu arama indeksine ekle (varsa günceller)"""
+    file_names = "\n".join(f.get("name", "") for f in (files or []))
+    try:
+        cursor.execute(
+            "DELETE FROM announcement_index WHERE hash = ?",
+            (announcement_hash,)
+        )
+        cursor.execute("""
+            INSERT INTO announcement_index (hash, author, title, content, files, date, url)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (announcement_hash, author, title, content, file_names, date, url))
+    except sqlite3.OperationalError:
+        # FTS5 yoksa arama devre dışı, kayıt işlemi yine de devam eder
+        pass
+
+
 def is_seen(announcement_hash: str) -> bool:
     """
     Duyuru daha önce görüldü mü kontrol et.
@@ -65,26 +313,80 @@ def is_seen(announcement_hash: str) -> bool:
     return result is not None
 
 
-def mark_seen(announcement_hash: str, author: str = "", title: str = "", date: str = ""):
+def get_seen_hashes() -> set:
+    """Görülen tüm duyuru hash'leri (daemon modunda bellekte tutulur)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT hash FROM seen_announcements")
+    hashes = {row[0] for row in cursor.fetchall()}
+    
+    conn.close()
+    return hashes
+
+
+def mark_seen(announcement_hash: str, author: str = "", title: str = "", date: str = "",
+              content: str = "", files: List[Dict[str, str]] = None, url: str = ""):
     """
-    Duyuruyu görüldü olarak işaretle.
+    Duyuruyu görüldü olarak işaretle ve arama indeksine ekle.
     
     Args:
         announcement_hash: Duyurunun benzersiz hash değeri
         author: Duyuru sahibi
         title: Duyuru başlığı
         date: Duyuru tarihi
+        content: Duyuru içeriği (arama için)
+        files: Dosya listesi (isimleri aranabilir)
+        url: Duyuru kaynak linki
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    _mark_seen(cursor, announcement_hash, author, title, date, content, files, url)
+    
+    conn.commit()
+    conn.close()
+
+
+def bootstrap_seen(rows: list, simhash_rows: list, simhash_cutoff: int, snapshot_rows: list) -> int:
+    """
+    Toplu başlangıç (mark_all_seen.py): duyuruları görüldü işaretle, parmak
+    izlerini ve kaynak görüntülerini tek bağlantı ve tek transaction'da yaz.
+    Yarıda kalan bir çalıştırma görüldü kayıtlarını görüntüsüz bırakmaz.
+    
+    Args:
+        rows: [(hash, author, title, date, content, files, url)] listesi
+        simhash_rows: add_simhashes satırları
+        simhash_cutoff: Bu zamandan (unix) eski parmak izleri silinir
+        snapshot_rows: save_source_snapshots satırları
+        
+    Returns:
+        İşaretlenen duyuru sayısı
     """
     conn = get_connection()
     cursor = conn.cursor()
     
+    try:
+        for row in rows:
+            _mark_seen(cursor, *row)
+        _add_simhashes(cursor, simhash_rows, simhash_cutoff)
+        _save_source_snapshots(cursor, snapshot_rows)
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return len(rows)
+
+
+def _mark_seen(cursor: sqlite3.Cursor, announcement_hash: str, author: str, title: str,
+               date: str, content: str, files: List[Dict[str, str]], url: str):
+    """mark_seen'in mevcut bir transaction içinde çalışan hali"""
     cursor.execute("""
         INSERT OR REPLACE INTO seen_announcements (hash, author, title, date, seen_at)
         VALUES (?, ?, ?, ?, ?)
     """, (announcement_hash, author, title, date, datetime.now().isoformat()))
     
-    conn.commit()
-    conn.close()
+    _index_announcement(cursor, announcement_hash, author, title, date, content, files, url)
 
 
 def get_status(key: str) -> Optional[str]:
@@ -146,7 +448,10 @@ def get_stats() -> dict:
 
 
 def cleanup_old_records(days: int = 90):
-    """Eski kayıtları temizle"""
+    """
+    Eski görüldü kayıtlarını temizle.
+    Arama indeksine (announcement_index) dokunulmaz: /search tüm arşivde arar.
+    """
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -162,6 +467,26 @@ def cleanup_old_records(days: int = 90):
     return deleted
 
 
+# ============ Arama ============
+
+def search_announcements(text: str, page: int = 1, page_size: int = 5) -> dict:
+    """
+    Duyuru arşivinde tam metin arama yap (sorgu: search.run_search).
+    Son sayfadan büyük sayfa istenirse son sayfa döner.
+    
+    Returns:
+        {"total", "page", "results": [{"hash", "author", "title", "date", "url", "snippet"}]}
+    """
+    conn = get_connection()
+    try:
+        return run_search(conn, text, page, page_size)
+    except sqlite3.OperationalError as e:
+        print(f"Search error: {e}")
+        return {"total": 0, "page": 1, "results": []}
+    finally:
+        conn.close()
+
+
 # ============ Professor Preferences ============
 
 def init_professor_preferences(professors: list):
@@ -270,6 +595,652 @@ def set_all_professors_enabled(enabled: bool):
     conn.close()
 
 
+# ============ Chat Abonelikleri ============
+
+def subscribe(chat_id: str, source_ids: list) -> int:
+    """
+    Chat'i kaynaklara abone et.
+    
+    Returns:
+        Yeni eklenen abonelik sayısı
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.executemany("""
+        INSERT OR IGNORE INTO subscriptions (chat_id, source_id, created_at)
+        VALUES (?, ?, ?)
+    """, [(str(chat_id), source_id, datetime.now().isoformat()) for source_id in source_ids])
+    
+    added = cursor.rowcount
+    conn.commit()
+    conn.close()
+    
+    return added
+
+
+def unsubscribe(chat_id: str, source_ids: list = None) -> int:
+    """
+    Chat'in aboneliklerini kaldır (source_ids verilmezse tümü).
+    
+    Returns:
+        Silinen abonelik sayısı
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    if source_ids is None:
+        cursor.execute("DELETE FROM subscriptions WHERE chat_id = ?", (str(chat_id),))
+    else:
+        cursor.executemany(
+            "DELETE FROM subscriptions WHERE chat_id = ? AND source_id = ?",
+            [(str(chat_id), source_id) for source_id in source_ids]
+        )
+    
+    removed = cursor.rowcount
+    conn.commit()
+    conn.close()
+    
+    return removed
+
+
+def get_chat_subscriptions(chat_id: str) -> list:
+    """Chat'in abone olduğu kaynak numaralarını getir"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        "SELECT source_id FROM subscriptions WHERE chat_id = ? ORDER BY source_id",
+        (str(chat_id),)
+    )
+    results = cursor.fetchall()
+    
+    conn.close()
+    return [r[0] for r in results]
+
+
+def get_all_subscriptions() -> list:
+    """Tüm (chat_id, source_id) aboneliklerini tek sorguda getir"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT chat_id, source_id FROM subscriptions")
+    results = cursor.fetchall()
+    
+    conn.close()
+    return results
+
+
+# ============ Outbox (Gönderim Kuyruğu) ============
+
+def enqueue_outbox(messages: list, seen: list) -> int:
+    """
+    Mesajları outbox'a ekle ve duyuruları aynı transaction içinde görüldü işaretle.
+    Böylece bir duyuru ya hem kuyrukta hem görüldü olur ya da hiçbiri.
+    (delivery_key, chat_id) anahtarı aynı mesajın bir chate iki kez
+    kuyruklanmasını engeller.
+    
+    Args:
+        messages: [(delivery_key, chat_id, text, hashes, files)] listesi
+        seen: [(hash, author, title, date, content, files, url)] listesi
+        
+    Returns:
+        Kuyruğa yeni eklenen mesaj sayısı
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    now = datetime.now().isoformat()
+    
+    cursor.executemany("""
+        INSERT OR IGNORE INTO outbox
+            (delivery_key, chat_id, text, hashes, files, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, 'pending', 0, ?, ?)
+    """, [(key, str(chat_id), text, ",".join(hashes), json.dumps(files) if files else None, now, now)
+          for key, chat_id, text, hashes, files in messages])
+    added = cursor.rowcount
+    
+    for row in seen:
+        _mark_seen(cursor, *row)
+    
+    conn.commit()
+    conn.close()
+    
+    return added
+
+
+def get_due_outbox(limit: int = 500) -> list:
+    """
+    Gönderim zamanı gelmiş bekleyen mesajları kuyruğa giriş sırasıyla getir.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT delivery_key, chat_id, text, hashes, attempts, files
+        FROM outbox
+        WHERE status = 'pending' AND next_attempt_at <= ?
+        ORDER BY created_at, rowid
+        LIMIT ?
+    """, (datetime.now().isoformat(), limit))
+    
+    results = cursor.fetchall()
+    conn.close()
+    
+    return [
+        {"key": r[0], "chat_id": r[1], "text": r[2],
+         "hashes": r[3].split(",") if r[3] else [], "attempts": r[4],
+         "files": json.loads(r[5]) if r[5] else []}
+        for r in results
+    ]
+
+
+def update_outbox_results(results: list):
+    """
+    Gönderim sonuçlarını tek transaction'da kaydet.
+    Başarısız mesajlar üstel bekleme ile yeniden planlanır;
+    OUTBOX_MAX_ATTEMPTS denemeden sonra 'dead' olarak bırakılır.
+    
+    Args:
+        results: [(delivery_key, chat_id, attempts, başarılı_mı)] listesi
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    now = datetime.now()
+    
+    for key, chat_id, attempts, ok in results:
+        if ok:
+            cursor.execute("""
+                UPDATE outbox SET status = 'sent', attempts = ?, sent_at = ?, last_error = NULL
+                WHERE delivery_key = ? AND chat_id = ?
+            """, (attempts + 1, now.isoformat(), key, chat_id))
+            continue
+        
+        attempts += 1
+        delay = min(OUTBOX_RETRY_BASE * 2 ** (attempts - 1), OUTBOX_RETRY_MAX)
+        status = "dead" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending"
+        cursor.execute("""
+            UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+            WHERE delivery_key = ? AND chat_id = ?
+        """, (status, attempts, (now + timedelta(seconds=delay)).isoformat(),
+              "send failed", key, chat_id))
+    
+    conn.commit()
+    conn.close()
+
+
+def get_outbox_stats() -> dict:
+    """Outbox durumlarına göre mesaj sayıları"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+    results = dict(cursor.fetchall())
+    
+    conn.close()
+    return results
+
+
+def cleanup_outbox(days: int = 7) -> int:
+    """Gönderilmiş / vazgeçilmiş eski outbox kayıtlarını sil"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+    cursor.execute("""
+        DELETE FROM outbox
+        WHERE status IN ('sent', 'dead') AND COALESCE(sent_at, next_attempt_at) < ?
+    """, (cutoff,))
+    
+    deleted = cursor.rowcount
+    conn.commit()
+    conn.close()
+    
+    return deleted
+
+
+# ============ Telegram file_id Önbelleği ============
+
+def get_cached_file_id(cache_keys: list) -> Optional[str]:
+    """
+    Anahtarlardan herhangi biri için önbellekteki file_id'yi getir.
+    
+    Args:
+        cache_keys: ["url:...", "sha256:..."] gibi anahtarlar
+    """
+    if not cache_keys:
+        return None
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    placeholders = ",".join("?" * len(cache_keys))
+    cursor.execute(
+        f"SELECT file_id FROM telegram_files WHERE cache_key IN ({placeholders}) LIMIT 1",
+        list(cache_keys)
+    )
+    result = cursor.fetchone()
+    
+    conn.close()
+    return result[0] if result else None
+
+
+def cache_file_id(cache_keys: list, file_id: str, file_name: str = ""):
+    """file_id'yi verilen tüm anahtarlar için önbelleğe yaz"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.executemany("""
+        INSERT OR REPLACE INTO telegram_files (cache_key, file_id, file_name, created_at)
+        VALUES (?, ?, ?, ?)
+    """, [(key, file_id, file_name, datetime.now().isoformat()) for key in cache_keys])
+    
+    conn.commit()
+    conn.close()
+
+
+
+# ============ Kaynak Durumu ============
+
+def get_source_states() -> dict:
+    """
+    Kaynakların tarama geçmişi.
+    
+    Returns:
+        {source_id: {"last_checked_at", "last_new_at", "fetch_seconds", "deferred"}}
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT source_id, last_checked_at, last_new_at, fetch_seconds, deferred
+        FROM source_state
+    """)
+    results = cursor.fetchall()
+    
+    conn.close()
+    return {
+        r[0]: {"last_checked_at": r[1], "last_new_at": r[2], "fetch_seconds": r[3], "deferred": bool(r[4])}
+        for r in results
+    }
+
+
+def update_source_states(checked: list, deferred: list):
+    """
+    Çalıştırma sonunda kaynak durumlarını tek transaction'da kaydet.
+    İndirme süresi üstel hareketli ortalama ile güncellenir.
+    
+    Args:
+        checked: [(source_id, indirme_süresi, yeni_duyuru_sayısı)] listesi
+        deferred: Bütçe yetmediği için taranmayan kaynak numaraları
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    now = datetime.now().isoformat()
+    
+    for source_id, seconds, new_count in checked:
+        cursor.execute("""
+            INSERT INTO source_state (source_id, last_checked_at, last_new_at, fetch_seconds, deferred)
+            VALUES (?, ?, ?, ?, 0)
+            ON CONFLICT(source_id) DO UPDATE SET
+                last_checked_at = excluded.last_checked_at,
+                last_new_at = COALESCE(excluded.last_new_at, source_state.last_new_at),
+                fetch_seconds = COALESCE(0.7 * source_state.fetch_seconds + 0.3 * excluded.fetch_seconds,
+                                         excluded.fetch_seconds),
+                deferred = 0
+        """, (source_id, now, now if new_count else None, seconds))
+    
+    cursor.executemany("""
+        INSERT INTO source_state (source_id, deferred) VALUES (?, 1)
+        ON CONFLICT(source_id) DO UPDATE SET deferred = 1
+    """, [(source_id,) for source_id in deferred])
+    
+    conn.commit()
+    conn.close()
+
+
+def get_source_snapshots() -> dict:
+    """
+    Kaynakların kayıtlı duyuru listeleri (tek sorgu).
+    
+    Returns:
+        {source_id: (section_hash, items)}
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT source_id, section_hash, items FROM source_snapshots")
+    results = cursor.fetchall()
+    conn.close()
+    return {r[0]: (r[1], r[2] or "") for r in results}
+
+
+def save_source_snapshots(rows: list):
+    """
+    Kaynak duyuru listelerini tek transaction'da kaydet.
+    
+    Args:
+        rows: [(source_id, section_hash, items)] listesi
+    """
+    if not rows:
+        return
+    conn = get_connection()
+    _save_source_snapshots(conn.cursor(), rows)
+    conn.commit()
+    conn.close()
+
+
+def _save_source_snapshots(cursor: sqlite3.Cursor, rows: list):
+    """save_source_snapshots'ın mevcut bir transaction içinde çalışan hali"""
+    now = datetime.now().isoformat()
+    cursor.executemany("""
+        INSERT OR REPLACE INTO source_snapshots (source_id, section_hash, items, updated_at)
+        VALUES (?, ?, ?, ?)
+    """, [(source_id, section_hash, items, now) for source_id, section_hash, items in rows])
+
+
+# ============ Çalıştırma Geçmişi ============
+
+def record_run_history(run: dict, sources: list, retention_days: int = HISTORY_RETENTION_DAYS):
+    """
+    Çalıştırmayı ve kaynak sonuçlarını kaydet, saklama süresini aşan kayıtları sil.
+    
+    Args:
+        run: run_history kolonları (id, started_at, elapsed, ...)
+        sources: [(source_id, fetch_seconds, parse_seconds, bytes, announcements, new, ok)] listesi
+    """
+    conn = get_history_connection()
+    cursor = conn.cursor()
+    
+    columns = ", ".join(run)
+    cursor.execute(
+        f"INSERT OR REPLACE INTO run_history ({columns}) VALUES ({', '.join('?' * len(run))})",
+        list(run.values())
+    )
+    cursor.executemany("""
+        INSERT OR REPLACE INTO source_history
+            (source_id, run_id, fetch_seconds, parse_seconds, bytes, announcements, new, ok)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(source_id, run["id"], *rest) for source_id, *rest in sources])
+    
+    cutoff = (run["started_at"] - retention_days * 86400) * 1_000_000
+    cursor.execute("DELETE FROM source_history WHERE run_id < ?", (cutoff,))
+    cursor.execute("DELETE FROM run_history WHERE id < ?", (cutoff,))
+    
+    conn.commit()
+    conn.close()
+
+
+def merge_history(path: str) -> int:
+    """
+    Shard'ın geçmiş veritabanını ana geçmişe ekle. Kayıt numaraları zaman
+    tabanlı olduğu için eksikler eklenir; tekrar birleştirmek sonucu değiştirmez.
+    
+    Returns:
+        Eklenen çalıştırma sayısı
+    """
+    conn = get_history_connection()
+    conn.execute("ATTACH DATABASE ? AS shard", (path,))
+    cursor = conn.cursor()
+    
+    cursor.execute("INSERT OR IGNORE INTO run_history SELECT * FROM shard.run_history")
+    runs = cursor.rowcount
+    cursor.execute("INSERT OR IGNORE INTO source_history SELECT * FROM shard.source_history")
+    
+    conn.commit()
+    conn.execute("DETACH DATABASE shard")
+    conn.close()
+    return runs
+
+
+# Nearest-rank yüzdelikler: her (anahtar, dönem) grubunda değerler sıralanır,
+# sıra numarası n*p'ye ulaşan ilk değer p. yüzdeliktir
+_PERCENTILE_QUERY = """
+    WITH ranked AS (
+        SELECT key, bucket, value, failed,
+               ROW_NUMBER() OVER (PARTITION BY key, bucket ORDER BY value) AS rn,
+               COUNT(*) OVER (PARTITION BY key, bucket) AS n
+        FROM ({samples})
+        WHERE value IS NOT NULL
+    )
+    SELECT key, bucket, n, SUM(failed),
+           MIN(CASE WHEN rn >= 0.50 * n THEN value END),
+           MIN(CASE WHEN rn >= 0.95 * n THEN value END)
+    FROM ranked
+    GROUP BY key, bucket
+    ORDER BY key, bucket
+"""
+
+_SOURCE_SAMPLES = """
+    SELECT source_id AS key, (:now - run_id) / :bucket AS bucket,
+           fetch_seconds AS value, 1 - ok AS failed
+    FROM source_history WHERE run_id >= :since
+"""
+
+_STAGE_SAMPLES = " UNION ALL ".join(
+    f"SELECT '{name}' AS key, (:now - id) / :bucket AS bucket, {column} AS value, 0 AS failed "
+    f"FROM run_history WHERE id >= :since"
+    for name, column in [
+        ("run", "elapsed"), ("first_send", "first_send"), ("fetch", "fetch_busy"),
+        ("parse", "parse_busy"), ("render", "render_busy"),
+    ]
+)
+
+
+def get_history_trends(days: int = 28, bucket_days: int = 7, groups: Dict[str, list] = None,
+                       now: int = None) -> dict:
+    """
+    Kaynak indirme süreleri ve aşama süreleri için dönem başına p50/p95.
+    Hesaplama SQL'de pencere fonksiyonlarıyla yapılır.
+    
+    Args:
+        days: Geriye doğru kaç gün
+        bucket_days: Dönem uzunluğu (gün); 0. dönem en yenisidir
+        groups: {grup adı: [source_id]} (ör. host başına); kaynak süreleri grup içinde birleştirilir
+        
+    Returns:
+        {"sources": {source_id: [(dönem, n, hata, p50, p95)]},
+         "stages": {aşama: [(dönem, n, 0, p50, p95)]},
+         "groups": {grup adı: [(dönem, n, hata, p50, p95)]}}
+    """
+    now = (now or int(datetime.now().timestamp())) * 1_000_000
+    params = {"now": now, "bucket": bucket_days * 86400 * 1_000_000, "since": now - days * 86400 * 1_000_000}
+    
+    conn = get_history_connection()
+    cursor = conn.cursor()
+    
+    queries = [("sources", _SOURCE_SAMPLES), ("stages", _STAGE_SAMPLES)]
+    if groups:
+        cases = " ".join(
+            f"WHEN source_id IN ({', '.join(str(int(i)) for i in ids)}) THEN :group{n}"
+            for n, ids in enumerate(groups.values()) if ids
+        )
+        params.update({f"group{n}": name for n, name in enumerate(groups)})
+        queries.append(("groups", _SOURCE_SAMPLES.replace("source_id AS key", f"CASE {cases} END AS key", 1)))
+    
+    result = {"groups": {}}
+    for name, samples in queries:
+        cursor.execute(_PERCENTILE_QUERY.format(samples=samples), params)
+        trends = {}
+        for key, bucket, n, failed, p50, p95 in cursor.fetchall():
+            trends.setdefault(key, []).append((bucket, n, failed, p50, p95))
+        result[name] = trends
+    
+    conn.close()
+    return result
+
+
+# ============ Benzer Duyuru İndeksi ============
+
+def _signed64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def add_simhashes(rows: list, cutoff: int):
+    """
+    Parmak izlerini indekse ekle, cutoff'tan eski kayıtları sil.
+    
+    Args:
+        rows: [(hash, simhash, sayılar, source_id, seen_at, [(bant, değer)])] listesi
+        cutoff: Bu zamandan (unix) önce eklenenler silinir
+    """
+    conn = get_connection()
+    _add_simhashes(conn.cursor(), rows, cutoff)
+    conn.commit()
+    conn.close()
+
+
+def _add_simhashes(cursor: sqlite3.Cursor, rows: list, cutoff: int):
+    """add_simhashes'in mevcut bir transaction içinde çalışan hali"""
+    cursor.executemany(
+        "INSERT OR IGNORE INTO simhash_index (hash, simhash, numbers, source_id, seen_at) VALUES (?, ?, ?, ?, ?)",
+        [(ann_hash, _signed64(value), numbers, source_id, seen_at)
+         for ann_hash, value, numbers, source_id, seen_at, _ in rows]
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO simhash_bands (band, value, hash) VALUES (?, ?, ?)",
+        [(band, value, ann_hash) for ann_hash, *_, bands in rows for band, value in bands]
+    )
+    
+    cursor.execute("""
+        DELETE FROM simhash_bands
+        WHERE hash IN (SELECT hash FROM simhash_index WHERE seen_at < ?)
+    """, (cutoff,))
+    cursor.execute("DELETE FROM simhash_index WHERE seen_at < ?", (cutoff,))
+
+
+def find_simhash_candidates(bands: list, since: int) -> list:
+    """
+    En az bir LSH bandı eşleşen, since'ten sonra eklenmiş parmak izleri.
+    
+    Returns:
+        [(hash, simhash, sayılar, source_id)] listesi
+    """
+    conditions = " OR ".join("(b.band = ? AND b.value = ?)" for _ in bands)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT DISTINCT i.hash, i.simhash, i.numbers, i.source_id
+        FROM simhash_bands b JOIN simhash_index i ON i.hash = b.hash
+        WHERE ({conditions}) AND i.seen_at >= ?
+    """, [part for band in bands for part in band] + [since])
+    rows = [
+        (ann_hash, value & ((1 << 64) - 1), numbers or "", source_id)
+        for ann_hash, value, numbers, source_id in cursor.fetchall()
+    ]
+    conn.close()
+    return rows
+
+
+# ============ Shard Veritabanları ============
+
+def snapshot_database(path: str):
+    """
+    Veritabanının tutarlı bir kopyasını oluştur (SQLite backup API).
+    Shard'lar bu kopya üzerinde çalışır; ana dosyaya aynı anda yazılmaz.
+    """
+    source = get_connection()
+    target = sqlite3.connect(path)
+    source.backup(target)
+    target.close()
+    source.close()
+
+
+def merge_database(path: str, source_ids: list) -> dict:
+    """
+    Bir shard veritabanındaki yenilikleri ana veritabanına tek transaction'da işle.
+    Tüm adımlar idempotent: aynı shard iki kez birleştirilse de sonuç değişmez.
+    
+    - Görülen duyurular ve file_id önbelleği: eksik olanlar eklenir
+    - Arama indeksi: ana indekste olmayan duyurular eklenir
+    - Outbox: yeni mesajlar eklenir; var olanlar sadece shard'daki kayıt
+      daha ileri bir durumdaysa (gönderildi / daha çok deneme) güncellenir
+    - Kaynak durumları ve duyuru listeleri: sadece shard'ın taradığı kaynaklar (source_ids) alınır
+    - Benzer duyuru indeksi: eksik parmak izleri eklenir
+    
+    Çalıştırma geçmişi ayrı dosyadadır, merge_history ile birleştirilir.
+    
+    Args:
+        path: Shard veritabanı dosyası
+        source_ids: Shard'a düşen kaynak numaraları
+        
+    Returns:
+        {"seen", "outbox", "sources"}: eklenen/güncellenen kayıt sayıları
+    """
+    conn = get_connection()
+    conn.execute("ATTACH DATABASE ? AS shard", (path,))
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        INSERT OR IGNORE INTO seen_announcements (hash, author, title, date, seen_at)
+        SELECT hash, author, title, date, seen_at FROM shard.seen_announcements
+    """)
+    seen = cursor.rowcount
+    
+    try:
+        cursor.execute("""
+            INSERT INTO announcement_index (hash, author, title, content, files, date, url)
+            SELECT hash, author, title, content, files, date, url FROM shard.announcement_index
+            WHERE hash NOT IN (SELECT hash FROM main.announcement_index)
+        """)
+    except sqlite3.OperationalError:
+        # FTS5 yoksa arama devre dışı
+        pass
+    
+    cursor.execute("""
+        INSERT INTO outbox
+            (delivery_key, chat_id, text, hashes, files, status, attempts,
+             next_attempt_at, last_error, created_at, sent_at)
+        SELECT delivery_key, chat_id, text, hashes, files, status, attempts,
+               next_attempt_at, last_error, created_at, sent_at
+        FROM shard.outbox WHERE true
+        ON CONFLICT(delivery_key, chat_id) DO UPDATE SET
+            status = excluded.status,
+            attempts = excluded.attempts,
+            next_attempt_at = excluded.next_attempt_at,
+            last_error = excluded.last_error,
+            sent_at = excluded.sent_at
+        WHERE excluded.attempts > outbox.attempts
+           OR (outbox.status = 'pending' AND excluded.status != 'pending')
+    """)
+    outbox = cursor.rowcount
+    
+    cursor.execute("""
+        INSERT OR IGNORE INTO telegram_files (cache_key, file_id, file_name, created_at)
+        SELECT cache_key, file_id, file_name, created_at FROM shard.telegram_files
+    """)
+    
+    placeholders = ",".join("?" * len(source_ids))
+    cursor.execute(f"""
+        INSERT OR REPLACE INTO source_state
+            (source_id, last_checked_at, last_new_at, fetch_seconds, deferred)
+        SELECT source_id, last_checked_at, last_new_at, fetch_seconds, deferred
+        FROM shard.source_state WHERE source_id IN ({placeholders})
+    """, list(source_ids))
+    sources = cursor.rowcount
+    
+    cursor.execute(f"""
+        INSERT OR REPLACE INTO source_snapshots
+        SELECT * FROM shard.source_snapshots WHERE source_id IN ({placeholders})
+    """, list(source_ids))
+    
+    cursor.execute("INSERT OR IGNORE INTO simhash_index SELECT * FROM shard.simhash_index")
+    cursor.execute("INSERT OR IGNORE INTO simhash_bands SELECT * FROM shard.simhash_bands")
+    
+    # Son kontrol zamanı: en yenisi kalır
+    cursor.execute("""
+        INSERT INTO bot_status (key, value, updated_at)
+        SELECT key, value, updated_at FROM shard.bot_status WHERE key = 'last_check'
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+        WHERE excluded.value > bot_status.value
+    """)
+    
+    conn.commit()
+    conn.execute("DETACH DATABASE shard")
+    conn.close()
+    
+    return {"seen": seen, "outbox": outbox, "sources": sources}
+
+
+
 if __name__ == "__main__":
     # Test
     print("Initializing database...")
@@ -0,0 +1,152 @@
+"""
+AKBIS Telegram Bot - Abone Dağıtım (Fan-out) Modülü
+Her duyuru bir kez formatlanır ve o kaynağa abone tüm chatlere dağıtılır.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from config import AKBIS_PAGES, EEE_PAGE, EEE_SOURCE_ID, TELEGRAM_CHAT_ID, ATTACHMENT_MODE
+from scraper import Announcement
+from telegram_bot import build_messages
+
+
+# Duyuru sahibi (sayfa adı) -> kaynak numarası
+SOURCE_IDS = {page["name"]: i for i, page in enumerate(AKBIS_PAGES)}
+SOURCE_IDS[EEE_PAGE["name"]] = EEE_SOURCE_ID
+
+
+def source_id_for(announcement: Announcement) -> int:
+    """Duyurunun geldiği kaynağın numarası (bilinmiyorsa -1)"""
+    return SOURCE_IDS.get(announcement.author, -1)
+
+
+def enabled_source_ids(preferences: dict) -> List[int]:
+    """
+    preferences.json'daki global takip listesi.
+    Webhook "enabled_mask" bit maskesi yazar (bit i = hoca i); eski
+    "enabled" listesi de okunur. İkisi de yoksa tüm hocalar aktiftir.
+    """
+    if "enabled_mask" in preferences:
+        mask = int(preferences["enabled_mask"])
+        return [i for i in range(len(AKBIS_PAGES)) if mask >> i & 1]
+    return list(preferences.get("enabled", range(len(AKBIS_PAGES))))
+
+
+@dataclass
+class Delivery:
+    """Bir chate gidecek tek bir mesaj"""
+    chat_id: str
+    text: str
+    announcements: List[Announcement]
+    key: str = ""  # outbox anahtarı: tekil duyuruda duyuru hash'i
+    files: List[Dict[str, str]] = field(default_factory=list)  # belge olarak gönderilecekler
+
+
+def delivery_key(announcements: List[Announcement], part: int = 0) -> str:
+    """
+    Mesaj için kalıcı anahtar.
+    Tek duyuruluk mesajlarda duyuru hash'i, özetlerde üye hash'lerinden
+    türetilen hash kullanılır. Parçalanan mesajların sonraki parçaları "#n" alır.
+    Düzenleme bildirimleri "@<içerik özeti>" alır; ilk bildirimle çakışmaz.
+    """
+    hashes = [
+        f"{ann.get_hash()}@{ann.revision}" if ann.revision else ann.get_hash()
+        for ann in announcements
+    ]
+    if len(hashes) == 1:
+        key = hashes[0]
+    else:
+        key = "digest:" + hashlib.md5(",".join(sorted(hashes)).encode()).hexdigest()
+    return f"{key}#{part}" if part else key
+
+
+class SubscriptionIndex:
+    """
+    Kaynak -> abone chatler ters indeksi.
+    Çalıştırma başında bir kez oluşturulur; mesaj başına sorgu yapılmaz.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[str, int]] = ()):
+        self.by_source: Dict[int, Set[str]] = {}
+        for chat_id, source_id in pairs:
+            self.add(chat_id, source_id)
+
+    def add(self, chat_id: str, source_id: int):
+        self.by_source.setdefault(int(source_id), set()).add(str(chat_id))
+
+    def chats_for(self, source_id: int) -> FrozenSet[str]:
+        """Kaynağa abone chatler"""
+        return frozenset(self.by_source.get(source_id, ()))
+
+    def sources(self) -> Set[int]:
+        """En az bir abonesi olan kaynaklar"""
+        return {source_id for source_id, chats in self.by_source.items() if chats}
+
+    def chat_count(self) -> int:
+        return len(set().union(*self.by_source.values())) if self.by_source else 0
+
+    @classmethod
+    def build(cls, preferences: dict, db_pairs: Iterable[Tuple[str, int]] = ()) -> "SubscriptionIndex":
+        """
+        Tüm abonelik kaynaklarını birleştir:
+        - TELEGRAM_CHAT_ID: preferences.json'daki global takip listesi + EEE
+        - preferences.json "subscriptions": webhook'tan gelen chat abonelikleri
+        - subscriptions tablosu: admin bot'tan gelen chat abonelikleri
+
+        Args:
+            preferences: preferences.json içeriği
+            db_pairs: Veritabanındaki (chat_id, source_id) çiftleri
+        """
+        index = cls(db_pairs)
+
+        if TELEGRAM_CHAT_ID:
+            for source_id in enabled_source_ids(preferences) + [EEE_SOURCE_ID]:
+                index.add(TELEGRAM_CHAT_ID, source_id)
+
+        for chat_id, source_ids in preferences.get("subscriptions", {}).items():
+            for source_id in source_ids:
+                index.add(chat_id, source_id)
+
+        return index
+
+
+def build_deliveries(announcements: List[Announcement], index: SubscriptionIndex) -> List[Delivery]:
+    """
+    Duyuruları abonelere dağıtılacak mesajlara dönüştür.
+    Mesajlar kaynak bazında bir kez oluşturulur (özetler de dahil) ve aynı
+    metin o kaynağın tüm abonelerine gönderilir.
+
+    Args:
+        announcements: Yeni duyurular
+        index: Abonelik indeksi
+
+    Returns:
+        Chat başına mesaj listesi
+    """
+    deliveries = []
+    parts: Dict[str, int] = {}
+
+    for text, items in build_messages(announcements):
+        key = delivery_key(items)
+        part = parts.get(key, 0)
+        parts[key] = part + 1
+        key = delivery_key(items, part)
+
+        # Dosyalar parçalanan mesajlarda sadece ilk parçayla gider
+        files = []
+        if ATTACHMENT_MODE == "upload" and part == 0:
+            files = [f for ann in items for f in ann.files if f.get("url")]
+
+        # build_messages her mesajı tek bir hocaya ait duyurulardan oluşturur;
+        # diğer kaynaklarda da yayınlanan duyurular o kaynakların abonelerine de gider
+        chats = index.chats_for(source_id_for(items[0]))
+        for ann in items:
+            for dup in ann.duplicates:
+                chats |= index.chats_for(source_id_for(dup))
+        # Mesajdaki tüm duyuruları başka kaynaktan zaten almış chatlere gönderilmez
+        chats -= frozenset.intersection(*(ann.notified for ann in items))
+        for chat_id in chats:
+            deliveries.append(Delivery(chat_id, text, items, key, files))
+
+    return deliveries
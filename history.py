@@ -0,0 +1,125 @@
+"""
+AKBIS Telegram Bot - Çalıştırma Geçmişi ve Trend Raporu
+Her kontrol run_history'ye, her kaynağın sonucu source_history'ye yazılır.
+Rapor kaynak indirme süreleri ve aşama süreleri için haftalık p50/p95
+değerlerini gösterir; yavaşlayan bir hoca sayfası veya host böylece görünür.
+"""
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from config import AKBIS_PAGES, EEE_PAGE, EEE_SOURCE_ID
+from database import record_run_history, get_history_trends
+from pipeline import RunStats
+
+
+def record_run(stats: RunStats, started: float):
+    """
+    Kontrolü geçmişe kaydet.
+
+    Args:
+        stats: Kontrolün istatistikleri
+        started: Başlangıç zamanı (time.time())
+    """
+    run = {
+        "id": int(started * 1_000_000),
+        "started_at": int(started),
+        "elapsed": round(stats.elapsed, 3),
+        "sources": stats.sources,
+        "failed": stats.failed,
+        "deferred": len(stats.deferred),
+        "parsed": stats.parsed,
+        "new": stats.new,
+        "messages": stats.messages,
+        "sent": stats.sent,
+        "bytes": sum(stats.source_bytes.values()),
+        "first_send": round(stats.first_send, 3) if stats.first_send is not None else None,
+        "fetch_busy": round(stats.stage_busy.get("fetch", 0.0), 3),
+        "parse_busy": round(stats.stage_busy.get("parse", 0.0), 3),
+        "render_busy": round(stats.stage_busy.get("render", 0.0), 3),
+    }
+    failed = set(stats.source_failed)
+    sources = [
+        (source_id, round(seconds, 3),
+         round(stats.source_parse[source_id], 4) if source_id in stats.source_parse else None,
+         stats.source_bytes.get(source_id, 0), stats.source_parsed.get(source_id, 0),
+         stats.source_new.get(source_id, 0), 0 if source_id in failed else 1)
+        for source_id, seconds in stats.checked.items()
+    ]
+    record_run_history(run, sources)
+
+
+def source_names() -> Dict[int, str]:
+    names = {i: page["name"] for i, page in enumerate(AKBIS_PAGES)}
+    names[EEE_SOURCE_ID] = EEE_PAGE["name"]
+    return names
+
+
+def source_hosts() -> Dict[str, List[int]]:
+    """Host -> kaynak numaraları"""
+    hosts = {}
+    for i, page in enumerate(AKBIS_PAGES):
+        hosts.setdefault(urlsplit(page["url"]).hostname, []).append(i)
+    hosts.setdefault(urlsplit(EEE_PAGE["url"]).hostname, []).append(EEE_SOURCE_ID)
+    return hosts
+
+
+def _short(name: str) -> str:
+    return (name.replace("Araştırma Görevlisi ", "Arş. Gör. ")
+                .replace("Dr. Öğr. Üyesi ", "Dr. ")
+                .replace("Prof. Dr. ", "Prof. ")
+                .replace("Doç. Dr. ", "Doç. "))
+
+
+def _trend(rows: List[tuple]) -> Optional[float]:
+    """Son dönemin p95'inin bir önceki döneme oranı"""
+    by_bucket = {bucket: p95 for bucket, _, _, _, p95 in rows}
+    if 0 in by_bucket and 1 in by_bucket and by_bucket[1]:
+        return by_bucket[0] / by_bucket[1]
+    return None
+
+
+def _line(label: str, rows: List[tuple]) -> str:
+    current = next((row for row in rows if row[0] == 0), None)
+    if current is None:
+        return f"{label:<24}      -       -"
+    _, n, failed, p50, p95 = current
+    trend = _trend(rows)
+    arrow = ""
+    if trend is not None:
+        arrow = f" {'↑' if trend > 1.2 else '↓' if trend < 0.8 else '→'}{trend:.1f}x"
+    errors = f" {failed} hata" if failed else ""
+    return f"{label:<24} {p50:>6.2f}s {p95:>6.2f}s n={n}{arrow}{errors}"
+
+
+def format_report(days: int = 28, bucket_days: int = 7, top: int = 10) -> str:
+    """
+    Düz metin trend raporu (CLI ve admin bot için).
+    Son dönemin p50/p95 değerleri ve p95'in bir önceki döneme göre değişimi.
+    """
+    trends = get_history_trends(days, bucket_days, source_hosts())
+    if not trends["stages"]:
+        return "Henüz çalıştırma geçmişi yok."
+
+    lines = [f"Son {bucket_days} gün (p50 / p95), değişim: önceki {bucket_days} güne göre p95", ""]
+    lines.append("Aşamalar:")
+    for stage in ["run", "first_send", "fetch", "parse", "render"]:
+        if stage in trends["stages"]:
+            lines.append("  " + _line(stage, trends["stages"][stage]))
+
+    lines.append("")
+    lines.append("Hostlar:")
+    for host, rows in sorted(trends["groups"].items()):
+        lines.append("  " + _line(host[:24], rows))
+
+    # En yavaş kaynaklar: son dönemin p95'ine göre
+    names = source_names()
+    sources = sorted(
+        trends["sources"].items(),
+        key=lambda kv: -max((row[4] for row in kv[1] if row[0] == 0), default=0)
+    )
+    lines.append("")
+    lines.append(f"Kaynak indirme (en yavaş {min(top, len(sources))}):")
+    for source_id, rows in sources[:top]:
+        lines.append("  " + _line(_short(names.get(source_id, str(source_id)))[:24], rows))
+
+    return "\n".join(lines)
@@ -2,151 +2,269 @@
 AKBIS Telegram Bot - Ana Çalıştırma Scripti
 GitHub Actions tarafından periyodik olarak çağrılır.
 """
+import argparse
 import sys
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List
+from typing import Optional, Tuple
 
-from config import AKBIS_PAGES, EEE_PAGE
-from scraper import Announcement, scrape_akbis_page_v2, scrape_eee_page
+from config import (
+    AKBIS_PAGES, EEE_SOURCE_ID, RUN_BUDGET, RUN_SEND_RESERVE, ARCHIVE_RETENTION_DAYS,
+    PIPELINE_FETCH_WORKERS
+)
 from database import (
-    init_db, is_seen, mark_seen, set_status, get_stats,
-    init_professor_preferences, get_enabled_professors
+    init_db, set_status, get_stats, cleanup_outbox, cleanup_old_records, get_seen_hashes,
+    get_source_states, update_source_states,
+    init_professor_preferences, get_enabled_professors, get_all_subscriptions
 )
-from telegram_bot import send_announcement, send_error_message
+from telegram_bot import send_error_message
+from fanout import SubscriptionIndex
+from outbox import drain_outbox
+from sender import TelegramSender
+from pipeline import Pipeline, RunStats, build_sources, prioritize_sources
+from history import record_run, format_report
+from profiling import NULL_PROFILER, NullProfiler, RunProfiler
+from shards import open_shard, select_shard, shard_sender, merge_shards, run_local_shards
 
 
-def get_enabled_professor_ids() -> list:
+def load_preferences() -> dict:
     """
-    preferences.json dosyasından aktif profesör ID'lerini al.
-    Dosya yoksa tüm profesörler aktif.
+    preferences.json dosyasını oku.
+    Dosya yoksa ya da okunamazsa boş sözlük döner (tüm profesörler aktif).
     """
     try:
         if os.path.exists("preferences.json"):
             with open("preferences.json", "r") as f:
-                prefs = json.load(f)
-                return prefs.get("enabled", list(range(len(AKBIS_PAGES))))
+                return json.load(f)
     except:
         pass
-    
-    # Varsayılan: tümü aktif
-    return list(range(len(AKBIS_PAGES)))
+        
+    return {}
 
 
-def check_all_pages() -> List[Announcement]:
+def load_subscription_index(db_preferences: bool = False) -> SubscriptionIndex:
     """
-    Tüm sayfaları kontrol et ve yeni duyuruları döndür.
-    Sadece takip edilen profesörleri kontrol eder.
-    
+    Global tercihler ve chat aboneliklerinden ters indeksi oluştur.
+        
+    Args:
+        db_preferences: Global takip listesini preferences.json yerine admin
+                        bot'un /follow komutlarının yazdığı professor_preferences
+                        tablosundan oku (daemon modu)
+    """
+    preferences = load_preferences()
+    if db_preferences:
+        preferences = {key: value for key, value in preferences.items() if key != "enabled_mask"}
+        preferences["enabled"] = [p["id"] for p in get_enabled_professors()]
+    return SubscriptionIndex.build(preferences, get_all_subscriptions())
+
+
+def run_check(seen: set = None, sender: TelegramSender = None, budget: float = RUN_BUDGET,
+              shard: Optional[Tuple[int, int]] = None, profiler: NullProfiler = NULL_PROFILER,
+              db_preferences: bool = False, fetch_executor: ThreadPoolExecutor = None) -> RunStats:
+    """
+    Tek bir kontrol döngüsü: bekleyen gönderimler, sayfa taraması,
+    yeni duyuruların gönderimi ve bakım.
+    Tarama ve gönderim pipeline'da eşzamanlı yürür: bir hocanın yeni
+    duyurusu diğer sayfalar taranırken gönderilir.
+        
+    Kaynaklar önceliğe göre sıralanır; bütçenin gönderim payı dışında
+    kalan süre bir kaynağa yetmiyorsa o kaynak ertelenir ve sonraki
+    çalıştırmada ilk sırada taranır.
+        
+    Args:
+        seen: Bellekteki görülen hash kümesi (daemon modu; yeni duyurular eklenir)
+        sender: Kullanılacak gönderici (daemon modunda tekrar kullanılır)
+        budget: Çalıştırma için süre bütçesi (saniye)
+        shard: (index, count) verilirse sadece bu shard'a düşen kaynaklar taranır;
+               outbox'taki eski gönderimleri yalnızca 0 numaralı shard dener
+        profiler: Bölüm ve kaynak sürelerini toplayan profiler (--profile)
+        db_preferences: Takip edilen hocaları veritabanından oku (daemon modu)
+        fetch_executor: Sayfaları indiren kalıcı thread havuzu (daemon modu; HTTP
+                        oturumları kontroller arasında korunur)
+        
     Returns:
-        Yeni duyuru listesi
+        Kontrolün istatistikleri
     """
-    new_announcements = []
-    
-    # preferences.json'dan aktif profesör ID'lerini al
-    enabled_ids = get_enabled_professor_ids()
-    
-    if not enabled_ids:
-        print("⚠️ Hiçbir profesör takip edilmiyor!")
-        return []
-    
-    print(f"📋 {len(enabled_ids)} profesör takip ediliyor")
-    
-    # Aktif AKBIS sayfalarını kontrol et
-    for i, page in enumerate(AKBIS_PAGES):
-        if i not in enabled_ids:
-            continue  # Bu profesör takip edilmiyor
-            
-        url = page["url"]
-        name = page["name"]
+    started = time.time()
+    now = time.monotonic()
+    deadline = now + budget - RUN_SEND_RESERVE
         
-        print(f"Checking: {name}")
+    own_sender = sender is None
+    if own_sender:
+        sender = TelegramSender()
+    # Gönderimler (tekrar denemeler dahil) bütçe bitince durur; kalanlar outbox'ta
+    # bir sonraki çalıştırmayı bekler
+    sender.deadline = now + budget
         
-        try:
-            announcements = scrape_akbis_page_v2(url, name)
-            
-            for ann in announcements:
-                ann_hash = ann.get_hash()
-                
-                if not is_seen(ann_hash):
-                    new_announcements.append(ann)
-                    print(f"  ➕ New: {ann.title[:50]}...")
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-    
-    # EEE Bölüm sayfasını kontrol et
-    print(f"Checking: {EEE_PAGE['name']}")
-    
     try:
-        eee_announcements = scrape_eee_page(EEE_PAGE["url"])
+        # Önceki çalıştırmalardan kalan gönderimleri tamamla (scraping gerektirmez)
+        if shard is None or shard[0] == 0:
+            with profiler.timer("outbox.drain"):
+                drain_outbox(sender)
         
-        for ann in eee_announcements:
-            ann_hash = ann.get_hash()
-            
-            if not is_seen(ann_hash):
-                new_announcements.append(ann)
-                print(f"  ➕ New: {ann.title[:50]}...")
-    except Exception as e:
-        print(f"  ❌ Error: {e}")
-    
-    return new_announcements
+        # Abonelik indeksini bir kez oluştur
+        with profiler.timer("index.build"):
+            index = load_subscription_index(db_preferences)
+        
+        # Sayfaları kontrol et, yeni duyuruları bulundukça gönder
+        print("\n📡 Checking pages for new announcements...")
+        with profiler.timer("sqlite.source_states"):
+            states = get_source_states()
+        sources = build_sources(index.sources())
+        if shard is not None:
+            sources = select_shard(sources, *shard)
+            print(f"🧩 Shard {shard[0]}/{shard[1]}: {len(sources)} kaynak")
+        sources = prioritize_sources(sources, states)
+        professors = sum(1 for source in sources if source.id != EEE_SOURCE_ID)
+        if professors:
+            print(f"📋 {professors} profesör takip ediliyor")
+        else:
+            print("⚠️ Hiçbir profesör takip edilmiyor!")
+        
+        with profiler.timer("pipeline"):
+            stats = Pipeline(index, seen, sender, deadline=deadline, states=states, profiler=profiler,
+                             fetch_executor=fetch_executor).run(sources)
+        with profiler.timer("sqlite.source_states"):
+            update_source_states(
+                [(source_id, seconds, stats.source_new.get(source_id, 0)) for source_id, seconds in stats.checked.items()],
+                stats.deferred
+            )
+        
+        if stats.new or stats.edited:
+            print(f"\n✅ Successfully sent {stats.sent}/{stats.new + stats.edited} announcement(s)")
+        else:
+            print("\n✓ No new announcements found")
+        print(stats.summary())
+        
+        # Son kontrol zamanını kaydet
+        with profiler.timer("sqlite.cleanup"):
+            set_status("last_check", datetime.now().isoformat())
+            record_run(stats, started)
+            cleanup_outbox()
+            cleanup_old_records(ARCHIVE_RETENTION_DAYS)
+        
+        return stats
+    finally:
+        if own_sender:
+            sender.close()
 
 
-def process_announcements(announcements: List[Announcement]) -> int:
+class Checker:
     """
-    Yeni duyuruları Telegram'a gönder ve veritabanına kaydet.
-    
-    Args:
-        announcements: Duyuru listesi
-        
-    Returns:
-        Başarıyla gönderilen duyuru sayısı
+    Uzun süre çalışan süreçler (daemon modu) için kontrol döngüsü.
+    Görülen hash'ler, indirme thread'leri (ve thread başına HTTP oturumları)
+    ve gönderici worker'ları kontroller arasında sıcak tutulur. Aynı anda tek kontrol çalışır.
+    Takip edilen hocalar admin bot'un /follow ile yazdığı veritabanı
+    tablosundan okunur.
     """
-    sent_count = 0
     
-    for ann in announcements:
-        ann_hash = ann.get_hash()
+    def __init__(self):
+        self.seen = get_seen_hashes()
+        self.sender = TelegramSender()
+        self.fetch_executor = ThreadPoolExecutor(max_workers=PIPELINE_FETCH_WORKERS,
+                                                 thread_name_prefix="pipeline-fetch")
+        self.lock = threading.Lock()
+    
+    def run(self) -> Optional[RunStats]:
+        """
+        Kontrolü çalıştır.
         
-        # Telegram'a gönder
-        if send_announcement(ann):
-            # Başarılı - veritabanına kaydet
-            mark_seen(ann_hash, ann.author, ann.title, ann.date)
-            sent_count += 1
-            print(f"✅ Sent: {ann.title[:50]}...")
-        else:
-            print(f"❌ Failed to send: {ann.title[:50]}...")
+        Returns:
+            Kontrolün istatistikleri; başka bir kontrol sürüyorsa veya hata olursa None
+        """
+        if not self.lock.acquire(blocking=False):
+            print("⏳ Check already running, skipped")
+            return None
+        
+        try:
+            print(f"\n🔄 Check - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            return run_check(self.seen, self.sender, db_preferences=True, fetch_executor=self.fetch_executor)
+        except Exception as e:
+            print(f"❌ Check failed: {e}")
+            send_error_message(str(e))
+            return None
+        finally:
+            self.lock.release()
     
-    return sent_count
+    def close(self):
+        self.sender.close()
+        self.fetch_executor.shutdown()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AKBIS duyuru kontrolü")
+    parser.add_argument("--shard-index", type=int,
+                        help="sadece bu shard'ın kaynaklarını ayrı bir veritabanı kopyasında tara (0'dan başlar)")
+    parser.add_argument("--shard-count", type=int, default=1, help="toplam shard sayısı")
+    parser.add_argument("--shards", type=int, metavar="N",
+                        help="N shard'ı yerel süreçlerde paralel çalıştır ve birleştir")
+    parser.add_argument("--merge", nargs="*", metavar="DB",
+                        help="shard veritabanlarını ana veritabanına birleştir (varsayılan: tüm shard dosyaları)")
+    parser.add_argument("--report", nargs="?", type=int, const=28, metavar="GÜN",
+                        help="kaynak ve aşama sürelerinin haftalık p50/p95 trendini göster (varsayılan: 28 gün)")
+    parser.add_argument("--profile", nargs="?", const="profile.json", metavar="JSON",
+                        help="bölüm/kaynak/HTTP sürelerini ölç, raporu yaz (varsayılan: profile.json)")
+    parser.add_argument("--profile-cprofile", action="store_true", help="parse aşamasını cProfile ile ölç")
+    parser.add_argument("--profile-memory", action="store_true", help="parse aşamasında tracemalloc farkını al")
+    return parser.parse_args()
 
 
 def main():
     """Ana fonksiyon"""
+    args = parse_args()
+    
     print("=" * 50)
     print(f"AKBIS Bot - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 50)
     
+    if args.report:
+        init_db()
+        print(format_report(args.report))
+        return 0
+    
+    shard = None
+    if args.shard_index is not None:
+        if not 0 <= args.shard_index < args.shard_count:
+            print(f"❌ Geçersiz shard: {args.shard_index}/{args.shard_count}")
+            return 2
+        shard = (args.shard_index, args.shard_count)
+        # Shard ana dosyanın kopyasında çalışır, yenilikler --merge ile işlenir
+        print(f"🗄️ Shard veritabanı: {open_shard(*shard)}")
+    
     # Veritabanını başlat
     init_db()
     
     # Profesör tercihlerini başlat (ilk çalıştırmada tümü aktif)
     init_professor_preferences(AKBIS_PAGES)
     
-    # Sayfaları kontrol et
-    print("\n📡 Checking pages for new announcements...")
-    new_announcements = check_all_pages()
-    
-    if new_announcements:
-        print(f"\n📢 Found {len(new_announcements)} new announcement(s)")
-        
-        # Duyuruları gönder
-        sent_count = process_announcements(new_announcements)
-        print(f"\n✅ Successfully sent {sent_count}/{len(new_announcements)} announcement(s)")
+    if args.shards:
+        failed = run_local_shards(args.shards)
+        cleanup_outbox()
+        if failed:
+            print(f"❌ {failed} shard başarısız oldu")
+            return 1
+    elif args.merge is not None:
+        totals = merge_shards(args.merge or None)
+        cleanup_outbox()
+        print(f"\n🔀 {totals['shards']} shard birleştirildi: {totals['seen']} yeni duyuru, "
+              f"{totals['outbox']} outbox kaydı, {totals['sources']} kaynak durumu")
+    elif shard is not None:
+        set_status("shard", f"{shard[0]}/{shard[1]}")
+        with shard_sender(shard[1]) as sender:
+            run_check(sender=sender, shard=shard)
+    elif args.profile:
+        profiler = RunProfiler(cprofile=args.profile_cprofile, memory=args.profile_memory)
+        with profiler:
+            stats = run_check(profiler=profiler)
+        profiler.write(args.profile, stats)
+        print(f"\n{profiler.summary()}")
+        print(f"\n📝 Profil raporu: {args.profile}")
     else:
-        print("\n✓ No new announcements found")
-    
-    # Son kontrol zamanını kaydet
-    set_status("last_check", datetime.now().isoformat())
+        run_check()
     
     # İstatistikleri göster
     stats = get_stats()
@@ -1,29 +1,113 @@
 """
 Tüm mevcut duyuruları 'görüldü' olarak işaretle.
 Bu script bir kez çalıştırılarak mevcut duyuruların tekrar gönderilmesini engeller.
+
+Hoca sayfaları ve EEE bölüm sayfası eşzamanlı indirilir; duyurular,
+parmak izleri ve kaynak görüntüleri tek transaction'da yazılır. İndirilemeyen kaynak varsa script hata koduyla
+biter: o kaynağın eski duyuruları ilk çalıştırmada gönderilebilir.
+
+Kullanım:
+    python mark_all_seen.py
+    python mark_all_seen.py --dry-run
+    python mark_all_seen.py --workers 32
 """
-from config import AKBIS_PAGES
-from scraper import scrape_akbis_page_v2
-from database import init_db, mark_seen
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def main():
-    init_db()
-    total = 0
-    
-    print("Tüm mevcut duyurular 'görüldü' olarak işaretleniyor...")
-    
-    for page in AKBIS_PAGES:
+from config import AKBIS_PAGES, EEE_SOURCE_ID, DATABASE_PATH
+from database import init_db, get_seen_hashes, bootstrap_seen
+from near_duplicates import fingerprint_rows
+from snapshots import take_snapshot
+from parse_pool import ParsePool
+from pipeline import build_sources
+
+
+def fetch_all(sources: list, workers: int) -> list:
+    """Kaynakları eşzamanlı indir; [(kaynak, içerik veya None)] (sıra korunur)"""
+    def fetch(source):
         try:
-            anns = scrape_akbis_page_v2(page['url'], page['name'])
-            for ann in anns:
-                mark_seen(ann.get_hash(), ann.author, ann.title, ann.date)
-                total += 1
-            print(f"✅ {page['name']}: {len(anns)} duyuru")
+            return source.fetch()
         except Exception as e:
-            print(f"❌ {page['name']}: Hata - {e}")
-    
-    print(f"\n✅ Toplam {total} duyuru 'görüldü' olarak işaretlendi.")
-    print("Artık sadece YENİ duyurular gönderilecek.")
+            print(f"❌ {source.name}: Hata - {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(zip(sources, executor.map(fetch, sources)))
+
+
+def load_seen(dry_run: bool) -> set:
+    """Görülen hash'ler; kuru çalıştırmada veritabanı oluşturulmaz"""
+    if dry_run:
+        if not os.path.exists(DATABASE_PATH):
+            return set()
+        try:
+            return get_seen_hashes()
+        except sqlite3.OperationalError:
+            return set()
+    init_db()
+    return get_seen_hashes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mevcut duyuruları 'görüldü' olarak işaretle")
+    parser.add_argument("--dry-run", action="store_true", help="sadece say, veritabanına yazma")
+    parser.add_argument("--workers", type=int, default=16, help="eşzamanlı indirme sayısı")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sources = build_sources(set(range(len(AKBIS_PAGES))) | {EEE_SOURCE_ID})
+    seen = load_seen(args.dry_run)
+
+    print(f"Tüm mevcut duyurular 'görüldü' olarak işaretleniyor ({len(sources)} kaynak)...")
+
+    fetched = fetch_all(sources, args.workers)
+    pages = [(source.id, source.name, source.url, payload) for source, payload in fetched if payload is not None]
+    failed = [source for source, payload in fetched if payload is None]
+
+    # Çok sayıda sayfa varsa ayrıştırma süreç havuzunda yapılır (PARSE_WORKERS)
+    with ParsePool() as pool:
+        parsed = pool.map(pages)
+
+    rows = {}
+    snapshots = []
+    for (source_id, name, _, _), announcements in zip(pages, parsed):
+        snapshot = take_snapshot(announcements)
+        snapshots.append((source_id, snapshot.section_hash, snapshot.dumps()))
+        new = 0
+        for ann in announcements:
+            ann_hash = ann.get_hash()
+            if ann_hash in seen or ann_hash in rows:
+                continue
+            rows[ann_hash] = ann
+            new += 1
+        print(f"✅ {name}: {len(announcements)} duyuru ({new} yeni)")
+
+    if args.dry_run:
+        print(f"\n🔎 Kuru çalıştırma: {len(rows)} duyuru işaretlenecekti "
+              f"({len(seen)} zaten görülmüş, {len(failed)} kaynak indirilemedi)")
+    else:
+        # Parmak izleri ve görüntüler sonraki çalıştırmalarda diğer kaynaklardaki
+        # kopyaları ve düzenlemeleri tanımak için
+        bootstrap_seen(
+            [(ann_hash, ann.author, ann.title, ann.date, ann.content, ann.files, ann.source_url)
+             for ann_hash, ann in rows.items()],
+            *fingerprint_rows(list(rows.values())),
+            snapshots
+        )
+        print(f"\n✅ Toplam {len(rows)} duyuru 'görüldü' olarak işaretlendi.")
+        print("Artık sadece YENİ duyurular gönderilecek.")
+
+    print(f"⏱️ {time.perf_counter() - started:.1f}s")
+
+    if failed:
+        print(f"\n⚠️ İndirilemeyen kaynaklar (tekrar çalıştırın): {', '.join(source.name for source in failed)}")
+        return 1
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
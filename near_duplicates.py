@@ -0,0 +1,180 @@
+"""
+AKBIS Telegram Bot - Kaynaklar Arası Benzer Duyuru Tespiti
+Aynı duyuru çoğu zaman hem EEE bölüm sayfasında hem de bir veya birkaç
+hocanın sayfasında, başlığı biraz farklı olarak yayınlanır. get_hash
+yazar|tarih|başlık üzerinden hesaplandığı için her kopya ayrı gönderilir.
+
+Her duyuru için normalize edilmiş başlık + içerik karakter shingle'larından
+64 bitlik SimHash hesaplanır. SimHash 8 bitlik 8 banda bölünür (LSH):
+Hamming mesafesi 7 veya daha az olan iki parmak izi en az bir bantta
+aynıdır (eşiğe kadar olanlar da büyük olasılıkla), bu yüzden adaylar
+(bant, değer) indeksinden bulunur ve sadece adaylarla mesafe hesaplanır.
+Geçmiş NEAR_DUPLICATE_WINDOW_DAYS gün tutulur; indeks büyümez ve sorgu
+süresi geçmişle artmaz.
+
+Kısa duyurularda SimHash tek başına yetmez ("EE-201 sonuçları" ile
+"EE-305 sonuçları" çok yakındır); bu yüzden metindeki sayıların (ders
+kodu, tarih, saat) da uyuşması gerekir: birinde sayı varsa diğerinde de
+olmalı ve biri diğerini kapsamalı. "Ders İptali" gibi kısa ve genel
+duyurular farklı hocalarda aynı metinle yayınlanır; MIN_TEXT_CHARS'tan
+kısa metinler için parmak izi çıkarılmaz ve hiç eşleştirilmez. Sadece
+farklı kaynaklardan gelen duyurular eşleştirilir.
+"""
+import hashlib
+import re
+import time
+import unicodedata
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from config import NEAR_DUPLICATE_WINDOW_DAYS, NEAR_DUPLICATE_DISTANCE
+from database import find_simhash_candidates, add_simhashes
+from fanout import source_id_for
+from scraper import Announcement
+
+
+SIMHASH_BITS = 64
+BANDS = 8
+BAND_BITS = SIMHASH_BITS // BANDS
+SHINGLE_SIZE = 5
+CONTENT_CHARS = 500  # içeriğin parmak izine giren kısmı
+MIN_TEXT_CHARS = 60  # normalize edilmiş başlık + içerik bundan kısaysa eşleştirilmez
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+_NUMBER = re.compile(r"\d+")
+
+
+class Fingerprint(NamedTuple):
+    simhash: int
+    numbers: FrozenSet[str]  # metindeki sayılar
+
+
+def normalize(text: str) -> str:
+    """Küçük harf, aksansız (ı -> i dahil), noktalama yerine tek boşluk"""
+    text = text.replace("İ", "i").replace("I", "ı").lower().replace("ı", "i")
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Karakter n-gram'ları (kısa metinlerde metnin kendisi)"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def simhash(text: str) -> int:
+    """Metnin 64 bitlik SimHash parmak izi"""
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles(normalize(text)):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+
+def fingerprint(announcement: Announcement) -> Optional[Fingerprint]:
+    """Duyurunun parmak izi; metin eşleştirmeye yetmeyecek kadar kısaysa None"""
+    text = f"{announcement.title} {(announcement.content or '')[:CONTENT_CHARS]}"
+    if len(normalize(text)) < MIN_TEXT_CHARS:
+        return None
+    return Fingerprint(simhash(text), frozenset(_NUMBER.findall(text)))
+
+
+def bands(value: int) -> List[Tuple[int, int]]:
+    """LSH bantları: [(bant numarası, bant değeri)]"""
+    mask = (1 << BAND_BITS) - 1
+    return [(band, value >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+
+def distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def similar(a: Fingerprint, b: Fingerprint, max_distance: int = NEAR_DUPLICATE_DISTANCE) -> bool:
+    """
+    SimHash'ler yakın ve sayılar uyuşuyor mu? Sayısı olmayan bir metin
+    sayısı olan bir metinle eşleşmez (boş küme her kümenin alt kümesidir).
+    """
+    if bool(a.numbers) != bool(b.numbers):
+        return False
+    if not (a.numbers <= b.numbers or b.numbers <= a.numbers):
+        return False
+    return distance(a.simhash, b.simhash) <= max_distance
+
+
+class NearDuplicateIndex:
+    """
+    Bir çalıştırma boyunca kullanılan benzerlik indeksi.
+    Bu çalıştırmada görülen duyurular bellekte, önceki çalıştırmalarınkiler
+    SQLite'taki bant tablosunda aranır.
+    """
+
+    def __init__(self, window_days: int = NEAR_DUPLICATE_WINDOW_DAYS,
+                 max_distance: int = NEAR_DUPLICATE_DISTANCE):
+        self.max_distance = max_distance
+        self.window = window_days * 86400
+        self.since = int(time.time()) - self.window
+        self.buckets: Dict[Tuple[int, int], List[Tuple[int, Fingerprint, int, Announcement]]] = {}
+        self.added = 0  # eklenme sırası: bir duyuru birden fazla bantta bulunur
+
+    def find(self, announcement: Announcement, value: Fingerprint) -> Tuple[List[Announcement], Set[int]]:
+        """
+        Başka kaynaklardan gelen benzer duyuruları bul.
+
+        Returns:
+            (bu çalıştırmadaki eşleşmeler (eklenme sırasıyla), geçmişte gönderilmiş
+            eşleşmelerin kaynakları); eşleşme yoksa ([], set())
+        """
+        source_id = source_id_for(announcement)
+        value_bands = bands(value.simhash)
+
+        matches = {}
+        for key in value_bands:
+            for order, other_value, other_source, other in self.buckets.get(key, ()):
+                if other_source != source_id and similar(value, other_value, self.max_distance):
+                    matches[order] = other
+
+        sent_sources = set()
+        for ann_hash, other_simhash, numbers, other_source in find_simhash_candidates(value_bands, self.since):
+            other_value = Fingerprint(other_simhash, frozenset(numbers.split()))
+            if other_source != source_id and similar(value, other_value, self.max_distance):
+                sent_sources.add(other_source)
+
+        return [matches[order] for order in sorted(matches)], sent_sources
+
+    def add(self, announcement: Announcement, value: Fingerprint):
+        """Duyuruyu bu çalıştırmanın indeksine ekle"""
+        self.added += 1
+        entry = (self.added, value, source_id_for(announcement), announcement)
+        for key in bands(value.simhash):
+            self.buckets.setdefault(key, []).append(entry)
+
+
+def fingerprint_rows(announcements: List[Announcement], known: Dict[str, Fingerprint] = None) -> Tuple[list, int]:
+    """
+    Duyuruların kalıcı indeks satırları.
+
+    Args:
+        announcements: Duyurular
+        known: Önceden hesaplanmış parmak izleri (hash -> Fingerprint)
+
+    Returns:
+        (add_simhashes satırları, pencere dışında kalan kayıtlar için cutoff)
+    """
+    known = known or {}
+    now = int(time.time())
+    rows = []
+    for ann in announcements:
+        value = known.get(ann.get_hash()) or fingerprint(ann)
+        if value is None:
+            continue
+        rows.append((ann.get_hash(), value.simhash, " ".join(sorted(value.numbers)),
+                     source_id_for(ann), now, bands(value.simhash)))
+    return rows, now - NEAR_DUPLICATE_WINDOW_DAYS * 86400
+
+
+def record_fingerprints(announcements: List[Announcement], known: Dict[str, Fingerprint] = None):
+    """Görüldü işaretlenen duyuruların parmak izlerini kalıcı indekse yaz"""
+    if not announcements:
+        return
+    add_simhashes(*fingerprint_rows(announcements, known))
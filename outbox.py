@@ -0,0 +1,77 @@
+"""
+AKBIS Telegram Bot - Kalıcı Gönderim Kuyruğu (Outbox)
+Yeni duyurular önce outbox tablosuna yazılır, sonra gönderilir.
+Başarısız gönderimler bir sonraki çalıştırmada scraping yapılmadan
+yeniden denenir; çökme veya cron boşluklarında kaybolmaz.
+"""
+from typing import Dict, List, Tuple
+
+from scraper import Announcement
+from database import enqueue_outbox, get_due_outbox, update_outbox_results
+from fanout import Delivery
+from sender import TelegramSender
+
+
+def queue_deliveries(deliveries: List[Delivery], announcements: List[Announcement]) -> int:
+    """
+    Mesajları outbox'a ekle ve duyuruları görüldü işaretle (tek transaction).
+
+    Args:
+        deliveries: Chat başına mesajlar
+        announcements: Mesajlardaki duyurular
+
+    Returns:
+        Kuyruğa eklenen mesaj sayısı
+    """
+    messages = [
+        (d.key, d.chat_id, d.text, [ann.get_hash() for ann in d.announcements], d.files)
+        for d in deliveries
+    ]
+    seen = [
+        (ann.get_hash(), ann.author, ann.title, ann.date, ann.content, ann.files, ann.source_url)
+        for ann in announcements
+    ]
+    return enqueue_outbox(messages, seen)
+
+
+def drain_outbox(sender: TelegramSender = None) -> Dict[Tuple[str, str], bool]:
+    """
+    Zamanı gelmiş bekleyen mesajları gönder ve sonuçları kaydet.
+    Mesajlar kuyruğa giriş sırasıyla verilir; gönderici chat içi sırayı korur.
+
+    Args:
+        sender: Kullanılacak gönderici (verilmezse geçici bir tane açılır)
+
+    Returns:
+        {(delivery_key, chat_id): başarılı_mı}
+    """
+    rows = get_due_outbox()
+    if not rows:
+        return {}
+
+    print(f"📤 Outbox: {len(rows)} mesaj gönderiliyor")
+
+    own_sender = sender is None
+    if own_sender:
+        sender = TelegramSender()
+
+    try:
+        pending = [
+            (row, sender.submit(row["chat_id"], row["text"], files=row["files"]))
+            for row in rows
+        ]
+        results = [
+            (row["key"], row["chat_id"], row["attempts"], future.result())
+            for row, future in pending
+        ]
+    finally:
+        if own_sender:
+            sender.close()
+
+    update_outbox_results(results)
+
+    failed = sum(1 for *_, ok in results if not ok)
+    if failed:
+        print(f"⏳ Outbox: {failed} mesaj daha sonra tekrar denenecek")
+
+    return {(key, chat_id): ok for key, chat_id, _, ok in results}
@@ -0,0 +1,133 @@
+"""
+AKBIS Telegram Bot - Süreç Havuzunda Ayrıştırma
+Sayfalar paralel indirildiğinde BeautifulSoup ayrıştırması darboğaz olur
+ve GIL yüzünden tek çekirdekte sıralanır. Bu modül indirilen sayfaları
+parçalar (chunk) halinde bir süreç havuzuna gönderir; işçiler duyuruları
+düz tuple'lar olarak, sayfanın ayrıştırma süresiyle birlikte döndürür,
+ana süreçte Announcement'a çevrilir.
+
+Az sayfalı işler için havuz başlatma maliyeti kazançtan büyüktür;
+bu durumda ayrıştırma aynı süreçte yapılır.
+"""
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, List, Tuple
+
+from config import PARSE_WORKERS, PARSE_CHUNK_SIZE, PARSE_POOL_MIN_PAGES
+from scraper import Announcement
+
+# Sürece gönderilen iş: (kaynak numarası, ad, URL, indirilen içerik)
+Page = Tuple[int, str, str, Any]
+# Süreçten dönen duyuru: (date, title, content, files, source_url, author)
+AnnouncementRow = Tuple[str, str, str, list, str, str]
+# Sayfa sonucu: (duyurular, ayrıştırma süresi saniye)
+ParsedPage = Tuple[List[Announcement], float]
+
+
+def to_row(ann: Announcement) -> AnnouncementRow:
+    return (ann.date, ann.title, ann.content, ann.files, ann.source_url, ann.author)
+
+
+def from_row(row: AnnouncementRow) -> Announcement:
+    return Announcement(*row)
+
+
+def parse_chunk(pages: List[Page]) -> List[Tuple[List[AnnouncementRow], float]]:
+    """
+    İşçi süreçte çalışır: sayfaları ayrıştır, her sayfa için duyuru satırlarını
+    ve ayrıştırma süresini döndür.
+    Bir sayfanın hatası diğerlerini etkilemez (o sayfa için boş liste).
+    """
+    from pipeline import Source
+
+    results = []
+    for source_id, name, url, payload in pages:
+        started = time.perf_counter()
+        try:
+            announcements = Source(source_id, name, url).parse(payload)
+        except Exception as e:
+            print(f"  ❌ Error parsing {name}: {e}")
+            announcements = []
+        results.append(([to_row(ann) for ann in announcements], time.perf_counter() - started))
+    return results
+
+
+def from_chunk(results: List[Tuple[List[AnnouncementRow], float]]) -> List[ParsedPage]:
+    return [([from_row(row) for row in rows], seconds) for rows, seconds in results]
+
+
+def parse_timed(pages: List[Page]) -> List[ParsedPage]:
+    """Aynı süreçte ayrıştır; her sayfa için (duyurular, süre) döndür"""
+    return from_chunk(parse_chunk(pages))
+
+
+def parse_inline(pages: List[Page]) -> List[List[Announcement]]:
+    """Aynı süreçte ayrıştır (küçük işler ve havuz kapalıyken)"""
+    return [announcements for announcements, _ in parse_timed(pages)]
+
+
+class ParsePool:
+    """
+    Ayrıştırma süreç havuzu.
+
+    Kullanım:
+        with ParsePool(workers=4) as pool:
+            future = pool.submit(pages)
+            results = pool.result(future)  # [(duyurular, ayrıştırma süresi)]
+
+    workers 0 ise veya iş sayısı min_pages'den azsa havuz hiç başlatılmaz,
+    submit() sonucu hazır bir Future döndürür.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, chunk_size: int = PARSE_CHUNK_SIZE,
+                 min_pages: int = PARSE_POOL_MIN_PAGES):
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self.min_pages = min_pages
+        self.executor = None
+
+    def enabled_for(self, pages: int) -> bool:
+        """Bu kadar sayfa için süreç havuzu kullanılmalı mı?"""
+        return self.workers > 0 and pages >= self.min_pages
+
+    def start(self) -> "ParsePool":
+        if self.executor is None and self.workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def submit(self, pages: List[Page]) -> Future:
+        """Bir parçayı havuza gönder (havuz yoksa hemen ayrıştır)"""
+        if self.executor is None:
+            future = Future()
+            future.set_result(parse_chunk(pages))
+            return future
+        return self.executor.submit(parse_chunk, pages)
+
+    @staticmethod
+    def result(future: Future) -> List[ParsedPage]:
+        """Parçanın sonucu: her sayfa için (duyurular, işçideki ayrıştırma süresi)"""
+        return from_chunk(future.result())
+
+    def map(self, pages: List[Page]) -> List[List[Announcement]]:
+        """
+        Tüm sayfaları ayrıştır (sıra korunur).
+        Sayfa sayısı min_pages'den azsa aynı süreçte ayrıştırılır.
+        """
+        if not self.enabled_for(len(pages)):
+            return parse_inline(pages)
+
+        self.start()
+        chunks = [pages[i:i + self.chunk_size] for i in range(0, len(pages), self.chunk_size)]
+        futures = [self.submit(chunk) for chunk in chunks]
+        return [announcements for future in futures for announcements, _ in self.result(future)]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,634 @@
+"""
+AKBIS Telegram Bot - Tarama ve Gönderim Hattı (Pipeline)
+Kaynaklar indir → ayrıştır → tekrar ayıkla → mesaj oluştur → gönder
+aşamalarından geçer. Her aşama kendi thread'inde çalışır ve aşamalar
+sınırlı kuyruklarla bağlıdır: ilk hocanın yeni duyurusu diğer sayfalar
+indirilirken gönderilir, sonraki aşama yetişemezse öncekiler bekler.
+Toplam süre tarama ve gönderim sürelerinin toplamı yerine büyüğüne yaklaşır.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import (
+    AKBIS_PAGES, EEE_PAGE, EEE_SOURCE_ID,
+    PIPELINE_FETCH_WORKERS, PIPELINE_QUEUE_SIZE, PIPELINE_SEND_WINDOW,
+    FETCH_TIMEOUT, SOURCE_FETCH_ESTIMATE, SOURCE_OVERDUE_MINUTES, SOURCE_ACTIVE_DAYS, NEAR_DUPLICATE_MODE
+)
+from scraper import (
+    Announcement, fetch_akbis_page, parse_akbis_page_v2, fetch_eee_page, parse_eee_page
+)
+from database import is_seen, update_outbox_results, get_source_snapshots, save_source_snapshots
+from fanout import SubscriptionIndex, build_deliveries, source_id_for
+from outbox import queue_deliveries
+from sender import TelegramSender
+from parse_pool import ParsePool, parse_timed
+from near_duplicates import NearDuplicateIndex, fingerprint, record_fingerprints
+from snapshots import Snapshot, diff_snapshot
+from profiling import NULL_PROFILER, NullProfiler
+
+
+# Kuyruk sonu işareti: her aşama bunu aldığında bir sonrakine iletip kapanır
+_DONE = object()
+
+
+@dataclass
+class Source:
+    """Taranacak tek bir sayfa"""
+    id: int
+    name: str
+    url: str
+
+    def fetch(self, timeout: float = FETCH_TIMEOUT, deadline: float = None) -> Optional[Any]:
+        """
+        Ağ aşaması: sayfayı (EEE için detay sayfalarıyla) indir.
+        timeout istek başınadır; EEE detay sayfaları deadline'dan sonra başlatılmaz.
+        """
+        if self.id == EEE_SOURCE_ID:
+            return fetch_eee_page(self.url, timeout, deadline)
+        return fetch_akbis_page(self.url, timeout)
+
+    def parse(self, payload: Any) -> List[Announcement]:
+        """CPU aşaması: indirilen içerikten duyuruları çıkar"""
+        if self.id == EEE_SOURCE_ID:
+            return parse_eee_page(payload, self.url)
+        return parse_akbis_page_v2(payload, self.url, self.name)
+
+
+def build_sources(source_ids: set) -> List[Source]:
+    """Kaynak numaralarından taranacak sayfalar (hoca sırasıyla, EEE sonda)"""
+    sources = [
+        Source(i, page["name"], page["url"])
+        for i, page in enumerate(AKBIS_PAGES) if i in source_ids
+    ]
+    if EEE_SOURCE_ID in source_ids:
+        sources.append(Source(EEE_SOURCE_ID, EEE_PAGE["name"], EEE_PAGE["url"]))
+    return sources
+
+
+def prioritize_sources(sources: List[Source], states: Dict[int, dict], now: datetime = None) -> List[Source]:
+    """
+    Kaynakları bütçe kısıtlı çalıştırma için sırala:
+    1. Önceki çalıştırmada bütçe yetmediği için ertelenenler
+    2. EEE bölüm sayfası
+    3. Gecikmiş kaynaklar (SOURCE_OVERDUE_MINUTES'dan uzun süredir kontrol edilmeyen)
+    4. Son SOURCE_ACTIVE_DAYS içinde duyuru yayınlayanlar
+    5. Diğerleri
+    Her grup içinde en uzun süredir kontrol edilmeyen önce gelir.
+    """
+    now = now or datetime.now()
+
+    def age(value: Optional[str]) -> float:
+        if not value:
+            return float("inf")
+        return (now - datetime.fromisoformat(value)).total_seconds()
+
+    def key(source: Source):
+        state = states.get(source.id, {})
+        checked_age = age(state.get("last_checked_at"))
+        if state.get("deferred"):
+            tier = 0
+        elif source.id == EEE_SOURCE_ID:
+            tier = 1
+        elif checked_age > SOURCE_OVERDUE_MINUTES * 60:
+            tier = 2
+        elif age(state.get("last_new_at")) < SOURCE_ACTIVE_DAYS * 86400:
+            tier = 3
+        else:
+            tier = 4
+        return tier, -checked_age
+
+    return sorted(sources, key=key)
+
+
+def payload_size(payload: Any) -> int:
+    """İndirilen içeriğin yaklaşık boyutu (byte); EEE için liste + detay sayfaları"""
+    if payload is None:
+        return 0
+    if isinstance(payload, dict):
+        return payload_size(payload.get("list")) + sum(payload_size(html) for html in payload.get("details", {}).values())
+    return len(payload.encode("utf-8")) if isinstance(payload, str) else len(payload)
+
+
+def is_new(ann_hash: str, seen: set = None) -> bool:
+    """
+    Duyuru yeni mi?
+    seen verilmişse önce bellekteki kümeye bakılır; kümede olmayanlar
+    (örn. başka bir süreçte işaretlenenler) veritabanından doğrulanır.
+    """
+    if seen is None:
+        return not is_seen(ann_hash)
+    if ann_hash in seen:
+        return False
+    if is_seen(ann_hash):
+        seen.add(ann_hash)
+        return False
+    return True
+
+
+@dataclass
+class RunStats:
+    """Bir kontrolün sayaçları ve süreleri"""
+    sources: int = 0
+    fetched: int = 0
+    failed: int = 0        # indirilemeyen kaynak
+    parsed: int = 0        # ayrıştırılan duyuru
+    new: int = 0
+    duplicates: int = 0    # başka kaynaktaki kopyasıyla birleştirilen veya atlanan
+    edited: int = 0        # içeriği veya dosyaları değişen duyuru
+    removed: int = 0       # sayfadan kaldırılan duyuru
+    unchanged: int = 0     # duyuru listesi değişmeyen kaynak
+    messages: int = 0
+    sent: int = 0          # tüm abonelerine ulaşan duyuru
+    elapsed: float = 0.0
+    first_send: Optional[float] = None  # başlangıçtan ilk başarılı gönderime (saniye)
+    stage_busy: Dict[str, float] = field(default_factory=dict)  # aşama başına çalışma süresi
+    checked: Dict[int, float] = field(default_factory=dict)     # kaynak -> indirme süresi
+    source_new: Dict[int, int] = field(default_factory=dict)    # kaynak -> yeni duyuru sayısı
+    deferred: List[int] = field(default_factory=list)           # bütçe yetmediği için atlananlar
+    source_bytes: Dict[int, int] = field(default_factory=dict)  # kaynak -> indirilen byte
+    source_parsed: Dict[int, int] = field(default_factory=dict) # kaynak -> ayrıştırılan duyuru
+    source_parse: Dict[int, float] = field(default_factory=dict)  # kaynak -> ayrıştırma süresi
+    source_failed: List[int] = field(default_factory=list)     # indirilemeyen kaynaklar
+
+    def summary(self) -> str:
+        first = f"{self.first_send:.1f}s" if self.first_send is not None else "-"
+        stages = ", ".join(f"{name} {busy:.1f}s" for name, busy in self.stage_busy.items())
+        deferred = f", ertelenen {len(self.deferred)}" if self.deferred else ""
+        duplicates = f", kopya {self.duplicates}" if self.duplicates else ""
+        edited = f", düzenlenen {self.edited}" if self.edited else ""
+        return (
+            f"⏱️ {self.elapsed:.1f}s | kaynak {self.fetched}/{self.sources}{deferred} | "
+            f"duyuru {self.parsed}, yeni {self.new}{edited}{duplicates}, gönderilen {self.sent} | "
+            f"ilk bildirim {first} | {stages}"
+        )
+
+
+class Pipeline:
+    """
+    Eşzamanlı tarama/gönderim hattı.
+
+    - fetch: PIPELINE_FETCH_WORKERS thread sayfaları indirir. fetch_executor
+      verilirse bu havuzun kalıcı thread'leri kullanılır; thread başına HTTP
+      oturumları (scraper.get_session) çalıştırmalar arasında korunur (daemon modu)
+    - parse, dedupe, render: birer thread, aralarında sınırlı kuyruklar
+      (PARSE_WORKERS > 0 ise parse thread'i sayfaları süreç havuzuna dağıtır)
+    - send: TelegramSender (chat başına sıralı, limitlere uyumlu)
+
+    dedupe aşaması her kaynağın duyuru listesini kayıtlı görüntüsüyle
+    karşılaştırır (snapshots.py): değişmeyen kaynaklar duyuru başına sorgu
+    yapılmadan geçilir, düzenlenen duyurular için bildirim gönderilir.
+    Görüntüler render'dan sonra, sonda tek transaction'da kaydedilir.
+
+    dedupe aşaması ayrıca başka kaynaklarda yayınlanmış kopyaları bulur
+    (NEAR_DUPLICATE_MODE). Varsayılan "skip" modunda sonuçlar beklemeden
+    iletilir, sonraki kopyalar sadece ilk bildirimi almamış abonelere gider;
+    "merge" modunda yeni duyurular parse bitene kadar bekletilir ve kopyalar
+    tek bildirimde birleştirilir.
+
+    render aşaması mesajları outbox'a yazar (duyurular aynı transaction'da
+    görüldü işaretlenir) ve göndericiye verir. Göndericide aynı anda en fazla
+    send_window mesaj bekler; pencere doluysa render bir gönderim bitene kadar
+    bekler, böylece geri basınç gönderimden indirmeye kadar uzanır. Sonuçlar sonda tek
+    transaction'da outbox'a işlenir, başarısızlar sonraki çalıştırmada
+    tekrar denenir.
+
+    deadline verilirse (time.monotonic() zamanı), tahmini indirme süresi
+    deadline'a sığmayan kaynaklar başlatılmaz ve RunStats.deferred'e yazılır.
+    Başlamış indirmelerin zaman aşımı kalan süreyle sınırlanır; EEE detay
+    sayfaları deadline'dan sonra indirilmez.
+
+    Kullanım:
+        stats = Pipeline(index).run(build_sources(index.sources()))
+    """
+
+    def __init__(self, index: SubscriptionIndex, seen: set = None, sender: TelegramSender = None,
+                 fetch_workers: int = PIPELINE_FETCH_WORKERS, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 deadline: float = None, states: Dict[int, dict] = None, parse_pool: ParsePool = None,
+                 profiler: NullProfiler = NULL_PROFILER, fetch_executor: ThreadPoolExecutor = None,
+                 send_window: int = PIPELINE_SEND_WINDOW):
+        self.index = index
+        self.seen = seen
+        self.sender = sender
+        self.deadline = deadline
+        self.states = states or {}
+        self.fetch_workers = fetch_workers
+        self.queue_size = queue_size
+        self.parse_pool = parse_pool
+        self.profiler = profiler
+        self.fetch_executor = fetch_executor
+        self.send_window = send_window
+        self.send_slots = threading.Semaphore(send_window)  # göndericideki boş yerler
+        self.lock = threading.Lock()
+        self.stats = RunStats()
+        self.started = 0.0
+        self.queued = set()   # bu çalıştırmada kuyruğa alınan hash'ler
+        self.pending = []     # [(Delivery, Future)]
+        self.near = None      # NearDuplicateIndex (kapalıysa None)
+        self.held = []        # merge modunda bekletilen dedupe sonuçları
+        self.fingerprints = {}  # hash -> Fingerprint (indekse yazarken tekrar hesaplanmaz)
+        self.snapshots: Dict[int, Snapshot] = {}      # kayıtlı görüntüler
+        self.new_snapshots: Dict[int, Snapshot] = {}  # render'ı tamamlanan kaynakların yeni görüntüleri
+
+    def run(self, sources: List[Source]) -> RunStats:
+        """Kaynakları tara, yeni duyuruları gönder ve istatistikleri döndür"""
+        self.started = time.monotonic()
+        self.stats = RunStats(sources=len(sources))
+        self.queued, self.pending = set(), []
+        self.send_slots = threading.Semaphore(self.send_window)
+        self.near = NearDuplicateIndex() if NEAR_DUPLICATE_MODE != "off" else None
+        self.held, self.fingerprints = [], {}
+        with self.profiler.timer("sqlite.snapshots"):
+            self.snapshots = {
+                source_id: Snapshot.loads(section_hash, items)
+                for source_id, (section_hash, items) in get_source_snapshots().items()
+            }
+        self.new_snapshots = {}
+
+        own_sender = self.sender is None
+        if own_sender:
+            self.sender = TelegramSender()
+        pool = self.parse_pool or ParsePool()
+        # cProfile / tracemalloc işçi süreçleri göremez; açıksa bu thread'de ayrıştır
+        pooled = pool.enabled_for(len(sources)) and not self.profiler.traces_parse()
+
+        source_queue = queue.Queue()
+        for source in sources:
+            source_queue.put(source)
+        parse_queue = queue.Queue(self.queue_size)
+        dedupe_queue = queue.Queue(self.queue_size)
+        render_queue = queue.Queue(self.queue_size)
+
+        own_executor = self.fetch_executor is None
+        executor = self.fetch_executor or ThreadPoolExecutor(max_workers=self.fetch_workers,
+                                                             thread_name_prefix="pipeline-fetch")
+        stages = [
+            threading.Thread(target=self._stage, args=(name, in_queue, out_queue, func, flush),
+                             name=f"pipeline-{name}", daemon=True)
+            for name, in_queue, out_queue, func, flush in [
+                ("parse", parse_queue, dedupe_queue, self._parse, None),
+                ("dedupe", dedupe_queue, render_queue, self._dedupe, self._flush_dedupe),
+                ("render", render_queue, None, self._render, None),
+            ]
+        ]
+        if pooled:
+            stages[0] = threading.Thread(target=self._parse_pooled, args=(pool, parse_queue, dedupe_queue),
+                                         name="pipeline-parse", daemon=True)
+
+        try:
+            if pooled:
+                pool.start()
+            for thread in stages:
+                thread.start()
+            wait([
+                executor.submit(self._fetch_worker, source_queue, parse_queue)
+                for _ in range(max(1, min(self.fetch_workers, len(sources))))
+            ])
+            parse_queue.put(_DONE)
+            for thread in stages:
+                thread.join()
+
+            with self.profiler.timer("sqlite.snapshots"):
+                save_source_snapshots([
+                    (source_id, snapshot.section_hash, snapshot.dumps())
+                    for source_id, snapshot in self.new_snapshots.items()
+                ])
+            self._finish_sends()
+        finally:
+            if own_sender:
+                self.sender.close()
+                self.sender = None
+            if own_executor:
+                executor.shutdown()
+            if pooled and self.parse_pool is None:
+                pool.close()
+
+        self.stats.elapsed = time.monotonic() - self.started
+        return self.stats
+
+    def _busy(self, stage: str, seconds: float):
+        with self.lock:
+            self.stats.stage_busy[stage] = self.stats.stage_busy.get(stage, 0.0) + seconds
+
+    def _fetch_worker(self, source_queue: queue.Queue, parse_queue: queue.Queue):
+        """Kaynak kalmayana kadar sayfa indir; parse kuyruğu doluysa bekle"""
+        while True:
+            try:
+                source = source_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            if not self._fits(source):
+                print(f"⏭️ Deferred (budget): {source.name}")
+                with self.lock:
+                    self.stats.deferred.append(source.id)
+                continue
+
+            print(f"Checking: {source.name}")
+            started = time.perf_counter()
+            timeout = FETCH_TIMEOUT
+            if self.deadline is not None:
+                # Başlamış indirme de bütçeyi aşmasın
+                timeout = max(1.0, min(timeout, self.deadline - time.monotonic()))
+            try:
+                payload = source.fetch(timeout, self.deadline)
+            except Exception as e:
+                print(f"  ❌ Error: {e}")
+                payload = None
+            seconds = time.perf_counter() - started
+            self._busy("fetch", seconds)
+            self.profiler.source(source.id, source.name, "fetch", seconds)
+
+            with self.lock:
+                self.stats.checked[source.id] = seconds
+                if payload is None:
+                    self.stats.failed += 1
+                    self.stats.source_failed.append(source.id)
+                    continue
+                self.stats.fetched += 1
+                self.stats.source_bytes[source.id] = payload_size(payload)
+            parse_queue.put((source, payload))
+
+    def _fits(self, source: Source) -> bool:
+        """Kaynağın tahmini indirme süresi kalan bütçeye sığıyor mu?"""
+        if self.deadline is None:
+            return True
+        estimate = self.states.get(source.id, {}).get("fetch_seconds") or SOURCE_FETCH_ESTIMATE
+        return time.monotonic() + estimate <= self.deadline
+
+    def _stage(self, name: str, in_queue: queue.Queue, out_queue: Optional[queue.Queue], func, flush=None):
+        """
+        Girdi kuyruğunu işle; hata tek öğeyi etkiler, hattı durdurmaz.
+        flush verilirse girdi bittiğinde döndürdüğü öğeler de iletilir.
+        """
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                if flush is not None:
+                    started = time.perf_counter()
+                    try:
+                        results = flush()
+                    except Exception as e:
+                        print(f"  ❌ Error in {name}: {e}")
+                        results = []
+                    self._busy(name, time.perf_counter() - started)
+                    for result in results:
+                        out_queue.put(result)
+                if out_queue is not None:
+                    out_queue.put(_DONE)
+                return
+
+            started = time.perf_counter()
+            try:
+                result = func(item)
+            except Exception as e:
+                print(f"  ❌ Error in {name}: {e}")
+                result = None
+            self._busy(name, time.perf_counter() - started)
+
+            if result is not None and out_queue is not None:
+                out_queue.put(result)
+
+    def _parse(self, item):
+        source, payload = item
+        started = time.perf_counter()
+        with self.profiler.parse_section():
+            announcements = source.parse(payload)
+        self._record_parse(source, announcements, time.perf_counter() - started)
+        return source, announcements
+
+    def _record_parse(self, source: Source, announcements: List[Announcement], seconds: float):
+        """Kaynağın ayrıştırma süresini ve duyuru sayısını kaydet"""
+        self.profiler.source(source.id, source.name, "parse", seconds)
+        self.stats.source_parse[source.id] = seconds
+        self.stats.source_parsed[source.id] = len(announcements)
+        self.stats.parsed += len(announcements)
+
+    def _parse_pooled(self, pool: ParsePool, in_queue: queue.Queue, out_queue: queue.Queue):
+        """
+        parse aşamasının süreç havuzlu hali: kuyrukta bekleyen sayfalar
+        chunk_size'lık parçalar halinde havuza gönderilir, aynı anda en fazla
+        işçi sayısı kadar parça işlenir. Sonuçlar gönderim sırasıyla iletilir.
+        """
+        in_flight = deque()  # [(kaynaklar, sayfalar, Future)]
+        done = False
+        while True:
+            # Havuz doluysa, girdi bittiyse veya en eski parça hazırsa sonucu ilet
+            if in_flight and (done or len(in_flight) >= pool.workers or in_flight[0][2].done()):
+                self._emit_parsed(*in_flight.popleft(), out_queue)
+                continue
+            if done:
+                break
+
+            try:
+                item = in_queue.get(timeout=0.05 if in_flight else None)
+            except queue.Empty:
+                continue
+
+            chunk = []
+            while item is not _DONE:
+                chunk.append(item)
+                if len(chunk) >= pool.chunk_size:
+                    break
+                try:
+                    item = in_queue.get_nowait()
+                except queue.Empty:
+                    break
+            done = item is _DONE
+
+            if chunk:
+                started = time.perf_counter()
+                sources = [source for source, _ in chunk]
+                pages = [(source.id, source.name, source.url, payload) for source, payload in chunk]
+                in_flight.append((sources, pages, pool.submit(pages)))
+                self._busy("parse", time.perf_counter() - started)
+
+        out_queue.put(_DONE)
+
+    def _emit_parsed(self, sources: List[Source], pages: list, future, out_queue: queue.Queue):
+        """
+        Havuzdaki parçanın sonucunu bekle ve dedupe aşamasına ilet.
+        Süreler işçide sayfa başına ölçülür (havuz kuyruğunda bekleme hariç)
+        ve thread içi ayrıştırmadaki gibi kaydedilir.
+        """
+        started = time.perf_counter()
+        try:
+            with self.profiler.timer("parse.pool_wait"):
+                results = ParsePool.result(future)
+        except Exception as e:
+            # Havuz çökerse (ör. işçi süreç öldürüldü) parça burada ayrıştırılır
+            print(f"  ❌ Error in parse pool: {e}")
+            with self.profiler.parse_section():
+                results = parse_timed(pages)
+        for source, (announcements, seconds) in zip(sources, results):
+            self._record_parse(source, announcements, seconds)
+        self._busy("parse", time.perf_counter() - started)
+
+        for source, (announcements, _) in zip(sources, results):
+            out_queue.put((source, announcements))
+
+    def _dedupe(self, item):
+        """
+        Kaynağın duyuru listesini kayıtlı görüntüsüyle karşılaştır ve
+        görülmemiş ve düzenlenmiş duyuruları ayıkla. Sadece görüntüde
+        olmayan duyurular için görüldü kontrolü yapılır (görüntüsü olmayan
+        kaynaklarda tüm duyurular).
+
+        Returns:
+            (kaynak, yeni ve düzenlenen duyurular, sadece görüldü işaretlenecek
+            kopyalar, yeni görüntü); liste değişmediyse veya merge modunda None
+            (sonuçlar _flush_dedupe ile iletilir)
+        """
+        source, announcements = item
+        diff = diff_snapshot(self.snapshots.get(source.id), announcements)
+        if diff.unchanged:
+            with self.lock:
+                self.stats.unchanged += 1
+            return None
+
+        new, skipped = [], []
+        for ann in diff.new:
+            ann_hash = ann.get_hash()
+            if ann_hash in self.queued or not is_new(ann_hash, self.seen):
+                continue
+            self.queued.add(ann_hash)
+
+            match = self._near_duplicate(ann) if self.near is not None else None
+            if match == "merged":
+                continue
+            if match == "skipped":
+                skipped.append(ann)
+                continue
+            new.append(ann)
+            print(f"  ➕ New: {ann.title[:50]}...")
+
+        for ann in diff.edited:
+            if ann.get_hash() in self.queued:
+                continue
+            self.queued.add(ann.get_hash())
+            new.append(ann)
+            print(f"  ✏️ Edited: {ann.title[:50]}...")
+        if diff.removed:
+            print(f"  ➖ Removed: {len(diff.removed)} duyuru ({source.name})")
+        with self.lock:
+            self.stats.removed += len(diff.removed)
+
+        result = (source, new, skipped, diff.snapshot)
+        if NEAR_DUPLICATE_MODE == "merge":
+            self.held.append(result)
+            return None
+        return result
+
+    def _near_duplicate(self, ann: Announcement) -> Optional[str]:
+        """
+        Başka bir kaynaktaki benzer duyuruyu ara.
+        Kopyası daha önce (veya skip modunda bu çalıştırmada) gönderildiyse
+        duyuru sadece o gönderimin ulaşmadığı abonelere gider: ann.notified
+        zaten bildirim alan chatlere ayarlanır.
+
+        Returns:
+            "merged": bu çalıştırmadaki kopyanın duplicates listesine eklendi,
+            "skipped": kopyası bu kaynağın tüm abonelerine zaten gönderildi,
+            None: gönderilecek (benzeri yoksa indekse eklendi)
+        """
+        with self.profiler.timer("dedupe.near_duplicates"):
+            value = fingerprint(ann)
+            if value is None:
+                # Kısa ve genel duyurular ("Ders İptali") eşleştirilmez
+                return None
+            primaries, sent_sources = self.near.find(ann, value)
+        self.fingerprints[ann.get_hash()] = value
+
+        if primaries and NEAR_DUPLICATE_MODE == "merge":
+            primary = primaries[0]
+            primary.duplicates.append(ann)
+            print(f"  🔁 Merged: {ann.title[:50]}... ({primary.author})")
+            return "merged"
+
+        self.near.add(ann, value)
+        if not primaries and not sent_sources:
+            return None
+
+        for primary in primaries:
+            sent_sources |= {source_id_for(member) for member in [primary, *primary.duplicates]}
+        notified = frozenset().union(*(self.index.chats_for(source_id) for source_id in sent_sources))
+        if self.index.chats_for(source_id_for(ann)) <= notified:
+            print(f"  🔁 Already sent from another source: {ann.title[:50]}...")
+            return "skipped"
+        ann.notified = notified
+        print(f"  🔁 Sent before from another source, notifying remaining subscribers: {ann.title[:50]}...")
+        return None
+
+    def _flush_dedupe(self) -> list:
+        """merge modunda bekletilen sonuçları (kopyalar birleştirilmiş) ilet"""
+        held, self.held = self.held, []
+        return held
+
+    def _render(self, item):
+        source, announcements, skipped, snapshot = item
+        # Birleştirilen ve atlanan kopyalar da görüldü işaretlenir
+        members = [member for ann in announcements for member in [ann, *ann.duplicates]] + skipped
+        deliveries = []
+        if members:
+            with self.profiler.timer("render.build_deliveries"):
+                deliveries = build_deliveries(announcements, self.index)
+            with self.profiler.timer("sqlite.queue_deliveries"):
+                queue_deliveries(deliveries, members)
+            if self.near is not None:
+                with self.profiler.timer("sqlite.simhash_index"):
+                    record_fingerprints(members, self.fingerprints)
+            if self.seen is not None:
+                self.seen.update(ann.get_hash() for ann in members)
+        # Görüntü ancak duyurular kuyruğa alındıktan sonra kaydedilir
+        self.new_snapshots[source.id] = snapshot
+
+        edited = sum(1 for ann in announcements if ann.revision)
+        self.stats.new += len(announcements) - edited
+        self.stats.edited += edited
+        self.stats.duplicates += len(members) - len(announcements)
+        self.stats.messages += len(deliveries)
+        self.stats.source_new[source.id] = self.stats.source_new.get(source.id, 0) + len(announcements) - edited
+
+        for delivery in deliveries:
+            with self.profiler.timer("render.send_wait"):
+                self.send_slots.acquire()
+            future = self.sender.submit(delivery.chat_id, delivery.text, files=delivery.files)
+            future.add_done_callback(self._on_sent)
+            self.pending.append((delivery, future))
+
+    def _on_sent(self, future):
+        self.send_slots.release()
+        if future.result() and self.stats.first_send is None:
+            self.stats.first_send = time.monotonic() - self.started
+
+    def _finish_sends(self):
+        """Gönderimlerin bitmesini bekle, sonuçları outbox'a işle ve say"""
+        with self.profiler.timer("send.wait"):
+            results = [(d.key, d.chat_id, 0, future.result()) for d, future in self.pending]
+        if results:
+            with self.profiler.timer("sqlite.outbox_results"):
+                update_outbox_results(results)
+
+        # Duyuru hash'i -> tüm mesajları başarılı mı
+        delivered = {}
+        announcements = {}
+        for (delivery, _), (*_, ok) in zip(self.pending, results):
+            for ann in delivery.announcements:
+                announcements[ann.get_hash()] = ann
+                delivered[ann.get_hash()] = delivered.get(ann.get_hash(), True) and ok
+
+        for ann_hash, ann in announcements.items():
+            if delivered[ann_hash]:
+                self.stats.sent += 1
+                print(f"✅ Sent: {ann.title[:50]}...")
+            else:
+                print(f"⏳ Queued for retry: {ann.title[:50]}...")
+
+        if results:
+            failed = sum(1 for *_, ok in results if not ok)
+            print(f"📨 {len(results)} mesaj gönderildi" + (f", {failed} tekrar denenecek" if failed else ""))
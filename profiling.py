@@ -0,0 +1,266 @@
+"""
+AKBIS Telegram Bot - Çalıştırma Profili (main.py --profile)
+Bir kontrolün süresinin nereye gittiğini ölçer:
+- Bölümler: outbox, indeks, pipeline aşamaları, SQLite yazımları
+- Kaynaklar: sayfa başına indirme ve ayrıştırma süresi
+- HTTP: host başına bağlantı kurma (DNS + TCP + TLS), ilk yanıt
+  (sunucu) ve toplam süre; AKBIS ve Telegram ayrı görünür
+- İsteğe bağlı: parse aşaması için cProfile ve tracemalloc
+
+Sonuç JSON rapor olarak yazılır ve kısa bir özet yazdırılır.
+Profil kapalıyken kod NULL_PROFILER kullanır (ölçüm yapılmaz).
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+import urllib3.connection
+
+
+class NullProfiler:
+    """Profil kapalıyken kullanılan, hiçbir şey yapmayan profiler"""
+
+    @contextmanager
+    def timer(self, name: str):
+        yield
+
+    @contextmanager
+    def parse_section(self):
+        yield
+
+    def traces_parse(self) -> bool:
+        """parse_section cProfile veya tracemalloc ile ölçüm yapıyor mu?"""
+        return False
+
+    def source(self, source_id: int, name: str, key: str, seconds: float):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class RunProfiler(NullProfiler):
+    """
+    Kontrol çalıştırması için zamanlayıcılar ve HTTP ölçümleri.
+
+    Kullanım:
+        profiler = RunProfiler(cprofile=True)
+        with profiler:
+            run_check(profiler=profiler)
+        profiler.write("profile.json")
+        print(profiler.summary())
+    """
+
+    def __init__(self, cprofile: bool = False, memory: bool = False, top: int = 10):
+        self.top = top
+        self.lock = threading.Lock()
+        self.sections: Dict[str, dict] = {}
+        self.sources: Dict[int, dict] = {}
+        self.hosts: Dict[str, dict] = {}
+        self.started_at = None
+        self.elapsed = 0.0
+        self.profile = cProfile.Profile() if cprofile else None
+        self.memory = memory
+        self.memory_before = None
+        self.memory_after = None
+        self._patched = []
+
+    # ---- zamanlayıcılar ----
+
+    def _add(self, table: dict, key, field: str, seconds: float):
+        with self.lock:
+            entry = table.setdefault(key, {})
+            entry[field] = entry.get(field, 0.0) + seconds
+            entry[f"{field}_count"] = entry.get(f"{field}_count", 0) + 1
+
+    @contextmanager
+    def timer(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(self.sections, name, "seconds", time.perf_counter() - started)
+
+    def source(self, source_id: int, name: str, key: str, seconds: float):
+        self._add(self.sources, source_id, key, seconds)
+        self.sources[source_id]["name"] = name
+
+    @contextmanager
+    def parse_section(self):
+        """
+        parse aşamasının bir öğesi etrafında cProfile / tracemalloc.
+        cProfile sadece çağıran thread'i ölçer; parse tek thread'de çalışır.
+        Bellek farkı ilk parse öğesinden son parse öğesine kadardır (aynı
+        sürede diğer thread'lerin ayırmaları da dahildir).
+        """
+        if self.memory and self.memory_before is None:
+            self.memory_before = tracemalloc.take_snapshot()
+        if self.profile is not None:
+            self.profile.enable()
+        try:
+            yield
+        finally:
+            if self.profile is not None:
+                self.profile.disable()
+            if self.memory:
+                self.memory_after = tracemalloc.take_snapshot()
+
+    def traces_parse(self) -> bool:
+        # Süreç havuzundaki ayrıştırma bu ölçümlere girmez
+        return self.profile is not None or self.memory
+
+    # ---- HTTP ölçümleri ----
+
+    def __enter__(self):
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._install()
+        if self.memory:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.memory:
+            tracemalloc.stop()
+        self._uninstall()
+        self.elapsed = time.perf_counter() - self._started
+
+    def _patch(self, owner, name: str, wrapper):
+        original = owner.__dict__[name]
+        self._patched.append((owner, name, original))
+        setattr(owner, name, wrapper(original))
+
+    def _install(self):
+        profiler = self
+
+        def timed_connect(original):
+            def connect(conn):
+                started = time.perf_counter()
+                try:
+                    return original(conn)
+                finally:
+                    profiler._add(profiler.hosts, conn.host, "connect", time.perf_counter() - started)
+            return connect
+
+        def timed_send(original):
+            def send(session, request, **kwargs):
+                started = time.perf_counter()
+                host = urlsplit(request.url).hostname or ""
+                try:
+                    response = original(session, request, **kwargs)
+                except Exception:
+                    profiler._add(profiler.hosts, host, "failed", time.perf_counter() - started)
+                    raise
+                # response.elapsed: istek gönderiminden yanıt başlıklarına kadar
+                profiler._add(profiler.hosts, host, "first_byte", response.elapsed.total_seconds())
+                profiler._add(profiler.hosts, host, "total", time.perf_counter() - started)
+                return response
+            return send
+
+        for cls in (urllib3.connection.HTTPConnection, urllib3.connection.HTTPSConnection):
+            self._patch(cls, "connect", timed_connect)
+        self._patch(requests.Session, "send", timed_send)
+
+    def _uninstall(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    # ---- rapor ----
+
+    def _functions(self) -> list:
+        if self.profile is None:
+            return []
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({"function": f"{filename}:{line}({function})", "calls": calls,
+                         "tottime": round(tottime, 4), "cumtime": round(cumtime, 4)})
+        rows.sort(key=lambda r: r["tottime"], reverse=True)
+        return rows[:self.top * 3]
+
+    def _allocations(self) -> list:
+        if self.memory_before is None or self.memory_after is None:
+            return []
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = self.memory_after.filter_traces(ignore).compare_to(self.memory_before.filter_traces(ignore), "lineno")
+        return [
+            {"location": str(stat.traceback[0]), "size_kb": round(stat.size_diff / 1024, 1), "count": stat.count_diff}
+            for stat in diff[:self.top * 3]
+        ]
+
+    def report(self, stats=None) -> dict:
+        """Makine tarafından okunabilir rapor (RunStats verilirse dahil edilir)"""
+        report = {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "elapsed": round(self.elapsed, 3),
+            "sections": self.sections,
+            "sources": {str(k): v for k, v in self.sources.items()},
+            "http": self.hosts,
+            "functions": self._functions(),
+            "allocations": self._allocations(),
+        }
+        if stats is not None:
+            report["run"] = {
+                "sources": stats.sources, "fetched": stats.fetched, "failed": stats.failed,
+                "parsed": stats.parsed, "new": stats.new, "messages": stats.messages,
+                "sent": stats.sent, "elapsed": round(stats.elapsed, 3),
+                "first_send": stats.first_send, "stage_busy": stats.stage_busy,
+                "deferred": stats.deferred,
+            }
+        return report
+
+    def write(self, path: str, stats=None) -> dict:
+        report = self.report(stats)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        return report
+
+    def summary(self) -> str:
+        """İnsan için kısa özet: bölümler, en yavaş kaynaklar, hostlar, fonksiyonlar"""
+        lines = [f"🔬 Profil ({self.elapsed:.1f}s)"]
+
+        lines.append("\nBölümler:")
+        for name, entry in sorted(self.sections.items(), key=lambda kv: -kv[1]["seconds"]):
+            lines.append(f"  {name:<28} {entry['seconds']:>7.2f}s  x{entry['seconds_count']}")
+
+        slowest = sorted(self.sources.values(), key=lambda s: -(s.get("fetch", 0) + s.get("parse", 0)))
+        if slowest:
+            lines.append("\nEn yavaş kaynaklar (indirme / ayrıştırma):")
+            for entry in slowest[:self.top]:
+                lines.append(f"  {entry['name'][:40]:<40} {entry.get('fetch', 0):>6.2f}s / {entry.get('parse', 0):.3f}s")
+
+        if self.hosts:
+            lines.append("\nHTTP (istek, bağlantı kurma, ort. ilk yanıt, toplam):")
+            for host, entry in sorted(self.hosts.items(), key=lambda kv: -kv[1].get("total", 0)):
+                requests_count = entry.get("total_count", 0)
+                first_byte = entry.get("first_byte", 0) / requests_count if requests_count else 0
+                failed = f", {entry['failed_count']} hata" if entry.get("failed_count") else ""
+                lines.append(
+                    f"  {host:<28} {requests_count:>4} istek, {entry.get('connect_count', 0)} bağlantı "
+                    f"{entry.get('connect', 0):.2f}s, ilk yanıt {first_byte * 1000:.0f}ms, "
+                    f"toplam {entry.get('total', 0):.2f}s{failed}"
+                )
+
+        functions = self._functions()[:self.top]
+        if functions:
+            lines.append("\nParse: en çok süre harcayan fonksiyonlar (tottime):")
+            for row in functions:
+                lines.append(f"  {row['tottime']:>7.3f}s {row['calls']:>7}  {row['function'][-70:]}")
+
+        allocations = self._allocations()[:self.top]
+        if allocations:
+            lines.append("\nBellek: en çok büyüyen ayırmalar:")
+            for row in allocations:
+                lines.append(f"  {row['size_kb']:>9.1f}KB  {row['location'][-70:]}")
+
+        return "\n".join(lines)
@@ -2,22 +2,51 @@
 AKBIS Telegram Bot - Web Scraping Modülü
 """
 import requests
+import threading
+import time
 from bs4 import BeautifulSoup
 import re
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import List, Dict, FrozenSet, Optional
+from dataclasses import dataclass, field
 import hashlib
 
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """
+    Thread başına tekrar kullanılan HTTP oturumu.
+    Daemon modunda indirme thread'leri Checker'ın kalıcı havuzundadır; sayfalar
+    her kontrolde aynı keep-alive bağlantılarla çekilir.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
+
 @dataclass
 class Announcement:
     """Duyuru veri yapısı"""
     date: str
     title: str
-    content: str
+    content: Optional[str]  # detay sayfası indirilemediyse None (içerik bilinmiyor)
     files: List[Dict[str, str]]  # [{"name": "dosya.pdf", "url": "..."}]
     source_url: str
     author: str
+    # Diğer kaynaklardaki benzer kopyalar (near_duplicates); bildirimde listelenir
+    duplicates: List["Announcement"] = field(default_factory=list)
+    # Düzenlenen duyurularda yeni içerik özeti (snapshots); yeni duyurularda boş
+    revision: str = ""
+    # Benzer kopyası başka bir kaynaktan zaten gönderilmiş chatler (near_duplicates);
+    # bunlara tekrar gönderilmez
+    notified: FrozenSet[str] = frozenset()
     
     def get_hash(self) -> str:
         """Duyuru için benzersiz hash oluştur"""
@@ -42,7 +71,7 @@ def scrape_akbis_page(url: str, author_name: str) -> List[Announcement]:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         }
-        response = requests.get(url, headers=headers, timeout=30)
+        response = get_session().get(url, headers=headers, timeout=30)
         response.raise_for_status()
         response.encoding = 'utf-8'
         
@@ -126,9 +155,31 @@ def scrape_akbis_page(url: str, author_name: str) -> List[Announcement]:
     return announcements
 
 
-def scrape_akbis_page_v2(url: str, author_name: str) -> List[Announcement]:
+def fetch_page(url: str, timeout: float = 30) -> str:
     """
-    AKBIS akademisyen sayfasından duyuruları çeker.
+    Sayfayı indir.
+    
+    Raises:
+        requests.RequestException: Sayfa indirilemezse
+    """
+    response = get_session().get(url, headers=HEADERS, timeout=timeout)
+    response.raise_for_status()
+    response.encoding = 'utf-8'
+    return response.text
+
+
+def fetch_akbis_page(url: str, timeout: float = 30) -> Optional[str]:
+    """AKBIS sayfasının HTML'i (indirilemezse None)"""
+    try:
+        return fetch_page(url, timeout)
+    except requests.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+
+def parse_akbis_page_v2(html: str, url: str, author_name: str) -> List[Announcement]:
+    """
+    AKBIS akademisyen sayfasının HTML'inden duyuruları çıkarır.
     HTML yapısı:
     - button.btn-link.text-left: Başlık (tarih + title)
     - span.badge: Tarih (DD.MM.YYYY)
@@ -138,14 +189,7 @@ def scrape_akbis_page_v2(url: str, author_name: str) -> List[Announcement]:
     announcements = []
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser')
         
         # Duyuru başlık butonlarını bul
         title_buttons = soup.find_all('button', class_=lambda c: c and 'btn-link' in c and 'text-left' in c)
@@ -205,68 +249,118 @@ def scrape_akbis_page_v2(url: str, author_name: str) -> List[Announcement]:
                 print(f"Error parsing announcement: {e}")
                 continue
         
-    except requests.RequestException as e:
-        print(f"Error fetching {url}: {e}")
     except Exception as e:
         print(f"Error parsing {url}: {e}")
     
     return announcements
 
 
-def scrape_eee_page(base_url: str = "https://eee.gaziantep.edu.tr") -> List[Announcement]:
+def scrape_akbis_page_v2(url: str, author_name: str) -> List[Announcement]:
+    """AKBIS akademisyen sayfasından duyuruları çeker (indir + ayrıştır)"""
+    html = fetch_akbis_page(url)
+    if html is None:
+        return []
+    return parse_akbis_page_v2(html, url, author_name)
+
+
+def parse_eee_links(html: str, base_url: str) -> List[tuple]:
     """
-    EEE Bölüm sayfasından duyuruları çeker.
+    EEE duyuru listesindeki son 20 duyuru.
     
     Returns:
-        Duyuru listesi
+        [(tarih, başlık, detay_url)] listesi
     """
-    announcements = []
-    announcements_url = f"{base_url}/duyurular.php"
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
     
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(announcements_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
+    # Duyuru listesi sayfasındaki her duyuru linkini bul
+    # Format: [Tarih Başlık](duyuru.php?id=XXX)
+    announcement_links = soup.find_all('a', href=re.compile(r'duyuru\.php\?id=\d+'))
+    
+    for link in announcement_links[:20]:  # Son 20 duyuru
+        href = link.get('href', '')
+        text = link.get_text(strip=True)
         
-        # Duyuru listesi sayfasındaki her duyuru linkini bul
-        # Format: [Tarih Başlık](duyuru.php?id=XXX)
-        announcement_links = soup.find_all('a', href=re.compile(r'duyuru\.php\?id=\d+'))
+        # Tarih ve başlığı ayır
+        date_match = re.match(r'(\d{1,2}\s+\w+\s+\d{4})(.*)', text)
+        if date_match:
+            date = date_match.group(1).strip()
+            title = date_match.group(2).strip()
+        else:
+            # Alternatif format: tarihi parent elementten al
+            parent = link.find_parent()
+            date_elem = parent.find(class_=re.compile(r'date|tarih', re.I)) if parent else None
+            date = date_elem.get_text(strip=True) if date_elem else ""
+            title = text
         
-        for link in announcement_links[:20]:  # Son 20 duyuru
-            href = link.get('href', '')
-            text = link.get_text(strip=True)
-            
-            # Tarih ve başlığı ayır
-            date_match = re.match(r'(\d{1,2}\s+\w+\s+\d{4})(.*)', text)
-            if date_match:
-                date = date_match.group(1).strip()
-                title = date_match.group(2).strip()
-            else:
-                # Alternatif format: tarihi parent elementten al
-                parent = link.find_parent()
-                date_elem = parent.find(class_=re.compile(r'date|tarih', re.I)) if parent else None
-                date = date_elem.get_text(strip=True) if date_elem else ""
-                title = text
-            
-            # Detay sayfasını çek
-            detail_url = f"{base_url}/{href}" if not href.startswith('http') else href
-            
+        detail_url = f"{base_url}/{href}" if not href.startswith('http') else href
+        links.append((date, title, detail_url))
+    
+    return links
+
+
+def fetch_eee_page(base_url: str = "https://eee.gaziantep.edu.tr", timeout: float = 30,
+                   deadline: float = None) -> Optional[dict]:
+    """
+    EEE duyuru listesini ve detay sayfalarını indir.
+    deadline (time.monotonic() zamanı) verilirse her isteğin zaman aşımı kalan
+    süreyle sınırlanır ve deadline geçtikten sonra detay sayfası indirilmez
+    (duyurunun içeriği bu çalıştırmada bilinmez).
+    
+    Returns:
+        {"list": liste HTML'i, "details": {detay_url: HTML veya None}};
+        liste indirilemezse None
+    """
+    announcements_url = f"{base_url}/duyurular.php"
+    
+    def limit() -> float:
+        return timeout if deadline is None else max(0.1, min(timeout, deadline - time.monotonic()))
+    
+    try:
+        list_html = fetch_page(announcements_url, limit())
+    except requests.RequestException as e:
+        print(f"Error fetching EEE announcements: {e}")
+        return None
+    
+    details = {}
+    try:
+        for _, _, detail_url in parse_eee_links(list_html, base_url):
+            if deadline is not None and time.monotonic() >= deadline:
+                print(f"⏭️ Deadline: EEE detay sayfası atlandı {detail_url}")
+                details[detail_url] = None
+                continue
             try:
-                detail_response = requests.get(detail_url, headers=headers, timeout=30)
-                detail_response.encoding = 'utf-8'
-                detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
+                details[detail_url] = fetch_page(detail_url, limit())
+            except Exception as e:
+                print(f"Error fetching detail page {detail_url}: {e}")
+                details[detail_url] = None
+    except Exception as e:
+        print(f"Error parsing EEE page: {e}")
+    
+    return {"list": list_html, "details": details}
+
+
+def parse_eee_page(pages: dict, base_url: str = "https://eee.gaziantep.edu.tr") -> List[Announcement]:
+    """
+    fetch_eee_page çıktısından duyuruları çıkarır.
+    Detay sayfası çekilemeyen duyurular content=None ile eklenir; içerik
+    boş sayılmaz, böylece geçici hatalar düzenleme olarak algılanmaz.
+    """
+    announcements = []
+    
+    try:
+        for date, title, detail_url in parse_eee_links(pages["list"], base_url):
+            detail_html = pages["details"].get(detail_url)
+            content, files = None, []
+            
+            if detail_html is not None:
+                detail_soup = BeautifulSoup(detail_html, 'html.parser')
                 
                 # İçeriği bul
                 content_div = detail_soup.find('div', class_=re.compile(r'content|icerik|duyuru', re.I))
                 content = content_div.get_text(separator="\n", strip=True) if content_div else ""
                 
                 # Dosyaları bul
-                files = []
                 for a in detail_soup.find_all('a', href=True):
                     ahref = a.get('href', '')
                     if any(ahref.endswith(ext) for ext in ['.pdf', '.doc', '.docx', '.pptx', '.xlsx']):
@@ -274,36 +368,35 @@ def scrape_eee_page(base_url: str = "https://eee.gaziantep.edu.tr") -> List[Anno
                         if not ahref.startswith('http'):
                             ahref = f"{base_url}/{ahref}"
                         files.append({"name": file_name, "url": ahref})
-                
-                announcements.append(Announcement(
-                    date=date,
-                    title=title,
-                    content=content[:500],  # İlk 500 karakter
-                    files=files,
-                    source_url=detail_url,
-                    author="EEE Bölümü"
-                ))
-                
-            except Exception as e:
-                print(f"Error fetching detail page {detail_url}: {e}")
-                # Detay sayfası çekilemese bile ana bilgiyi ekle
-                announcements.append(Announcement(
-                    date=date,
-                    title=title,
-                    content="",
-                    files=[],
-                    source_url=detail_url,
-                    author="EEE Bölümü"
-                ))
+            
+            announcements.append(Announcement(
+                date=date,
+                title=title,
+                content=content[:500] if content is not None else None,  # İlk 500 karakter
+                files=files,
+                source_url=detail_url,
+                author="EEE Bölümü"
+            ))
     
-    except requests.RequestException as e:
-        print(f"Error fetching EEE announcements: {e}")
     except Exception as e:
         print(f"Error parsing EEE page: {e}")
     
     return announcements
 
 
+def scrape_eee_page(base_url: str = "https://eee.gaziantep.edu.tr") -> List[Announcement]:
+    """
+    EEE Bölüm sayfasından duyuruları çeker (indir + ayrıştır).
+    
+    Returns:
+        Duyuru listesi
+    """
+    pages = fetch_eee_page(base_url)
+    if pages is None:
+        return []
+    return parse_eee_page(pages, base_url)
+
+
 if __name__ == "__main__":
     # Test
     print("Testing AKBIS scraper...")
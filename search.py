@@ -0,0 +1,138 @@
+"""
+AKBIS Telegram Bot - Duyuru Arama Sorgusu ve Sonuç Mesajı
+database.py (admin bot) ve api/webhook.py aynı FTS5 sorgusunu ve aynı mesaj
+biçimini buradan kullanır. Webhook cold start'ını etkilememesi için sadece
+standart kütüphane kullanılır; sqlite3 bağlantısı çağırandan gelir.
+"""
+
+_COUNT_SQL = "SELECT COUNT(*) FROM announcement_index WHERE announcement_index MATCH ?"
+
+# snippet işaretçileri kontrol karakterleri; HTML escape sonrası <b> ile değiştirilir
+_PAGE_SQL = """
+    SELECT hash, author, title, date, url,
+           snippet(announcement_index, 3, char(2), char(3), '…', 16)
+    FROM announcement_index
+    WHERE announcement_index MATCH ?
+    ORDER BY bm25(announcement_index, 0.0, 2.0, 5.0, 1.0, 1.5)
+    LIMIT ? OFFSET ?
+"""
+
+
+def build_search_query(text: str) -> str:
+    """
+    Kullanıcı girdisini güvenli bir FTS5 sorgusuna dönüştür.
+    Her kelime tırnak içine alınır (FTS5 operatörleri etkisiz kalır) ve
+    Türkçe ekler için önek araması yapılır: "vize" -> "vize"* (vizeler, vizesi...)
+
+    Args:
+        text: Kullanıcının yazdığı arama ifadesi
+
+    Returns:
+        FTS5 MATCH ifadesi (boş girdi için boş string)
+    """
+    terms = [t for t in text.split() if t.strip('"')]
+    return " ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+
+
+def page_count(total: int, page_size: int) -> int:
+    return (total + page_size - 1) // page_size
+
+
+def parse_search_args(args: list) -> tuple:
+    """
+    /search argümanlarını (sorgu, sayfa) olarak ayır.
+    Son argüman "#3" biçimindeyse sayfa numarası olarak kullanılır.
+    """
+    page = 1
+    if len(args) > 1 and args[-1].startswith("#") and args[-1][1:].isdigit():
+        page = max(1, int(args[-1][1:]))
+        args = args[:-1]
+    return " ".join(args), page
+
+
+def run_search(conn, text: str, page: int, page_size: int) -> dict:
+    """
+    Duyuru arşivinde tam metin arama yap.
+    Sonuçlar BM25 ile sıralanır; başlık eşleşmeleri içerikten daha ağırdır.
+    Son sayfadan büyük sayfa istenirse son sayfa döner.
+    sqlite3 hataları çağırana bırakılır.
+
+    Args:
+        conn: announcement_index tablosunu içeren sqlite3 bağlantısı
+        text: Arama ifadesi (ör. "vize tarihi")
+        page: İstenen sayfa (1'den başlar)
+        page_size: Sayfa başına sonuç sayısı
+
+    Returns:
+        {"total", "page", "results": [{"hash", "author", "title", "date", "url", "snippet"}]}
+    """
+    query = build_search_query(text)
+    if not query:
+        return {"total": 0, "page": 1, "results": []}
+
+    cursor = conn.cursor()
+    cursor.execute(_COUNT_SQL, (query,))
+    total = cursor.fetchone()[0]
+    page = max(1, min(page, page_count(total, page_size)))
+
+    cursor.execute(_PAGE_SQL, (query, page_size, (page - 1) * page_size))
+    return {
+        "total": total,
+        "page": page,
+        "results": [
+            {"hash": r[0], "author": r[1], "title": r[2], "date": r[3], "url": r[4], "snippet": r[5]}
+            for r in cursor.fetchall()
+        ]
+    }
+
+
+def escape_html(text: str) -> str:
+    """HTML özel karakterlerini escape et"""
+    if not text:
+        return ""
+    return (text
+            .replace("&", "&amp;")
+            .replace("<", "&lt;")
+            .replace(">", "&gt;"))
+
+
+def format_search_results(query: str, result: dict, page_size: int) -> str:
+    """
+    Arama sonuçlarını Telegram mesaj formatına dönüştür.
+
+    Args:
+        query: Kullanıcının arama ifadesi
+        result: run_search() çıktısı (gösterilen sayfa result["page"])
+        page_size: Sayfa başına sonuç sayısı
+
+    Returns:
+        Formatlanmış mesaj metni
+    """
+    total = result.get("total", 0)
+    if total == 0:
+        return f"🔍 <b>{escape_html(query)}</b> için sonuç bulunamadı."
+
+    page = result.get("page", 1)
+    pages = page_count(total, page_size)
+    message_parts = [
+        f"🔍 <b>{escape_html(query)}</b> - {total} sonuç (sayfa {page}/{pages})",
+    ]
+
+    for i, r in enumerate(result.get("results", []), start=(page - 1) * page_size + 1):
+        message_parts.extend(["", f"<b>{i}.</b> 📅 {escape_html(r['date'])} - {escape_html(r['author'])}"])
+        title = escape_html(r["title"])
+        if r.get("url"):
+            message_parts.append(f"📝 <a href=\"{r['url']}\">{title}</a>")
+        else:
+            message_parts.append(f"📝 {title}")
+
+        # snippet() eşleşmeleri \x02...\x03 ile işaretler
+        snippet = escape_html(r.get("snippet") or "")
+        snippet = snippet.replace("\x02", "<b>").replace("\x03", "</b>")
+        if snippet.strip():
+            message_parts.append(f"<i>{snippet}</i>")
+
+    if page < pages:
+        message_parts.extend(["", f"Sonraki sayfa: <code>/search {escape_html(query)} #{page + 1}</code>"])
+
+    return "\n".join(message_parts)
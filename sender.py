@@ -0,0 +1,324 @@
+"""
+AKBIS Telegram Bot - Hız Limitli Gönderim Motoru
+Telegram'ın global ve chat başına limitlerine uyarak mesajları
+farklı chatlere eşzamanlı, aynı chat içinde sırayla gönderir.
+"""
+import heapq
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, TELEGRAM_GROUP_RATE,
+    TELEGRAM_SENDER_WORKERS, TELEGRAM_MAX_RETRIES
+)
+from telegram_bot import api_request, retry_delay
+from attachments import build_requests, remember_file_ids
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    reserve() bir token ayırır ve token kullanılabilir olana kadar
+    beklenmesi gereken süreyi döndürür; böylece bekleme kilit dışında yapılır.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Bir token ayır, beklenmesi gereken süreyi (saniye) döndür"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def wait_time(self) -> float:
+        """Token ayırmadan, bir token kullanılabilir olana kadar kalan süre"""
+        with self.lock:
+            tokens = min(self.capacity, self.tokens + (time.monotonic() - self.updated_at) * self.rate)
+            return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def acquire(self):
+        """Token kullanılabilir olana kadar bekle"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Bucket'ı belirtilen süre boyunca boşalt (429 retry_after için)"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+            self.updated_at = now
+
+
+class TelegramSender:
+    """
+    Asenkron Telegram gönderici.
+
+    - submit() hemen bir Future döndürür; sonuç True/False olur.
+    - Her chat kendi kuyruğuna (lane) sahiptir, mesajlar chat içinde sırayla gider.
+    - Farklı chatlerin kuyrukları worker thread'lerde paralel işlenir.
+      Limiti dolan bir chat worker'ı bekletmez; kuyruğu zamanlayıcıya
+      bırakılır ve worker başka bir chate geçer.
+    - Global ve chat başına token bucket'lar Telegram limitlerini korur.
+    - Aynı dosya birden fazla chate gidiyorsa bir kez yüklenir, diğer
+      chatler önbelleğe yazılan file_id'yi kullanır.
+    - 429 yanıtlarında sunucunun verdiği retry_after kadar beklenir
+      (bot geneli limitte tüm chatler için).
+    - deadline (time.monotonic() zamanı) ayarlanırsa istek zaman aşımları
+      kalan süreyle sınırlanır; deadline geçtikten sonra veya bekleme süresi
+      deadline'ı aşacaksa istek yapılmaz, mesaj başarısız döner (outbox'ta
+      kalır ve sonraki çalıştırmada tekrar denenir).
+
+    Kullanım:
+        with TelegramSender() as sender:
+            future = sender.submit(chat_id, text)
+        future.result()
+    """
+
+    def __init__(self, max_workers: int = TELEGRAM_SENDER_WORKERS,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE,
+                 chat_rate: float = TELEGRAM_CHAT_RATE,
+                 group_rate: float = TELEGRAM_GROUP_RATE,
+                 max_retries: int = TELEGRAM_MAX_RETRIES,
+                 deadline: float = None):
+        # Global limit saniyelik pencerede aşılmasın diye patlama (burst) yok
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="telegram-sender")
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.wakeup = threading.Condition(self.lock)
+        self.lanes: Dict[str, deque] = {}
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+        self.scheduled: List[Tuple[float, str]] = []  # (zaman, chat_id) heap
+        self.uploads: Dict[str, Future] = {}  # dosya linki -> yükleyen chatin işi bitince tamamlanır
+        self.closing = False
+        self.scheduler = threading.Thread(target=self._run_scheduler, name="telegram-sender-scheduler", daemon=True)
+        self.scheduler.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self, wait: bool = True):
+        """Kuyruktaki tüm mesajlar gönderilene kadar bekle ve worker'ları kapat"""
+        with self.lock:
+            while wait and self.lanes:
+                self.idle.wait()
+            self.closing = True
+            self.wakeup.notify_all()
+        self.executor.shutdown(wait=wait)
+
+    def _run_scheduler(self):
+        """Limit nedeniyle ertelenen chat kuyruklarını zamanı gelince yeniden başlat"""
+        with self.lock:
+            while not self.closing:
+                if not self.scheduled:
+                    self.wakeup.wait()
+                    continue
+                due, chat_id = self.scheduled[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self.wakeup.wait(delay)
+                    continue
+                heapq.heappop(self.scheduled)
+                self.executor.submit(self._run_lane, chat_id)
+
+    def remaining(self) -> Optional[float]:
+        """deadline'a kalan süre (saniye); deadline yoksa None"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def chat_bucket(self, chat_id: str) -> TokenBucket:
+        """Chat için token bucket (gruplar negatif ID'lidir ve daha sıkı limitlidir)"""
+        with self.lock:
+            return self.chat_bucket_locked(chat_id)
+
+    def chat_bucket_locked(self, chat_id: str) -> TokenBucket:
+        """chat_bucket'ın self.lock tutulurken çağrılan hali"""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = self.group_rate if chat_id.startswith("-") else self.chat_rate
+            bucket = TokenBucket(rate)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def submit(self, chat_id: str, text: str, parse_mode: str = "HTML",
+               files: List[Dict[str, str]] = None) -> Future:
+        """
+        Mesajı gönderim kuyruğuna ekle.
+
+        Args:
+            chat_id: Hedef chat ID (varsayılan: config'den)
+            text: Mesaj metni
+            parse_mode: Mesaj formatı
+            files: Mesajın ardından belge olarak gönderilecek dosyalar
+
+        Returns:
+            Gönderim sonucunu (True/False) taşıyan Future
+        """
+        future = Future()
+        chat_id = str(chat_id or TELEGRAM_CHAT_ID)
+
+        if not TELEGRAM_BOT_TOKEN or not chat_id:
+            print("ERROR: TELEGRAM_BOT_TOKEN / TELEGRAM_CHAT_ID not set!")
+            future.set_result(False)
+            return future
+
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": parse_mode,
+            "disable_web_page_preview": False
+        }
+
+        with self.lock:
+            lane = self.lanes.get(chat_id)
+            start_lane = lane is None
+            if start_lane:
+                lane = self.lanes[chat_id] = deque()
+            lane.append((payload, files, future))
+
+        if start_lane:
+            self.executor.submit(self._run_lane, chat_id)
+
+        return future
+
+    def _run_lane(self, chat_id: str):
+        """Bir chatin kuyruğunu boşalana kadar sırayla işle"""
+        while True:
+            with self.lock:
+                lane = self.lanes[chat_id]
+                if not lane:
+                    del self.lanes[chat_id]
+                    self.idle.notify_all()
+                    return
+
+                # Chat limiti dolduysa worker'ı serbest bırak, kuyruğu ertele
+                delay = self.chat_bucket_locked(chat_id).wait_time()
+                if delay > 0:
+                    heapq.heappush(self.scheduled, (time.monotonic() + delay, chat_id))
+                    self.wakeup.notify_all()
+                    return
+
+                payload, files, future = lane.popleft()
+
+            try:
+                ok = self._deliver(chat_id, "sendMessage", payload) is not None
+                if ok and files:
+                    self._send_files(chat_id, files)
+                future.set_result(ok)
+            except Exception as e:
+                print(f"Error sending message to {chat_id}: {e}")
+                future.set_result(False)
+
+    def _claim_uploads(self, files: List[Dict[str, str]]) -> List[str]:
+        """
+        Dosyaları bu chat adına yüklemeyi üstlen (dosya başına tek yükleme).
+        Başka bir chat aynı dosyalardan birini yüklüyorsa önce onun bitmesi
+        beklenir; böylece file_id önbellekten kullanılır ve dosya chat sayısı
+        kadar indirilip yüklenmez. Bekleyen chat hiçbir dosyayı üstlenmemiş
+        olduğundan chatler birbirini kilitleyemez.
+
+        Returns:
+            Üstlenilen linkler (_release_uploads ile bırakılmalı)
+        """
+        urls = {file.get("url") for file in files if file.get("url")}
+        while True:
+            with self.lock:
+                pending = [self.uploads[url] for url in urls if url in self.uploads]
+                if not pending:
+                    for url in urls:
+                        self.uploads[url] = Future()
+                    return list(urls)
+            wait(pending)
+
+    def _release_uploads(self, urls: List[str]):
+        with self.lock:
+            flights = [self.uploads.pop(url) for url in urls]
+        for flight in flights:
+            flight.set_result(None)
+
+    def _send_files(self, chat_id: str, files: List[Dict[str, str]]):
+        """
+        Dosyaları belge olarak gönder, dönen file_id'leri önbelleğe al.
+        Hatalar mesajın başarısını etkilemez; mesajdaki linkler yedek olarak kalır.
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            return
+        claimed = self._claim_uploads(files)
+        try:
+            for method, payload, uploads, group in build_requests(chat_id, files):
+                result = self._deliver(chat_id, method, payload, uploads)
+                if result is not None:
+                    remember_file_ids(group, result.get("result"))
+        except Exception as e:
+            print(f"Error sending files to {chat_id}: {e}")
+        finally:
+            self._release_uploads(claimed)
+
+    def _deliver(self, chat_id: str, method: str, payload: dict, files: dict = None) -> Optional[dict]:
+        """
+        Limitlere uyarak tek bir API çağrısı yap, gerekirse tekrar dene.
+
+        Returns:
+            Başarılı Telegram yanıtı veya başarısızsa None
+        """
+        bucket = self.chat_bucket(chat_id)
+
+        for attempt in range(self.max_retries + 1):
+            # Önce chat limitini bekle ki global token'lar boşa tutulmasın
+            bucket.acquire()
+            self.global_bucket.acquire()
+
+            timeout = 120 if files else 30
+            remaining = self.remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    print(f"⏭️ Deadline: {method} for {chat_id} sonraki çalıştırmaya kaldı")
+                    return None
+                timeout = min(timeout, remaining)
+
+            result = api_request(method, payload, timeout=timeout, files=files)
+            if result.get("ok"):
+                return result
+
+            delay = retry_delay(result, attempt)
+            if delay is None or attempt == self.max_retries:
+                break
+            remaining = self.remaining()
+            if remaining is not None and delay >= remaining:
+                break
+
+            if result.get("error_code") == 429:
+                # Sunucunun istediği süre boyunca bu chate gönderim yapma
+                bucket.pause(delay)
+                if not chat_id.startswith("-"):
+                    # Özel chatlerde chat limitine zaten uyulduğu için 429 bot
+                    # genelindeki limitten gelir: diğer chatler de beklemeli.
+                    # Grupların kendi (dakikalık) limiti vardır, onlarınki chate özeldir.
+                    self.global_bucket.pause(delay)
+            else:
+                time.sleep(delay)
+
+        print(f"Error calling {method} for {chat_id}: {result.get('error_code')} {result.get('description')}")
+        return None
@@ -0,0 +1,156 @@
+"""
+AKBIS Telegram Bot - Shard'lı Çalıştırma
+Kaynaklar URL hash'ine göre sabit parçalara (shard) bölünür; her shard
+ana veritabanının bir kopyası üzerinde kendi kaynaklarını tarar ve
+gönderir. Birleştirme adımı shard veritabanlarındaki yenilikleri ana
+veritabanına işler. Aynı SQLite dosyasına hiçbir zaman eşzamanlı yazılmaz.
+
+GitHub Actions matrix:
+    python main.py --shard-index 0 --shard-count 4   # her matrix işinde
+    python main.py --merge                           # shard dosyaları indirildikten sonra
+
+Yerel süreç havuzu:
+    python main.py --shards 4
+"""
+import glob
+import os
+import subprocess
+import sys
+import zlib
+from typing import List
+
+from config import (
+    AKBIS_PAGES, EEE_SOURCE_ID, DATABASE_PATH, HISTORY_DATABASE_PATH,
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, TELEGRAM_GROUP_RATE
+)
+from database import (
+    get_status, merge_database, merge_history, snapshot_database, set_database_path, set_history_database_path
+)
+from pipeline import Source, build_sources
+from sender import TelegramSender
+
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def shard_of(source: Source, count: int) -> int:
+    """
+    Kaynağın shard numarası.
+    URL'nin CRC32'si kullanılır: AKBIS_PAGES sırası değişse veya liste
+    büyüse de mevcut kaynaklar aynı shard'da kalır.
+    """
+    return zlib.crc32(source.url.encode("utf-8")) % count
+
+
+def select_shard(sources: List[Source], index: int, count: int) -> List[Source]:
+    """Kaynaklardan bu shard'a düşenler (sıra korunur)"""
+    return [source for source in sources if shard_of(source, count) == index]
+
+
+def shard_source_ids(index: int, count: int) -> List[int]:
+    """Tüm kaynaklar arasından shard'a düşenlerin numaraları"""
+    sources = build_sources(set(range(len(AKBIS_PAGES))) | {EEE_SOURCE_ID})
+    return [source.id for source in select_shard(sources, index, count)]
+
+
+def shard_database_path(index: int, count: int, base: str = DATABASE_PATH) -> str:
+    """Shard veritabanı dosyası: seen_announcements.shard-0-of-4.db"""
+    root, ext = os.path.splitext(base)
+    return f"{root}.shard-{index}-of-{count}{ext}"
+
+
+def open_shard(index: int, count: int) -> str:
+    """
+    Ana veritabanının kopyasını al ve sonraki bağlantıları ona yönlendir.
+    Ana dosya yoksa shard boş veritabanıyla başlar. Çalıştırma geçmişi
+    boş bir shard geçmiş dosyasına (run_history.shard-0-of-4.db) yazılır.
+    """
+    path = shard_database_path(index, count)
+    history = shard_database_path(index, count, HISTORY_DATABASE_PATH)
+    for name in [path, history]:
+        if os.path.exists(name):
+            os.remove(name)
+    if os.path.exists(DATABASE_PATH):
+        snapshot_database(path)
+    set_database_path(path)
+    set_history_database_path(history)
+    return path
+
+
+def shard_sender(count: int) -> TelegramSender:
+    """
+    Shard göndericisi: Telegram limitleri shard'lar arasında paylaştırılır.
+    Aynı chat birden fazla shard'dan mesaj alabildiği için chat limitleri de bölünür.
+    """
+    return TelegramSender(
+        global_rate=TELEGRAM_GLOBAL_RATE / count,
+        chat_rate=TELEGRAM_CHAT_RATE / count,
+        group_rate=TELEGRAM_GROUP_RATE / count
+    )
+
+
+def merge_shards(paths: List[str] = None, remove: bool = True) -> dict:
+    """
+    Shard veritabanlarını ana veritabanına, geçmiş dosyalarını ana geçmişe birleştir.
+
+    Args:
+        paths: Shard dosyaları (varsayılan: ana veritabanının yanındaki tüm shard dosyaları)
+        remove: Birleştirilen dosyalar silinsin mi
+
+    Returns:
+        Toplam {"shards", "seen", "outbox", "sources"} sayıları
+    """
+    set_database_path(DATABASE_PATH)
+    set_history_database_path(HISTORY_DATABASE_PATH)
+    if paths is None:
+        root, ext = os.path.splitext(DATABASE_PATH)
+        paths = sorted(glob.glob(f"{glob.escape(root)}.shard-*-of-*{ext}"))
+
+    totals = {"shards": 0, "seen": 0, "outbox": 0, "sources": 0}
+    for path in paths:
+        # Shard kendi numarasını veritabanına yazar; kaynak durumları sadece
+        # sahibi olan shard'dan alınır
+        set_database_path(path)
+        shard = get_status("shard")
+        set_database_path(DATABASE_PATH)
+        if not shard:
+            print(f"⚠️ {path}: shard bilgisi yok, atlandı")
+            continue
+
+        index, count = (int(x) for x in shard.split("/"))
+        counts = merge_database(path, shard_source_ids(index, count))
+        print(f"🔀 {path}: {counts['seen']} duyuru, {counts['outbox']} outbox, {counts['sources']} kaynak")
+
+        history = shard_database_path(index, count, HISTORY_DATABASE_PATH)
+        if os.path.exists(history):
+            merge_history(history)
+            if remove:
+                os.remove(history)
+
+        totals["shards"] += 1
+        for key in counts:
+            totals[key] += counts[key]
+        if remove:
+            os.remove(path)
+
+    return totals
+
+
+def run_local_shards(count: int) -> int:
+    """
+    Shard'ları ayrı süreçlerde paralel çalıştır, sonra birleştir.
+
+    Returns:
+        Başarısız shard sayısı
+    """
+    processes = [
+        subprocess.Popen([sys.executable, MAIN_SCRIPT, "--shard-index", str(i), "--shard-count", str(count)])
+        for i in range(count)
+    ]
+    failed = sum(1 for process in processes if process.wait() != 0)
+
+    # Başarısız shard'ın yarım kalan yenilikleri de birleştirilir: outbox ve
+    # görüldü kayıtları aynı transaction'da yazıldığı için tutarlıdır
+    totals = merge_shards()
+    print(f"\n🔀 {totals['shards']}/{count} shard birleştirildi: {totals['seen']} yeni duyuru")
+    return failed
@@ -0,0 +1,117 @@
+"""
+AKBIS Telegram Bot - Kaynak Anlık Görüntüleri (Snapshot) ve Fark Motoru
+Her kaynağın son ayrıştırılan duyuru listesi sıralı (hash, içerik özeti)
+çiftleri ve tüm bölümün hash'i olarak saklanır. Yeni liste bellekte eskisiyle
+karşılaştırılır:
+
+- bölüm hash'i aynıysa kaynakta değişiklik yoktur (duyuru başına sorgu yapılmaz)
+- yeni: eski görüntüde olmayan hash'ler
+- kaldırılan: yeni listede olmayan hash'ler
+- düzenlenen: hash'i (yazar|tarih|başlık) aynı, içeriği veya dosyaları değişmiş
+
+get_hash başlık üzerinden hesaplandığı için düzenlemeler başka türlü fark edilmez.
+Aynı sayfada aynı hash'li birden fazla duyuru olabilir; duyurular (hash, sayfadaki
+kaçıncı tekrarı) ile eşleştirilir. İçeriği indirilemeyen duyurunun (EEE detay
+sayfası hatası) özeti bilinmez: eski özet aynen taşınır, düzenleme sayılmaz.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from scraper import Announcement
+
+
+def content_digest(announcement: Announcement) -> Optional[str]:
+    """İçerik ve dosyaların özeti (boşluk farkları düzenleme sayılmaz); içerik bilinmiyorsa None"""
+    if announcement.content is None:
+        return None
+    files = "\n".join(f"{f.get('name', '')}|{f.get('url', '')}" for f in announcement.files)
+    text = " ".join(announcement.content.split()) + "\n" + files
+    return hashlib.md5(text.encode()).hexdigest()[:16]
+
+
+@dataclass
+class Snapshot:
+    """Bir kaynağın sayfa sırasıyla duyuruları"""
+    items: List[Tuple[str, str]]  # [(duyuru hash'i, içerik özeti)]
+    section_hash: str = ""
+
+    def __post_init__(self):
+        if not self.section_hash:
+            text = ",".join(f"{ann_hash}:{digest}" for ann_hash, digest in self.items)
+            self.section_hash = hashlib.md5(text.encode()).hexdigest()
+
+    def dumps(self) -> str:
+        """Veritabanı için kompakt metin: "hash:özet,hash:özet,..." """
+        return ",".join(f"{ann_hash}:{digest}" for ann_hash, digest in self.items)
+
+    @classmethod
+    def loads(cls, section_hash: str, text: str) -> "Snapshot":
+        items = [tuple(item.split(":", 1)) for item in text.split(",")] if text else []
+        return cls(items, section_hash)
+
+
+def keyed(items: List[Tuple[str, Optional[str]]]) -> List[Tuple[Tuple[str, int], Optional[str]]]:
+    """[((hash, aynı hash'in sayfadaki kaçıncı tekrarı), özet)]"""
+    counts: Dict[str, int] = {}
+    result = []
+    for ann_hash, digest in items:
+        result.append(((ann_hash, counts.get(ann_hash, 0)), digest))
+        counts[ann_hash] = counts.get(ann_hash, 0) + 1
+    return result
+
+
+def take_snapshot(announcements: List[Announcement], old: Optional[Snapshot] = None) -> Snapshot:
+    """
+    Duyuruların görüntüsü. İçeriği bilinmeyen duyurular için eski görüntüdeki
+    özet taşınır (eski görüntüde de yoksa boş: bilinmiyor).
+    """
+    items = [(ann.get_hash(), content_digest(ann)) for ann in announcements]
+    if any(digest is None for _, digest in items):
+        previous = dict(keyed(old.items)) if old else {}
+        items = [
+            (key[0], digest if digest is not None else previous.get(key, ""))
+            for key, digest in keyed(items)
+        ]
+    return Snapshot(items)
+
+
+@dataclass
+class SnapshotDiff:
+    """Eski ve yeni görüntü arasındaki fark"""
+    snapshot: Snapshot
+    known: bool = False      # eski görüntü var mıydı
+    unchanged: bool = False  # bölüm hash'i aynı
+    new: List[Announcement] = field(default_factory=list)
+    edited: List[Announcement] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)  # kaldırılan duyuru hash'leri
+
+
+def diff_snapshot(old: Optional[Snapshot], announcements: List[Announcement]) -> SnapshotDiff:
+    """
+    Yeni duyuru listesini kaynağın eski görüntüsüyle karşılaştır.
+    Eski görüntü yoksa tüm duyurular yeni sayılır (görüldü kontrolü çağırana kalır).
+    Düzenlenen duyuruların revision alanı yeni içerik özetine ayarlanır; özetlerden
+    biri bilinmiyorsa (boş) düzenleme sayılmaz.
+
+    Args:
+        old: Kaynağın kayıtlı görüntüsü (yoksa None)
+        announcements: Bu çalıştırmada ayrıştırılan duyurular (sayfa sırasıyla)
+    """
+    snapshot = take_snapshot(announcements, old)
+    if old is None:
+        return SnapshotDiff(snapshot, new=list(announcements))
+    if old.section_hash == snapshot.section_hash:
+        return SnapshotDiff(snapshot, known=True, unchanged=True)
+
+    previous = dict(keyed(old.items))
+    diff = SnapshotDiff(snapshot, known=True)
+    for ann, (key, digest) in zip(announcements, keyed(snapshot.items)):
+        if key not in previous:
+            diff.new.append(ann)
+        elif previous[key] and digest and previous[key] != digest:
+            ann.revision = digest
+            diff.edited.append(ann)
+    current = {ann_hash for ann_hash, _ in snapshot.items}
+    diff.removed = list(dict.fromkeys(ann_hash for ann_hash, _ in old.items if ann_hash not in current))
+    return diff
@@ -1,15 +1,85 @@
 """
 AKBIS Telegram Bot - Telegram Entegrasyon Modülü
 """
+import json
+import re
+import threading
+import time
 import requests
-from typing import List, Dict, Optional
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from config import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_API_BASE, TELEGRAM_MAX_RETRIES,
+    TELEGRAM_MESSAGE_LIMIT, DIGEST_MODE, DIGEST_MIN_ITEMS, DIGEST_WINDOW_DAYS
+)
 from scraper import Announcement
+from search import escape_html, format_search_results
+
+
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """Thread başına tekrar kullanılan HTTP oturumu (keep-alive bağlantılar)"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
+
+def api_request(method: str, payload: dict, timeout: int = 30, files: dict = None) -> dict:
+    """
+    Telegram Bot API metodunu çağır.
+    
+    Args:
+        method: API metodu (ör. "sendMessage")
+        payload: İstek parametreleri
+        timeout: İstek zaman aşımı (saniye)
+        files: Yüklenecek dosyalar {alan adı: (dosya adı, içerik)}; verilirse
+               istek multipart olarak gönderilir
+        
+    Returns:
+        Telegram yanıtı. Ağ hatalarında {"ok": False, "error_code": 0, ...}
+        429 yanıtlarında "parameters.retry_after" bekleme süresini içerir.
+    """
+    url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/{method}"
+    
+    try:
+        if files:
+            # multipart: iç içe alanlar (ör. media) JSON string olarak gider
+            data = {k: v if isinstance(v, str) else json.dumps(v) for k, v in payload.items()}
+            response = get_session().post(url, data=data, files=files, timeout=timeout)
+        else:
+            response = get_session().post(url, json=payload, timeout=timeout)
+        try:
+            return response.json()
+        except ValueError:
+            return {"ok": False, "error_code": response.status_code, "description": response.text[:200]}
+    except requests.RequestException as e:
+        return {"ok": False, "error_code": 0, "description": str(e)}
+
+
+def retry_delay(result: dict, attempt: int) -> Optional[float]:
+    """
+    Başarısız bir API yanıtından sonra ne kadar bekleneceğini hesapla.
+    
+    Returns:
+        Bekleme süresi (saniye) veya tekrar denenmemesi gerekiyorsa None
+    """
+    error_code = result.get("error_code", 0)
+    if error_code == 429:
+        return float(result.get("parameters", {}).get("retry_after", 1))
+    if error_code == 0 or error_code >= 500:
+        # Ağ hatası / sunucu hatası: üstel bekleme
+        return min(2 ** attempt, 30)
+    return None
 
 
 def send_message(text: str, chat_id: str = None, parse_mode: str = "HTML") -> bool:
     """
     Telegram mesajı gönder.
+    429 yanıtlarında retry_after kadar beklenip tekrar denenir.
     
     Args:
         text: Gönderilecek mesaj
@@ -28,8 +98,6 @@ def send_message(text: str, chat_id: str = None, parse_mode: str = "HTML") -> bo
         print("ERROR: TELEGRAM_CHAT_ID not set!")
         return False
     
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    
     payload = {
         "chat_id": chat_id,
         "text": text,
@@ -37,13 +105,18 @@ def send_message(text: str, chat_id: str = None, parse_mode: str = "HTML") -> bo
         "disable_web_page_preview": False
     }
     
-    try:
-        response = requests.post(url, json=payload, timeout=30)
-        response.raise_for_status()
-        return response.json().get("ok", False)
-    except requests.RequestException as e:
-        print(f"Error sending message: {e}")
-        return False
+    for attempt in range(TELEGRAM_MAX_RETRIES + 1):
+        result = api_request("sendMessage", payload)
+        if result.get("ok"):
+            return True
+        
+        delay = retry_delay(result, attempt)
+        if delay is None or attempt == TELEGRAM_MAX_RETRIES:
+            break
+        time.sleep(delay)
+    
+    print(f"Error sending message: {result.get('error_code')} {result.get('description')}")
+    return False
 
 
 def format_announcement(announcement: Announcement) -> str:
@@ -58,7 +131,7 @@ def format_announcement(announcement: Announcement) -> str:
     """
     # Emoji ve başlık
     message_parts = [
-        "📢 <b>YENİ DUYURU</b>",
+        "✏️ <b>DUYURU GÜNCELLENDİ</b>" if announcement.revision else "📢 <b>YENİ DUYURU</b>",
         "",
         f"👨‍🏫 <b>{escape_html(announcement.author)}</b>",
         f"📅 {escape_html(announcement.date)}",
@@ -84,23 +157,271 @@ def format_announcement(announcement: Announcement) -> str:
             else:
                 message_parts.append(f"• {file_name}")
     
-    # Kaynak linki
+    # Kaynak linki (diğer kaynaklardaki kopyalar dahil)
     message_parts.extend([
         "",
         f"🔗 <a href=\"{announcement.source_url}\">Kaynağa Git</a>"
     ])
+    if announcement.duplicates:
+        message_parts.append(format_also_in(announcement))
     
     return "\n".join(message_parts)
 
 
-def escape_html(text: str) -> str:
-    """HTML özel karakterlerini escape et"""
-    if not text:
-        return ""
-    return (text
-            .replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;"))
+# ============ Özet (Digest) Mesajları ============
+
+TURKISH_MONTHS = {
+    "ocak": 1, "şubat": 2, "mart": 3, "nisan": 4, "mayıs": 5, "haziran": 6,
+    "temmuz": 7, "ağustos": 8, "eylül": 9, "ekim": 10, "kasım": 11, "aralık": 12
+}
+
+# HTML parçalama için: etiketler, entity'ler ve düz metin
+HTML_TOKEN_RE = re.compile(r"<[^>]+>|&[#\w]+;|[^<&]+|[<&]")
+
+
+def parse_announcement_date(date: str) -> Optional[datetime]:
+    """AKBIS (05.01.2026) ve EEE (5 Ocak 2026) tarih formatlarını çözümle"""
+    date = (date or "").strip()
+    try:
+        return datetime.strptime(date, "%d.%m.%Y")
+    except ValueError:
+        pass
+    
+    match = re.match(r"(\d{1,2})\s+(\w+)\s+(\d{4})", date)
+    if match:
+        month = TURKISH_MONTHS.get(match.group(2).replace("I", "ı").lower())
+        if month:
+            try:
+                return datetime(int(match.group(3)), month, int(match.group(1)))
+            except ValueError:
+                pass
+    return None
+
+
+def split_html_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """
+    HTML mesajı Telegram limitine göre parçala.
+    Mümkünse satır sonlarından bölünür; etiket ve entity'ler asla ortadan
+    kesilmez, bölünme anında açık kalan etiketler kapatılıp sonraki parçada
+    yeniden açılır.
+    
+    Args:
+        text: HTML formatlı mesaj
+        limit: Parça başına maksimum karakter
+        
+    Returns:
+        Mesaj parçaları
+    """
+    if len(text) <= limit:
+        return [text]
+    
+    chunks = []
+    current = ""
+    reopened = ""  # yeni parçanın başında yeniden açılan etiketler
+    open_tags = []  # [(isim, açılış etiketi)]
+    
+    def closing() -> str:
+        return "".join(f"</{name}>" for name, _ in reversed(open_tags))
+    
+    def flush():
+        nonlocal current, reopened
+        if current != reopened:
+            chunks.append(current + closing())
+        current = reopened = "".join(tag for _, tag in open_tags)
+    
+    # Kapanış etiketleri için yer ayır (iç içe birkaç kısa etiket)
+    budget = limit - 32
+    
+    for line in text.split("\n"):
+        piece = line if not current else "\n" + line
+        if len(current) + len(piece) <= budget:
+            tokens = [piece]
+        elif len(line) + sum(len(tag) for _, tag in open_tags) <= budget:
+            # Satır yeni bir parçaya sığıyor: satır sonundan böl
+            flush()
+            tokens = [line]
+        else:
+            # Satır tek başına bile sığmıyor: token token doldur
+            tokens = HTML_TOKEN_RE.findall(piece)
+        
+        for token in tokens:
+            if len(current) + len(token) > budget:
+                if not token.startswith(("<", "&")):
+                    # Düz metni sığdığı kadar böl
+                    while len(current) + len(token) > budget:
+                        room = max(budget - len(current), 1)
+                        current += token[:room]
+                        token = token[room:]
+                        flush()
+                else:
+                    flush()
+            current += token
+            
+            # Açık etiketleri takip et
+            for tag in re.findall(r"<[^>]+>", token):
+                name = re.match(r"</?\s*(\w+)", tag)
+                if not name:
+                    continue
+                if tag.startswith("</"):
+                    for i in range(len(open_tags) - 1, -1, -1):
+                        if open_tags[i][0] == name.group(1):
+                            del open_tags[i]
+                            break
+                elif not tag.endswith("/>"):
+                    open_tags.append((name.group(1), tag))
+    
+    flush()
+    return chunks
+
+
+def format_digest_item(announcement: Announcement) -> str:
+    """Özet mesajı içindeki tek bir duyurunun kısa gösterimi"""
+    title = escape_html(announcement.title)
+    icon = "✏️" if announcement.revision else "📝"
+    parts = [f"{icon} <b>{title}</b> ({escape_html(announcement.date)})"]
+    if announcement.revision:
+        parts.append("<i>Duyuru güncellendi</i>")
+    
+    if announcement.content:
+        content = announcement.content[:200]
+        if len(announcement.content) > 200:
+            content += "..."
+        parts.append(escape_html(content))
+    
+    for file in announcement.files[:5]:
+        file_name = escape_html(file.get("name", "Dosya"))
+        file_url = file.get("url", "")
+        parts.append(f"📎 <a href=\"{file_url}\">{file_name}</a>" if file_url else f"📎 {file_name}")
+    
+    parts.append(f"🔗 <a href=\"{announcement.source_url}\">Kaynağa Git</a>")
+    if announcement.duplicates:
+        parts.append(format_also_in(announcement))
+    return "\n".join(parts)
+
+
+def format_also_in(announcement: Announcement) -> str:
+    """Aynı duyurunun yayınlandığı diğer kaynaklar"""
+    links = [
+        f"<a href=\"{dup.source_url}\">{escape_html(dup.author)}</a>"
+        for dup in announcement.duplicates
+    ]
+    return "🔁 Ayrıca: " + ", ".join(links)
+
+
+def group_for_digest(announcements: List[Announcement]) -> List[List[Announcement]]:
+    """
+    Duyuruları hoca ve zaman penceresine göre grupla.
+    Aynı hocanın tarihleri arasında DIGEST_WINDOW_DAYS'ten fazla boşluk
+    olmayan duyuruları aynı gruba koyar. Hocaların sırası korunur.
+    """
+    by_author: Dict[str, List[Announcement]] = {}
+    for ann in announcements:
+        by_author.setdefault(ann.author, []).append(ann)
+    
+    groups = []
+    for items in by_author.values():
+        dated = sorted(items, key=lambda a: parse_announcement_date(a.date) or datetime.min)
+        group = []
+        last_date = None
+        for ann in dated:
+            date = parse_announcement_date(ann.date)
+            if group and date and last_date and (date - last_date).days > DIGEST_WINDOW_DAYS:
+                groups.append(group)
+                group = []
+            group.append(ann)
+            last_date = date or last_date
+        if group:
+            groups.append(group)
+    
+    return groups
+
+
+def digest_title(announcements: List[Announcement], continued: bool = False) -> str:
+    """
+    Özet mesajının başlığı: yeni ve güncellenen duyurular ayrı sayılır.
+    "📢 3 YENİ DUYURU, 1 GÜNCELLEME", devam mesajlarında "📢 DUYURULAR (devam)"
+    """
+    edited = sum(1 for ann in announcements if ann.revision)
+    new = len(announcements) - edited
+    icon = "📢" if new else "✏️"
+    
+    if continued:
+        label = "YENİ DUYURULAR" if not edited else "GÜNCELLENEN DUYURULAR" if not new else "DUYURULAR"
+        return f"{icon} <b>{label} (devam)</b>"
+    
+    counts = []
+    if new:
+        counts.append(f"{new} YENİ DUYURU")
+    if edited:
+        counts.append(f"{edited} GÜNCELLEME")
+    return f"{icon} <b>{', '.join(counts)}</b>"
+
+
+def format_digest(announcements: List[Announcement],
+                  limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[Tuple[str, List[Announcement]]]:
+    """
+    Aynı gruptaki duyuruları olabildiğince az mesaja sığdır.
+    
+    Args:
+        announcements: Aynı hocaya ait duyurular
+        limit: Mesaj başına maksimum karakter
+        
+    Returns:
+        [(mesaj metni, mesajdaki duyurular)] listesi. Tek mesaja sığmayan bir
+        duyuru birden fazla mesajda yer alabilir.
+    """
+    author = escape_html(announcements[0].author)
+    header = f"{digest_title(announcements)}\n👨‍🏫 <b>{author}</b>"
+    continued = f"{digest_title(announcements, continued=True)}\n👨‍🏫 <b>{author}</b>"
+    
+    messages = []
+    text, items = header, []
+    
+    for ann in announcements:
+        block = "\n\n" + format_digest_item(ann)
+        if len(text) + len(block) <= limit:
+            text += block
+            items.append(ann)
+            continue
+        
+        if items:
+            messages.append((text, items))
+            text, items = continued, []
+        
+        if len(text) + len(block) <= limit:
+            text += block
+            items.append(ann)
+        else:
+            # Tek başına sığmayan duyuru: HTML güvenli parçala
+            for part in split_html_message(text + block, limit):
+                messages.append((part, [ann]))
+            text, items = continued, []
+    
+    if items:
+        messages.append((text, items))
+    
+    return messages
+
+
+def build_messages(announcements: List[Announcement]) -> List[Tuple[str, List[Announcement]]]:
+    """
+    Gönderilecek mesajları oluştur.
+    Özet modu açıksa kalabalık gruplar özet mesajlara, diğerleri tekil
+    duyuru mesajlarına dönüştürülür.
+    
+    Returns:
+        [(mesaj metni, mesajdaki duyurular)] listesi
+    """
+    if DIGEST_MODE == "off":
+        return [(format_announcement(ann), [ann]) for ann in announcements]
+    
+    messages = []
+    for group in group_for_digest(announcements):
+        if len(group) >= DIGEST_MIN_ITEMS:
+            messages.extend(format_digest(group))
+        else:
+            messages.extend((format_announcement(ann), [ann]) for ann in group)
+    return messages
 
 
 def send_announcement(announcement: Announcement, chat_id: str = None) -> bool:
@@ -170,7 +491,7 @@ def test_connection() -> bool:
     if not TELEGRAM_BOT_TOKEN:
         return False
     
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getMe"
+    url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/getMe"
     
     try:
         response = requests.get(url, timeout=10)
@@ -0,0 +1,25 @@
+"""
+Testler repo kökündeki modülleri doğrudan import eder; gerçek
+seen_announcements.db yerine her test geçici bir veritabanı kullanır.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Tabloları oluşturulmuş geçici veritabanı"""
+    previous = database.DATABASE_PATH, database.HISTORY_DATABASE_PATH
+    database.set_database_path(str(tmp_path / "test.db"))
+    database.set_history_database_path(str(tmp_path / "history.db"))
+    database.init_db()
+    yield database
+    database.set_database_path(previous[0])
+    database.set_history_database_path(previous[1])
@@ -0,0 +1,56 @@
+"""database.py yardımcıları"""
+
+import pytest
+
+from near_duplicates import fingerprint_rows
+from scraper import Announcement
+
+
+def announcement(title: str, source_url: str = "https://akbis.gantep.edu.tr/a") -> Announcement:
+    return Announcement(author="Prof. Dr. Ali KAYHAN", title=title, date="01.10.2026",
+                        content=f"{title} öğrenci işleri sayfasında ilan edilmiştir. Tüm öğrencilerin dikkatine.", files=[], source_url=source_url)
+
+
+def rows_for(anns):
+    return [(ann.get_hash(), ann.author, ann.title, ann.date, ann.content, ann.files, ann.source_url)
+            for ann in anns]
+
+
+def count(db, table: str) -> int:
+    conn = db.get_connection()
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_bootstrap_seen_writes_everything_in_one_transaction(db):
+    anns = [announcement("Vize Programı"), announcement("Final Programı")]
+    marked = db.bootstrap_seen(rows_for(anns), *fingerprint_rows(anns), [(3, "abc", "h1:d1")])
+
+    assert marked == 2
+    assert db.get_seen_hashes() == {ann.get_hash() for ann in anns}
+    assert count(db, "simhash_index") == 2
+    assert db.get_source_snapshots() == {3: ("abc", "h1:d1")}
+
+
+def test_bootstrap_seen_rolls_back_on_failure(db):
+    anns = [announcement("Vize Programı")]
+    with pytest.raises(ValueError):
+        db.bootstrap_seen(rows_for(anns), *fingerprint_rows(anns), [(3, "abc")])
+
+    assert db.get_seen_hashes() == set()
+    assert count(db, "simhash_index") == 0
+
+
+def test_cleanup_keeps_old_announcements_searchable(db):
+    db.mark_seen("old", "Prof. Dr. Ali KAYHAN", "Bitirme projesi teslim tarihi", "01.10.2020",
+                 content="Proje raporları bölüm sekreterliğine teslim edilecektir.")
+    conn = db.get_connection()
+    conn.execute("UPDATE seen_announcements SET seen_at = datetime('now', '-800 days')")
+    conn.commit()
+    conn.close()
+
+    assert db.cleanup_old_records(365) == 1
+    assert not db.is_seen("old")
+    assert db.search_announcements("bitirme")["total"] == 1
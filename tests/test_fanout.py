@@ -0,0 +1,44 @@
+"""fanout.py: outbox anahtarları ve kaynak -> chat dağıtımı"""
+from config import AKBIS_PAGES, EEE_PAGE, EEE_SOURCE_ID
+from fanout import SubscriptionIndex, build_deliveries, delivery_key, enabled_source_ids
+from scraper import Announcement
+
+
+def announcement(title: str, author: str = AKBIS_PAGES[3]["name"]) -> Announcement:
+    return Announcement(date="01.10.2026", title=title, content="", files=[],
+                        source_url="https://akbis.gantep.edu.tr/a", author=author)
+
+
+def test_single_announcement_key_is_its_hash():
+    ann = announcement("Vize")
+    assert delivery_key([ann]) == ann.get_hash()
+    assert delivery_key([ann], part=2) == f"{ann.get_hash()}#2"
+
+
+def test_edit_key_does_not_collide_with_first_notification():
+    ann = announcement("Vize")
+    ann.revision = "abc123"
+    assert delivery_key([ann]) == f"{ann.get_hash()}@abc123"
+
+
+def test_digest_key_ignores_member_order():
+    a, b = announcement("Vize"), announcement("Final")
+    assert delivery_key([a, b]) == delivery_key([b, a])
+    assert delivery_key([a, b]).startswith("digest:")
+    assert delivery_key([a, b]) != delivery_key([a, announcement("Quiz")])
+
+
+def test_enabled_source_ids_prefers_bit_mask():
+    assert enabled_source_ids({"enabled_mask": 0b1010}) == [1, 3]
+    assert enabled_source_ids({"enabled": [2]}) == [2]
+    assert enabled_source_ids({}) == list(range(len(AKBIS_PAGES)))
+
+
+def test_copies_reach_subscribers_of_every_source():
+    index = SubscriptionIndex([("a", 3), ("b", EEE_SOURCE_ID), ("c", 5)])
+    ann = announcement("EE-201 Vize")
+    ann.duplicates.append(announcement("EE-201 vize", author=EEE_PAGE["name"]))
+
+    deliveries = build_deliveries([ann], index)
+    assert sorted(d.chat_id for d in deliveries) == ["a", "b"]
+    assert {d.key for d in deliveries} == {ann.get_hash()}
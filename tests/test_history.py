@@ -0,0 +1,80 @@
+"""Çalıştırma geçmişi: ayrı veritabanı, SQL pencere fonksiyonlarıyla dönem başına p50/p95"""
+import sqlite3
+
+NOW = 1_790_000_000  # sabit "şimdi" (unix)
+DAY = 86400
+
+
+def record(db, started_at: int, elapsed: float, sources: list):
+    run = {"id": started_at * 1_000_000, "started_at": started_at, "elapsed": elapsed}
+    db.record_run_history(run, sources)
+
+
+def test_source_percentiles_use_nearest_rank(db):
+    # 0. dönem: 1..20 saniye, biri hatalı
+    for k in range(1, 21):
+        record(db, NOW - k * 60, elapsed=k, sources=[(3, float(k), 0.1, 1000, 5, 0, int(k != 7))])
+
+    trends = db.get_history_trends(days=28, bucket_days=7, now=NOW)
+    assert trends["sources"] == {3: [(0, 20, 1, 10.0, 19.0)]}
+    assert trends["stages"]["run"] == [(0, 20, 0, 10.0, 19.0)]
+
+
+def test_samples_are_bucketed_by_age(db):
+    for k, seconds in enumerate([1.0, 2.0, 3.0]):
+        record(db, NOW - k * 60, elapsed=1, sources=[(3, seconds, 0.1, 1000, 5, 0, 1)])
+    record(db, NOW - 8 * DAY, elapsed=1, sources=[(3, 40.0, 0.1, 1000, 5, 0, 1)])
+    record(db, NOW - 40 * DAY, elapsed=1, sources=[(3, 99.0, 0.1, 1000, 5, 0, 1)])  # pencere dışı
+
+    trends = db.get_history_trends(days=28, bucket_days=7, now=NOW)
+    assert trends["sources"][3] == [(0, 3, 0, 2.0, 3.0), (1, 1, 0, 40.0, 40.0)]
+
+
+def test_groups_merge_their_sources(db):
+    for k in range(1, 5):
+        record(db, NOW - k * 60, elapsed=1, sources=[
+            (1, float(k), 0.1, 1000, 5, 0, 1),
+            (2, float(k + 10), 0.1, 1000, 5, 0, 1),
+            (5, 100.0, 0.1, 1000, 5, 0, 0),
+        ])
+
+    trends = db.get_history_trends(now=NOW, groups={"akbis": [1, 2], "eee": [5]})
+    assert trends["groups"]["akbis"] == [(0, 8, 0, 4.0, 14.0)]
+    assert trends["groups"]["eee"] == [(0, 4, 4, 100.0, 100.0)]
+
+
+def tables(path: str) -> set:
+    conn = sqlite3.connect(path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    return names
+
+
+def test_history_stays_out_of_main_database(db):
+    record(db, NOW - 60, elapsed=1, sources=[(3, 1.0, 0.1, 1000, 5, 0, 1)])
+
+    assert not {"run_history", "source_history"} & tables(db.DATABASE_PATH)
+    assert db.get_history_trends(now=NOW)["sources"] == {3: [(0, 1, 0, 1.0, 1.0)]}
+
+
+def test_init_moves_history_out_of_main_database(db):
+    # Önceki sürümün şeması: geçmiş ana veritabanında
+    conn = sqlite3.connect(db.DATABASE_PATH)
+    conn.execute("ATTACH DATABASE ? AS history", (db.HISTORY_DATABASE_PATH,))
+    for table in ["run_history", "source_history"]:
+        sql = conn.execute("SELECT sql FROM history.sqlite_master WHERE name = ?", (table,)).fetchone()[0]
+        conn.execute(sql)
+    conn.execute("INSERT INTO run_history (id, started_at, elapsed) VALUES (?, ?, 2.0)",
+                 ((NOW - 60) * 1_000_000, NOW - 60))
+    conn.execute("INSERT INTO source_history (source_id, run_id, fetch_seconds, ok) VALUES (3, ?, 2.0, 1)",
+                 ((NOW - 60) * 1_000_000,))
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+    db.init_db()  # ikinci kez: taşınacak bir şey yok
+
+    assert not {"run_history", "source_history"} & tables(db.DATABASE_PATH)
+    trends = db.get_history_trends(now=NOW)
+    assert trends["sources"] == {3: [(0, 1, 0, 2.0, 2.0)]}
+    assert trends["stages"]["run"] == [(0, 1, 0, 2.0, 2.0)]
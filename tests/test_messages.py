@@ -0,0 +1,91 @@
+"""telegram_bot.py: HTML mesaj bölme ve özet mesajları"""
+import re
+
+import pytest
+
+from scraper import Announcement
+from telegram_bot import format_digest, split_html_message
+
+
+def balanced(chunk: str) -> bool:
+    """Parçadaki etiketler doğru sırayla açılıp kapanıyor mu?"""
+    stack = []
+    for closing, name in re.findall(r"<(/?)(\w+)[^>]*>", chunk):
+        if not closing:
+            stack.append(name)
+        elif not stack or stack.pop() != name:
+            return False
+    return not stack
+
+
+def announcement(title: str, content: str = "") -> Announcement:
+    return Announcement(date="01.10.2026", title=title, content=content, files=[],
+                        source_url="https://akbis.gantep.edu.tr/a", author="Dr. Öğr. Üyesi Test")
+
+
+def test_short_message_is_not_split():
+    assert split_html_message("<b>kısa</b>", limit=100) == ["<b>kısa</b>"]
+
+
+def test_split_prefers_line_breaks():
+    text = "\n".join(f"satır {i}" for i in range(40))
+    chunks = split_html_message(text, limit=100)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "\n".join(chunks) == text
+
+
+@pytest.mark.parametrize("text", [
+    "<i>" + "uzun bir satır &amp; metin " * 40 + "</i>",
+    "<b>başlık</b>\n<i>" + "\n".join(f"<b>{i}</b> madde" for i in range(60)) + "</i>",
+    '<a href="https://akbis.gantep.edu.tr/a">' + "bağlantı " * 60 + "</a>",
+])
+def test_split_closes_and_reopens_tags(text):
+    chunks = split_html_message(text, limit=120)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 120
+        assert balanced(chunk), chunk
+    # Parçalar etiketler dışında metni kaybetmez
+    plain = lambda s: re.sub(r"<[^>]+>|\s", "", s)
+    assert "".join(plain(chunk) for chunk in chunks) == plain(text)
+
+
+def test_split_never_cuts_entities():
+    chunks = split_html_message("&amp;" * 100, limit=64)
+    assert all(re.fullmatch(r"(&amp;)+", chunk) for chunk in chunks)
+
+
+def test_digest_packs_announcements_into_few_messages():
+    anns = [announcement(f"Duyuru {i}", "içerik " * 20) for i in range(30)]
+    messages = format_digest(anns, limit=1000)
+
+    assert 1 < len(messages) < len(anns)
+    assert all(len(text) <= 1000 for text, _ in messages)
+    assert [ann for _, items in messages for ann in items] == anns
+    assert messages[0][0].startswith("📢 <b>30 YENİ DUYURU</b>")
+    assert "(devam)" in messages[1][0]
+
+
+def test_digest_splits_announcement_larger_than_a_message():
+    huge = announcement("Uzun", "x" * 150)
+    huge.files = [{"name": f"dosya{i}.pdf", "url": f"https://akbis.gantep.edu.tr/f/{i}"} for i in range(40)]
+    short = announcement("Kısa")
+    messages = format_digest([short, huge], limit=500)
+
+    assert all(len(text) <= 500 and balanced(text) for text, _ in messages)
+    assert messages[0][1] == [short]
+    assert sum(items == [huge] for _, items in messages) >= 2
+
+
+def test_digest_header_counts_new_and_edited_separately():
+    edited = announcement("Vize", "içerik")
+    edited.revision = "abc"
+    anns = [announcement("Final", "içerik"), announcement("Quiz", "içerik"), edited]
+
+    [(text, _)] = format_digest(anns)
+    assert text.startswith("📢 <b>2 YENİ DUYURU, 1 GÜNCELLEME</b>")
+
+    [(text, _)] = format_digest([edited, edited])
+    assert text.startswith("✏️ <b>2 GÜNCELLEME</b>")
+    assert "YENİ" not in text
@@ -0,0 +1,60 @@
+"""near_duplicates.py: SimHash parmak izleri ve benzerlik kararı"""
+from near_duplicates import BANDS, bands, distance, fingerprint, normalize, similar, simhash
+from scraper import Announcement
+
+
+def announcement(title: str, content: str = "", author: str = "Prof. Dr. Ali KAYHAN") -> Announcement:
+    return Announcement(date="01.10.2026", title=title, content=content, files=[],
+                        source_url="https://akbis.gantep.edu.tr/a", author=author)
+
+
+def match(a: Announcement, b: Announcement) -> bool:
+    fa, fb = fingerprint(a), fingerprint(b)
+    return fa is not None and fb is not None and similar(fa, fb)
+
+
+EXAM = ("EE-201 Devre Analizi dersinin vize sınavı 12 Kasım 2026 Perşembe günü "
+        "saat 13:00'te B-101 salonunda yapılacaktır.")
+
+
+def test_normalize_folds_turkish_letters_and_punctuation():
+    assert normalize("İPTAL: Işık, Çağrı & Öğüt!") == "iptal isik cagri ogut"
+
+
+def test_bands_split_simhash_into_eight_bytes():
+    value = simhash(EXAM)
+    assert len(bands(value)) == BANDS
+    assert sum(part << (band * 8) for band, part in bands(value)) == value
+
+
+def test_cross_posted_announcement_matches():
+    department = announcement("EE-201 Vize Sınavı Hakkında", EXAM, author="EEE Bölüm Başkanlığı")
+    professor = announcement("EE-201 vize sınavı", EXAM.replace("yapılacaktır", "yapılacak"))
+    assert match(department, professor)
+
+
+def test_different_course_codes_do_not_match():
+    other = EXAM.replace("EE-201 Devre Analizi", "EE-305 Elektronik")
+    assert distance(simhash(EXAM), simhash(other)) <= 20
+    assert not match(announcement("EE-201 Vize Sınavı", EXAM), announcement("EE-305 Vize Sınavı", other))
+
+
+def test_short_generic_titles_do_not_match_across_professors():
+    kayhan = announcement("Ders İptali", author="Prof. Dr. Ali KAYHAN")
+    kara = announcement("Ders İptali", author="Doç. Dr. Ayşe KARA")
+    assert fingerprint(kayhan) is None
+    assert not match(kayhan, kara)
+
+
+def test_short_results_notices_do_not_match():
+    assert not match(announcement("Vize Sonuçları", "Sonuçlar ekte."),
+                     announcement("Vize Sonuçları", "Sonuçlar ekte.", author="Doç. Dr. Ayşe KARA"))
+
+
+def test_text_without_numbers_does_not_match_text_with_numbers():
+    text = "Laboratuvar föyleri bölüm sekreterliğinden teslim alınabilir, lütfen zamanında gelin."
+    plain = fingerprint(announcement("Laboratuvar föyleri", text))
+    numbered = fingerprint(announcement("Laboratuvar föyleri", text + " 3"))
+    assert plain is not None and numbered is not None
+    assert distance(plain.simhash, numbered.simhash) <= 10
+    assert not similar(plain, numbered)
@@ -0,0 +1,54 @@
+"""Outbox: tekrar deneme zamanlaması (üstel bekleme) ve durumlar"""
+from datetime import datetime
+
+import pytest
+
+from config import OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX
+
+
+def row(db, key: str = "h1", chat_id: str = "100") -> tuple:
+    conn = db.get_connection()
+    try:
+        return conn.execute(
+            "SELECT status, attempts, next_attempt_at FROM outbox WHERE delivery_key = ? AND chat_id = ?",
+            (key, chat_id)
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def delay_of(next_attempt_at: str) -> float:
+    return (datetime.fromisoformat(next_attempt_at) - datetime.now()).total_seconds()
+
+
+def test_message_is_queued_once_per_chat(db):
+    assert db.enqueue_outbox([("h1", "100", "metin", ["h1"], None)], []) == 1
+    assert db.enqueue_outbox([("h1", "100", "metin", ["h1"], None)], []) == 0
+    [due] = db.get_due_outbox()
+    assert (due["key"], due["chat_id"], due["hashes"], due["attempts"]) == ("h1", "100", ["h1"], 0)
+
+
+@pytest.mark.parametrize("attempts", [0, 1, 3, OUTBOX_MAX_ATTEMPTS - 2])
+def test_failed_send_backs_off_exponentially(db, attempts):
+    db.enqueue_outbox([("h1", "100", "metin", ["h1"], None)], [])
+    db.update_outbox_results([("h1", "100", attempts, False)])
+
+    status, stored_attempts, next_attempt_at = row(db)
+    assert status == "pending"
+    assert stored_attempts == attempts + 1
+    assert delay_of(next_attempt_at) == pytest.approx(
+        min(OUTBOX_RETRY_BASE * 2 ** attempts, OUTBOX_RETRY_MAX), abs=5)
+    assert db.get_due_outbox() == []
+
+
+def test_message_is_dead_after_max_attempts(db):
+    db.enqueue_outbox([("h1", "100", "metin", ["h1"], None)], [])
+    db.update_outbox_results([("h1", "100", OUTBOX_MAX_ATTEMPTS - 1, False)])
+    assert row(db)[:2] == ("dead", OUTBOX_MAX_ATTEMPTS)
+
+
+def test_sent_message_leaves_the_queue(db):
+    db.enqueue_outbox([("h1", "100", "metin", ["h1"], None)], [])
+    db.update_outbox_results([("h1", "100", 0, True)])
+    assert row(db)[:2] == ("sent", 1)
+    assert db.get_due_outbox() == []
@@ -0,0 +1,121 @@
+"""pipeline.py: kalıcı indirme thread'leri, süreç havuzunda ayrıştırma, geri basınç ve süre sınırı"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pipeline
+import scraper
+from config import AKBIS_PAGES
+from fanout import SubscriptionIndex
+from parse_pool import ParsePool
+from pipeline import Pipeline, build_sources
+from profiling import RunProfiler
+from scraper import Announcement, get_session
+from snapshots import take_snapshot
+
+
+def test_fetch_executor_keeps_http_sessions_across_runs(db, monkeypatch):
+    sessions = []
+
+    def fetch(source, *args):
+        time.sleep(0.05)  # tüm worker'lar iş alsın
+        sessions.append(id(get_session()))
+        return None  # indirilemedi: sonraki aşamalara gitmez
+
+    monkeypatch.setattr(pipeline.Source, "fetch", fetch)
+    sources = build_sources(set(range(8)))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(2):
+            Pipeline(SubscriptionIndex([]), fetch_workers=4, fetch_executor=executor).run(sources)
+
+    first, second = set(sessions[:8]), set(sessions[8:])
+    assert len(first) == 4
+    assert second == first
+
+
+
+def test_pooled_parse_records_worker_parse_seconds(db, monkeypatch):
+    monkeypatch.setattr(pipeline.Source, "fetch", lambda source, *args: "<html><body></body></html>")
+    sources = build_sources(set(range(4)))
+    profiler = RunProfiler()
+
+    with ParsePool(workers=2, chunk_size=2, min_pages=0) as pool:
+        stats = Pipeline(SubscriptionIndex([]), parse_pool=pool, profiler=profiler).run(sources)
+        assert pool.executor is not None  # süreç havuzu kullanıldı
+
+    assert set(stats.source_parse) == {source.id for source in sources}
+    assert all(seconds > 0 for seconds in stats.source_parse.values())
+    assert {source_id: entry["parse"] for source_id, entry in profiler.sources.items()} == stats.source_parse
+
+
+def test_cprofile_parses_in_thread(db, monkeypatch):
+    monkeypatch.setattr(pipeline.Source, "fetch", lambda source, *args: "<html><body></body></html>")
+    sources = build_sources(set(range(4)))
+    profiler = RunProfiler(cprofile=True)
+
+    with ParsePool(workers=2, chunk_size=2, min_pages=0) as pool:
+        stats = Pipeline(SubscriptionIndex([]), parse_pool=pool, profiler=profiler).run(sources)
+        assert pool.executor is None  # işçi süreçler cProfile'a görünmez
+
+    assert set(stats.source_parse) == {source.id for source in sources}
+    assert profiler.profile.getstats()
+
+class ManualSender:
+    """Gönderimleri test bitirene kadar bekleten gönderici"""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, chat_id, text, parse_mode="HTML", files=None):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_render_waits_when_sender_window_is_full(db):
+    source = build_sources({3})[0]
+    ann = Announcement(date="01.10.2026", title="Vize", content="Vize sınavı", files=[],
+                       source_url=source.url, author=AKBIS_PAGES[3]["name"])
+    sender = ManualSender()
+    stage = Pipeline(SubscriptionIndex([(str(chat), 3) for chat in range(5)]), sender=sender, send_window=2)
+    stage.started = time.monotonic()
+
+    render = threading.Thread(target=stage._render, args=((source, [ann], [], take_snapshot([ann])),))
+    render.start()
+    assert wait_for(lambda: len(sender.futures) == 2)
+    time.sleep(0.1)
+    assert len(sender.futures) == 2  # pencere dolu: render bekliyor
+
+    for sent in range(5):
+        sender.futures[sent].set_result(True)
+        assert wait_for(lambda: len(sender.futures) == min(sent + 3, 5))
+    render.join(timeout=2)
+    assert not render.is_alive()
+
+
+def test_eee_detail_pages_skipped_after_deadline(monkeypatch):
+    requested = []
+
+    def fetch_page(url, timeout=30):
+        requested.append((url, timeout))
+        time.sleep(0.1)
+        return "<html></html>"
+
+    links = [("01.10.2026", f"Duyuru {i}", f"https://eee.example/d{i}") for i in range(5)]
+    monkeypatch.setattr(scraper, "fetch_page", fetch_page)
+    monkeypatch.setattr(scraper, "parse_eee_links", lambda html, base_url: links)
+
+    pages = scraper.fetch_eee_page("https://eee.example", deadline=time.monotonic() + 0.25)
+
+    assert len(requested) < len(links) + 1
+    assert all(timeout <= 0.25 for _, timeout in requested)
+    assert pages["details"]["https://eee.example/d4"] is None
+    assert list(pages["details"]) == [url for _, _, url in links]
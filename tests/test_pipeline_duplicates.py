@@ -0,0 +1,56 @@
+"""Kaynaklar arası kopyalar: daha önce gönderilmiş kopya bildirimi düşürmez"""
+import pytest
+
+import pipeline
+from config import AKBIS_PAGES, EEE_PAGE, EEE_SOURCE_ID
+from fanout import SubscriptionIndex, build_deliveries
+from near_duplicates import NearDuplicateIndex, record_fingerprints
+from pipeline import Pipeline
+from scraper import Announcement
+
+EXAM = ("EE-201 Devre Analizi dersinin vize sınavı 12 Kasım 2026 Perşembe günü "
+        "saat 13:00'te B-101 salonunda yapılacaktır.")
+
+
+def announcement(author: str, title: str = "EE-201 Vize Sınavı") -> Announcement:
+    return Announcement(date="01.10.2026", title=title, content=EXAM, files=[],
+                        source_url="https://akbis.gantep.edu.tr/a", author=author)
+
+
+@pytest.fixture
+def run(db, monkeypatch):
+    """Dedupe aşamasını çalıştırılmış gibi hazırlanan pipeline"""
+    monkeypatch.setattr(pipeline, "NEAR_DUPLICATE_MODE", "skip")
+
+    def make(pairs):
+        stage = Pipeline(SubscriptionIndex(pairs))
+        stage.near = NearDuplicateIndex()
+        return stage
+    return make
+
+
+def test_copy_sent_in_earlier_run_reaches_uncovered_subscribers(run):
+    professor = AKBIS_PAGES[3]["name"]
+    record_fingerprints([announcement(EEE_PAGE["name"])])
+    stage = run([("both", EEE_SOURCE_ID), ("both", 3), ("professor-only", 3)])
+
+    ann = announcement(professor, "EE-201 vize sınavı hakkında")
+    assert stage._near_duplicate(ann) is None
+    assert ann.notified == {"both"}
+    assert [d.chat_id for d in build_deliveries([ann], stage.index)] == ["professor-only"]
+
+
+def test_copy_is_skipped_when_every_subscriber_already_has_it(run):
+    record_fingerprints([announcement(EEE_PAGE["name"])])
+    stage = run([("both", EEE_SOURCE_ID), ("both", 3)])
+
+    assert stage._near_duplicate(announcement(AKBIS_PAGES[3]["name"])) == "skipped"
+
+
+def test_copy_streamed_earlier_in_the_same_run_reaches_uncovered_subscribers(run):
+    stage = run([("eee", EEE_SOURCE_ID), ("professor", 3)])
+    assert stage._near_duplicate(announcement(EEE_PAGE["name"])) is None
+
+    ann = announcement(AKBIS_PAGES[3]["name"])
+    assert stage._near_duplicate(ann) is None
+    assert ann.notified == {"eee"}
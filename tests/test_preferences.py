@@ -0,0 +1,22 @@
+"""Daemon modunda takip listesi admin bot'un yazdığı tablodan okunur"""
+import json
+
+import fanout
+import main
+from config import AKBIS_PAGES, EEE_SOURCE_ID
+
+
+def test_daemon_index_follows_database_preferences(db, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(fanout, "TELEGRAM_CHAT_ID", "100")
+    (tmp_path / "preferences.json").write_text(json.dumps({"enabled_mask": 1 << 3}))
+
+    db.init_professor_preferences(AKBIS_PAGES)
+    db.set_all_professors_enabled(False)
+    db.set_professor_enabled(5, True)
+
+    assert main.load_subscription_index().chats_for(3) == {"100"}
+    index = main.load_subscription_index(db_preferences=True)
+    assert index.chats_for(5) == {"100"}
+    assert index.chats_for(3) == frozenset()
+    assert index.chats_for(EEE_SOURCE_ID) == {"100"}
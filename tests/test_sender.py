@@ -0,0 +1,83 @@
+"""TelegramSender limitleri: yerel Bot API taklidine karşı"""
+import time
+
+import pytest
+
+import sender as sender_module
+import telegram_bot
+from benchmarks.mock_bot_api import MockBotAPI
+from sender import TelegramSender, TokenBucket
+
+
+@pytest.fixture
+def bot_api(monkeypatch):
+    with MockBotAPI(retry_after=1) as api:
+        monkeypatch.setattr(telegram_bot, "TELEGRAM_API_BASE", api.base_url)
+        monkeypatch.setattr(telegram_bot, "TELEGRAM_BOT_TOKEN", "test-token")
+        monkeypatch.setattr(sender_module, "TELEGRAM_BOT_TOKEN", "test-token")
+        yield api.state
+
+
+def test_token_bucket_pause_delays_next_token():
+    bucket = TokenBucket(rate=10)
+    bucket.pause(0.5)
+    assert bucket.wait_time() == pytest.approx(0.6, abs=0.05)
+
+
+def test_private_chat_429_pauses_all_chats(bot_api):
+    with TelegramSender(chat_rate=100, global_rate=100) as sender:
+        bot_api.rate_429 = 1.0
+        first = sender.submit("1", "a")
+        time.sleep(0.2)
+        bot_api.rate_429 = 0.0
+        start = time.monotonic()
+        assert sender.submit("2", "b").result(timeout=5)
+        assert time.monotonic() - start >= 0.6
+        assert first.result(timeout=5)
+
+
+def test_group_429_does_not_pause_other_chats(bot_api):
+    with TelegramSender(chat_rate=100, global_rate=100, group_rate=100) as sender:
+        bot_api.rate_429 = 1.0
+        first = sender.submit("-100", "a")
+        time.sleep(0.2)
+        bot_api.rate_429 = 0.0
+        start = time.monotonic()
+        assert sender.submit("2", "b").result(timeout=5)
+        assert time.monotonic() - start < 0.5
+        assert first.result(timeout=5)
+
+
+def test_attachment_uploaded_once_across_chats(bot_api, db, monkeypatch):
+    import attachments
+
+    downloads = []
+
+    def download_file(url):
+        downloads.append(url)
+        time.sleep(0.1)
+        return b"%PDF-1.4 test"
+
+    monkeypatch.setattr(attachments, "download_file", download_file)
+    files = [{"name": "program.pdf", "url": "http://example.com/program.pdf"}]
+    with TelegramSender(max_workers=8) as sender:
+        futures = [sender.submit(str(chat), "duyuru", files=files) for chat in range(1, 9)]
+        assert all(future.result(timeout=10) for future in futures)
+
+    assert downloads == ["http://example.com/program.pdf"]
+    assert bot_api.counts["sendDocument"] == 8
+
+
+def test_past_deadline_sends_nothing(bot_api):
+    with TelegramSender(deadline=time.monotonic() - 1) as sender:
+        assert sender.submit("1", "a").result(timeout=5) is False
+    assert not bot_api.counts
+
+
+def test_deadline_stops_retries(bot_api):
+    bot_api.rate_5xx = 1.0
+    with TelegramSender(deadline=time.monotonic() + 0.5) as sender:
+        start = time.monotonic()
+        assert sender.submit("1", "a").result(timeout=10) is False
+        assert time.monotonic() - start < 0.5
+    assert sum(bot_api.counts.values()) == 1
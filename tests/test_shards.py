@@ -0,0 +1,80 @@
+"""Shard'lı çalıştırma: kaynak bölüşümü ve shard veritabanlarının birleştirilmesi"""
+import pytest
+
+from config import AKBIS_PAGES, EEE_SOURCE_ID
+from pipeline import build_sources
+from shards import select_shard, shard_source_ids
+
+
+def all_sources():
+    return build_sources(set(range(len(AKBIS_PAGES))) | {EEE_SOURCE_ID})
+
+
+@pytest.mark.parametrize("count", [1, 2, 4, 7])
+def test_every_source_is_in_exactly_one_shard(count):
+    ids = [source_id for index in range(count) for source_id in shard_source_ids(index, count)]
+    assert sorted(ids) == sorted(source.id for source in all_sources())
+
+
+def test_shard_keeps_source_order():
+    sources = all_sources()
+    shard = select_shard(sources, 0, 3)
+    assert shard == [source for source in sources if source in shard]
+
+
+def run_shard(db, path: str, work):
+    """Ana veritabanının kopyası üzerinde bir shard çalıştırmasını taklit et"""
+    main = db.DATABASE_PATH
+    db.snapshot_database(path)
+    db.set_database_path(path)
+    try:
+        work()
+    finally:
+        db.set_database_path(main)
+
+
+def test_merge_is_idempotent_and_keeps_advanced_outbox_state(db, tmp_path):
+    db.enqueue_outbox([("h1", "100", "metin", ["h1"], None),
+                       ("h2", "100", "metin", ["h2"], None)], [])
+    shard = str(tmp_path / "shard.db")
+
+    def work():
+        db.mark_seen("h3", "Yazar", "Başlık", "01.10.2026")
+        db.update_outbox_results([("h1", "100", 0, True)])
+        db.enqueue_outbox([("h3", "100", "metin", ["h3"], None)], [])
+        db.update_source_states([(3, 1.5, 1), (4, 2.0, 0)], [])
+
+    run_shard(db, shard, work)
+    # Ana veritabanında bu arada h2 için iki deneme yapılmış olsun
+    db.update_outbox_results([("h2", "100", 0, False)])
+    db.update_outbox_results([("h2", "100", 1, False)])
+
+    first = db.merge_database(shard, [3])
+    assert first == {"seen": 1, "outbox": 2, "sources": 1}
+    assert db.merge_database(shard, [3]) == {"seen": 0, "outbox": 0, "sources": 1}
+
+    conn = db.get_connection()
+    outbox = dict(((key, (status, attempts)) for key, status, attempts in
+                   conn.execute("SELECT delivery_key, status, attempts FROM outbox")))
+    conn.close()
+    assert outbox == {"h1": ("sent", 1), "h2": ("pending", 2), "h3": ("pending", 0)}
+    assert db.is_seen("h3")
+    assert set(db.get_source_states()) == {3}
+
+
+def test_shard_history_merges_into_main_history(db, tmp_path):
+    main = db.HISTORY_DATABASE_PATH
+    shard = str(tmp_path / "history.shard-0-of-2.db")
+    run = {"id": 1_790_000_000_000_000, "started_at": 1_790_000_000, "elapsed": 3.0}
+
+    db.set_history_database_path(shard)
+    try:
+        db.init_history_db()
+        db.record_run_history(run, [(3, 1.5, 0.1, 1000, 5, 0, 1)])
+    finally:
+        db.set_history_database_path(main)
+
+    assert db.merge_history(shard) == 1
+    assert db.merge_history(shard) == 0
+    trends = db.get_history_trends(now=1_790_000_060)
+    assert trends["sources"] == {3: [(0, 1, 0, 1.5, 1.5)]}
@@ -0,0 +1,95 @@
+"""snapshots.py: yeni/kaldırılan/düzenlenen farkı"""
+from scraper import Announcement, parse_eee_page
+from snapshots import Snapshot, diff_snapshot, take_snapshot
+
+
+def announcement(title: str, content="Vize sınavı B-101 salonunda yapılacaktır.") -> Announcement:
+    return Announcement(date="01.10.2026", title=title, content=content, files=[],
+                        source_url="https://eee.gaziantep.edu.tr/duyuru.php?id=1", author="EEE Bölümü")
+
+
+def test_first_snapshot_reports_everything_as_new():
+    anns = [announcement("Vize"), announcement("Final")]
+    diff = diff_snapshot(None, anns)
+    assert not diff.known
+    assert diff.new == anns
+
+
+def test_unchanged_section_is_skipped():
+    old = take_snapshot([announcement("Vize"), announcement("Final")])
+    diff = diff_snapshot(old, [announcement("Vize"), announcement("Final")])
+    assert diff.unchanged
+    assert diff.new == diff.edited == diff.removed == []
+
+
+def test_new_removed_and_edited():
+    old = take_snapshot([announcement("Vize"), announcement("Final")])
+    quiz, vize = announcement("Quiz"), announcement("Vize", "Vize sınavı B-203 salonuna alındı.")
+    diff = diff_snapshot(old, [quiz, vize])
+
+    assert diff.new == [quiz]
+    assert diff.edited == [vize]
+    assert vize.revision == take_snapshot([vize]).items[0][1]
+    assert diff.removed == [announcement("Final").get_hash()]
+
+
+def test_whitespace_changes_are_not_edits():
+    old = take_snapshot([announcement("Vize")])
+    diff = diff_snapshot(old, [announcement("Vize", "Vize  sınavı\nB-101 salonunda yapılacaktır. ")])
+    assert diff.unchanged
+
+
+def test_snapshot_round_trip():
+    snapshot = take_snapshot([announcement("Vize"), announcement("Final")])
+    assert Snapshot.loads(snapshot.section_hash, snapshot.dumps()) == snapshot
+
+
+def test_failed_detail_fetch_is_not_an_edit():
+    old = take_snapshot([announcement("Vize")])
+
+    failed = diff_snapshot(old, [announcement("Vize", content=None)])
+    assert failed.unchanged
+    assert failed.snapshot == old
+
+    recovered = diff_snapshot(failed.snapshot, [announcement("Vize")])
+    assert recovered.unchanged
+
+
+def test_unknown_content_is_learned_without_an_edit():
+    old = take_snapshot([announcement("Vize", content=None)])
+    assert old.items[0][1] == ""
+
+    diff = diff_snapshot(old, [announcement("Vize")])
+    assert diff.edited == []
+    assert diff.snapshot.items[0][1] != ""
+
+
+def test_parse_eee_page_marks_failed_detail_pages():
+    url = "https://eee.gaziantep.edu.tr/duyuru.php?id=7"
+    pages = {"list": '<a href="duyuru.php?id=7">12 Kasım 2026 Vize Programı</a>', "details": {url: None}}
+    [ann] = parse_eee_page(pages)
+    assert ann.title == "Vize Programı"
+    assert ann.content is None
+
+
+def test_repeated_hash_on_one_page_is_not_an_edit():
+    # Aynı gün aynı başlıkla iki duyuru: hash'leri aynı, içerikleri farklı
+    first = announcement("Ders İptali", "Pazartesi dersi yapılmayacaktır.")
+    second = announcement("Ders İptali", "Salı dersi yapılmayacaktır.")
+    old = take_snapshot([first, second])
+
+    quiz = announcement("Quiz")
+    diff = diff_snapshot(old, [quiz, first, second])
+    assert diff.new == [quiz]
+    assert diff.edited == []
+    assert diff.removed == []
+
+
+def test_edit_of_repeated_hash_is_detected_once():
+    first = announcement("Ders İptali", "Pazartesi dersi yapılmayacaktır.")
+    second = announcement("Ders İptali", "Salı dersi yapılmayacaktır.")
+    old = take_snapshot([first, second])
+
+    edited = announcement("Ders İptali", "Salı dersi perşembeye alındı.")
+    diff = diff_snapshot(old, [first, edited])
+    assert diff.edited == [edited]
@@ -0,0 +1,79 @@
+"""api/webhook.py: komut yanıtı HTTP yanıtının gövdesinde döner"""
+import json
+
+import pytest
+
+from benchmarks.bench_webhook import MockGitHub, call_webhook as post, webhook
+
+
+def update(update_id: int, text: str) -> dict:
+    return {"update_id": update_id, "message": {"text": text, "chat": {"id": 42}, "from": {"id": 7}}}
+
+
+@pytest.fixture(autouse=True)
+def fresh_updates(monkeypatch):
+    monkeypatch.setattr(webhook, "_seen_updates", {})
+    monkeypatch.setattr(webhook, "UPSTASH_REDIS_REST_URL", "")
+
+
+def test_reply_is_returned_inline():
+    status, payload = post(update(1, "/start"))
+    reply = json.loads(payload)
+    assert status == 200
+    assert reply["method"] == "sendMessage"
+    assert reply["chat_id"] == "42"
+
+
+def test_command_finishes_before_response(monkeypatch):
+    calls = []
+    monkeypatch.setattr(webhook, "handle_command", lambda chat_id, user_id, text: calls.append(text) or "ok")
+    status, payload = post(update(2, "/follow 3"))
+    assert calls == ["/follow 3"]
+    assert json.loads(payload)["text"] == "ok"
+
+
+def test_redelivered_update_is_dropped(monkeypatch):
+    calls = []
+    monkeypatch.setattr(webhook, "handle_command", lambda chat_id, user_id, text: calls.append(text) or "ok")
+    post(update(3, "/list"))
+    status, payload = post(update(3, "/list"))
+    assert status == 200
+    assert payload == b"OK"
+    assert calls == ["/list"]
+
+
+def test_failed_command_is_released_for_redelivery(monkeypatch):
+    def fail(chat_id, user_id, text):
+        raise RuntimeError("GitHub unreachable")
+
+    monkeypatch.setattr(webhook, "handle_command", fail)
+    status, _ = post(update(4, "/follow 3"))
+    assert status == 500
+
+    monkeypatch.setattr(webhook, "handle_command", lambda chat_id, user_id, text: "✅")
+    status, payload = post(update(4, "/follow 3"))
+    assert status == 200
+    assert json.loads(payload)["text"] == "✅"
+
+
+def test_expired_search_db_is_revalidated_not_downloaded(monkeypatch, tmp_path):
+    with MockGitHub({"seen_announcements.db": b"v1"}) as github:
+        monkeypatch.setattr(webhook, "GITHUB_API_BASE", github.base_url)
+        monkeypatch.setattr(webhook, "GITHUB_REPO", "akbis/bot")
+        monkeypatch.setattr(webhook, "GITHUB_TOKEN", "test")
+        monkeypatch.setattr(webhook, "SEARCH_DB_PATH", str(tmp_path / "search.db"))
+        monkeypatch.setattr(webhook, "_search_db", {"etag": None, "fetched_at": 0.0})
+
+        assert webhook.fetch_search_db()
+        assert webhook.fetch_search_db()  # TTL içinde istek yok
+        webhook._search_db["fetched_at"] = 0.0
+        assert webhook.fetch_search_db()
+        github.files["seen_announcements.db"] = b"v2"
+        webhook._search_db["fetched_at"] = 0.0
+        assert webhook.fetch_search_db()
+
+        assert dict(github.counts) == {
+            ("GET", "seen_announcements.db", 200): 2,
+            ("GET", "seen_announcements.db", 304): 1,
+        }
+        assert open(webhook.SEARCH_DB_PATH, "rb").read() == b"v2"
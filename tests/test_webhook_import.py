@@ -0,0 +1,19 @@
+"""api/webhook.py cold start sınırları (benchmarks/bench_webhook_import.py ile aynı ölçüm)"""
+import statistics
+
+from benchmarks.bench_webhook_import import BASELINE_IMPORTS, FORBIDDEN_MODULES, measure
+
+MAX_OVERHEAD_MS = 30.0
+RUNS = 5
+
+
+def test_webhook_does_not_load_heavy_modules():
+    modules = measure("import webhook")["modules"]
+    assert [m for m in FORBIDDEN_MODULES if m in modules] == []
+
+
+def test_webhook_import_overhead_within_budget():
+    measure("import webhook")  # .pyc ve disk önbelleğini ısıt
+    baseline = statistics.median(measure(BASELINE_IMPORTS)["elapsed"] for _ in range(RUNS))
+    webhook = statistics.median(measure("import webhook")["elapsed"] for _ in range(RUNS))
+    assert (webhook - baseline) * 1000 <= MAX_OVERHEAD_MS
@@ -0,0 +1,13 @@
+"""api/webhook.py yanıt süresi (benchmarks/bench_webhook.py ile aynı ölçüm)"""
+from benchmarks.bench_webhook import COMMANDS, run
+
+MAX_P95_MS = 1000.0
+
+
+def test_webhook_p95_within_budget():
+    result = run(iterations=3, latency=0.05, announcements=500)
+    assert result["all"] <= MAX_P95_MS
+    # Önbellek geçerliyken hiçbir komut GitHub'a gitmez
+    assert [c for c in COMMANDS if result[(c, "warm")]["github"]] == []
+    # Süresi dolan önbellek tek koşullu istekle doğrulanır
+    assert all(result[(c, "expired")]["github"] <= 1 for c in COMMANDS)